@@ -0,0 +1,49 @@
+"""Run the offline benchmark suites, each in a fresh process, into one run directory.
+
+    uv run python -m benchmarks [--suites startup,routes,mail_render,load] [-o DIR]
+
+``concurrency`` needs the ``async`` extra, so it only runs when listed in ``--suites``.
+
+Compare two runs with ``python -m benchmarks.compare OLD_DIR NEW_DIR``.
+"""
+import argparse
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks import harness
+
+SUITES = ["startup", "routes", "mail_render", "load"]
+OPTIONAL_SUITES = ["concurrency"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suites", default=",".join(SUITES), help="comma-separated suites to run")
+    parser.add_argument("-o", "--output", help="run directory (default: benchmarks/results/<time>/)")
+    args = parser.parse_args()
+
+    suites = [name for name in args.suites.split(",") if name]
+    unknown = set(suites) - set(SUITES) - set(OPTIONAL_SUITES)
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+    run_dir = Path(args.output) if args.output else (
+        harness.RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}"
+    )
+
+    failed = []
+    for name in suites:
+        print(f"\n== {name}", flush=True)
+        proc = subprocess.run(
+            [sys.executable, "-m", f"benchmarks.{name}", "-o", str(run_dir / f"{name}.json")], cwd=harness.ROOT,
+        )
+        if proc.returncode:
+            failed.append(name)
+    if failed:
+        sys.exit(f"[bench] Failed: {', '.join(failed)}")
+    print(f"\n[bench] Run saved in {run_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare two benchmark runs and flag regressions.
+
+    uv run python -m benchmarks.compare OLD NEW [--threshold 10]
+
+OLD and NEW are result files of the same suite, or run directories written
+by ``python -m benchmarks`` (files are then paired by name). Exits with
+status 1 if any metric got worse by more than ``--threshold`` percent.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Tail maxima and single-run minima are too noisy to gate on.
+GATED = {"p50_ms", "p95_ms", "median", "us", "rps", "errors"}
+HIGHER_IS_BETTER = {"rps"}
+
+
+def _pairs(old, new):
+    old, new = Path(old), Path(new)
+    if old.is_dir() and new.is_dir():
+        for path in sorted(new.glob("*.json")):
+            if (old / path.name).exists():
+                yield old / path.name, path
+    else:
+        yield old, new
+
+
+def compare(old_path, new_path, threshold):
+    old, new = json.loads(Path(old_path).read_text()), json.loads(Path(new_path).read_text())
+    if old["suite"] != new["suite"]:
+        raise SystemExit(f"{old_path} is a {old['suite']} run, {new_path} is a {new['suite']} run")
+    print(f"== {new['suite']}: {old.get('git')} ({old['created_at']}) -> {new.get('git')} ({new['created_at']})")
+    if old["params"] != new["params"]:
+        print(f"   note: parameters differ: {old['params']} vs {new['params']}")
+
+    regressions = 0
+    for case, metrics in new["results"].items():
+        before = old["results"].get(case)
+        if before is None:
+            continue
+        for metric, value in metrics.items():
+            previous = before.get(metric)
+            if metric not in GATED or not isinstance(value, (int, float)) or not isinstance(previous, (int, float)):
+                continue
+            if metric == "errors":
+                worse = value > previous
+                change = f"{previous} -> {value}"
+            elif previous:
+                delta = (value - previous) / previous * 100
+                worse = (-delta if metric in HIGHER_IS_BETTER else delta) > threshold
+                change = f"{previous:.2f} -> {value:.2f} ({delta:+.1f}%)"
+            else:
+                continue
+            if worse:
+                regressions += 1
+            print(f"   {'REGRESSION' if worse else '':<10} {case:<32} {metric:<10} {change}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change tolerated")
+    args = parser.parse_args()
+
+    regressions = sum(compare(old, new, args.threshold) for old, new in _pairs(args.old, args.new))
+    print(f"[bench] {regressions} regression(s) beyond {args.threshold:g}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Slow AI calls against fast page views: the sync server versus the ASGI entry point.
+
+    uv run python -m benchmarks.concurrency [--threads 8] [-d 10] [--ai-delay 0.25] [--slow 0,8,32]
+
+Each mode is served from a child process against one seeded throwaway
+database. ``sync`` is the Flask app on a WSGI server with ``--threads``
+worker threads, like one gunicorn ``gthread`` worker; ``async`` is
+``uvicorn src.asgi:app`` with ``ASGI_THREADS`` set to the same number
+(needs ``pip install ".[async]"``). For every count in ``--slow``, that
+many clients keep ``POST /tasks/ai-suggest`` busy with uncached titles
+(the fake model answers after ``--ai-delay`` seconds per chunk) while
+``--fast`` clients load pages. The ``pages`` rows are the point: under
+the sync server they queue behind the model once the slow clients take
+every thread.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks import harness
+
+SYNC_CHILD = """
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from src.app import create_app
+
+
+class Handler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class Server(BaseWSGIServer):
+    # One request per thread and at most `threads` at a time; the rest wait
+    # in the listen backlog, as they do for a gunicorn gthread worker.
+    def __init__(self, port, threads):
+        super().__init__("127.0.0.1", port, create_app(), handler=Handler)
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+Server(int(sys.argv[1]), int(sys.argv[2])).serve_forever()
+"""
+
+ASYNC_CHILD = """
+import sys
+import uvicorn
+
+uvicorn.run("src.asgi:app", host="127.0.0.1", port=int(sys.argv[1]), log_level="warning")
+"""
+
+PAGES = ["/tasks/", "/api/v1/tasks"]
+
+_unique = itertools.count()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(proc, port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with status {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/livez")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("server did not become ready")
+
+
+class _Client(threading.Thread):
+    """Sends one kind of request back to back, each on a new connection."""
+
+    def __init__(self, port, kind, deadline):
+        super().__init__(daemon=True)
+        self.port = port
+        self.kind = kind
+        self.deadline = deadline
+        self.samples = []
+        self.errors = 0
+
+    def _request(self, conn, index):
+        if self.kind == "ai":
+            body = json.dumps({"title": f"Plan the offsite {next(_unique)}", "body": "Budget and venue"})
+            conn.request("POST", "/tasks/ai-suggest", body, {"Content-Type": "application/json"})
+        else:
+            conn.request("GET", PAGES[index % len(PAGES)])
+
+    def run(self):
+        for index in itertools.count():
+            if time.perf_counter() >= self.deadline:
+                return
+            started = time.perf_counter()
+            conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+            try:
+                self._request(conn, index)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                continue
+            finally:
+                conn.close()
+            if status >= 500:
+                self.errors += 1
+            else:
+                self.samples.append(time.perf_counter() - started)
+
+
+def drive(port, slow, fast, duration):
+    deadline = time.perf_counter() + duration
+    clients = [_Client(port, "ai", deadline) for _ in range(slow)]
+    clients += [_Client(port, "pages", deadline) for _ in range(fast)]
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for kind in ("pages", "ai"):
+        ours = [client for client in clients if client.kind == kind]
+        if not ours:
+            continue
+        samples = [sample for client in ours for sample in client.samples]
+        results[kind] = {
+            **harness.summarize(samples),
+            "rps": len(samples) / elapsed,
+            "errors": sum(client.errors for client in ours),
+        }
+    return results
+
+
+def run_mode(mode, threads, slow_counts, fast, duration):
+    port = _free_port()
+    child = SYNC_CHILD if mode == "sync" else ASYNC_CHILD
+    env = {**os.environ, "ASGI_THREADS": str(threads)}
+    proc = subprocess.Popen([sys.executable, "-c", child, str(port), str(threads)], cwd=harness.ROOT, env=env)
+    try:
+        _wait_ready(proc, port)
+        drive(port, 0, fast, 1)  # warm the page cache, the pools and the templates
+        results = {}
+        for slow in slow_counts:
+            for kind, values in drive(port, slow, fast, duration).items():
+                results[f"{mode}, {slow} slow: {kind}"] = values
+        return results
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8, help="server threads in both modes")
+    parser.add_argument("-d", "--duration", type=float, default=10, help="seconds per scenario")
+    parser.add_argument("--slow", default="0,8,32", help="comma-separated counts of AI clients")
+    parser.add_argument("--fast", type=int, default=4, help="page clients")
+    parser.add_argument("--ai-delay", type=float, default=0.25, help="fake model delay per chunk (seconds)")
+    parser.add_argument("--modes", default="sync,async", help="comma-separated: sync, async")
+    parser.add_argument("--tasks", type=int, default=20_000, help="tasks to seed")
+    parser.add_argument("-o", "--output", help="results file (default: benchmarks/results/concurrency-<time>.json)")
+    args = parser.parse_args()
+
+    modes = [mode for mode in args.modes.split(",") if mode]
+    if set(modes) - {"sync", "async"}:
+        parser.error("--modes takes sync and/or async")
+    slow_counts = [int(count) for count in args.slow.split(",") if count]
+
+    results = {}
+    with harness.disposable_database() as dsn:
+        harness.offline_env(dsn, page_cache="memory")
+        os.environ["AI_FAKE_DELAY"] = str(args.ai_delay)
+        from src.app import create_app
+
+        create_app().extensions["db_pool"].closeall()  # applies the migrations
+        harness.seed(dsn, tasks=args.tasks)
+        for mode in modes:
+            results.update(run_mode(mode, args.threads, slow_counts, args.fast, args.duration))
+
+    harness.print_table(results, ["rps", "p50_ms", "p95_ms", "p99_ms", "errors"])
+    harness.save_results(
+        "concurrency", results, args.output,
+        threads=args.threads, duration=args.duration, slow=slow_counts, fast=args.fast,
+        ai_delay=args.ai_delay, tasks=args.tasks,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Local stand-ins for the external services the app talks to.
+
+Gemini needs none here: ``AI_FAKE_MODEL=true`` already swaps in
+``src.ai.FakeClient``. SMTP gets a real socket server that speaks just
+enough of the protocol for smtplib and Flask-Mail, so the delivery engine
+is measured end to end, connection reuse included.
+"""
+import socketserver
+import threading
+import time
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, *lines):
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        *first, last = lines
+        out = "".join(f"{line[:3]}-{line[4:]}\r\n" for line in first) + f"{last}\r\n"
+        self.wfile.write(out.encode())
+
+    def read_data(self):
+        size = 0
+        for line in self.rfile:
+            if line in (b".\r\n", b".\n"):
+                return size
+            size += len(line)
+        return size
+
+    def handle(self):
+        self.reply("220 fake-smtp ready")
+        for raw in self.rfile:
+            verb = raw[:4].decode(errors="replace").upper()
+            if verb == "EHLO":
+                self.reply("250 fake-smtp", "250 AUTH PLAIN LOGIN", "250 8BITMIME", "250 SIZE 26214400")
+            elif verb == "AUTH":
+                self.reply("235 2.7.0 Authentication successful")
+            elif verb == "RCPT":
+                self.server.count("recipients")
+                self.reply("250 2.1.5 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                self.server.count("bytes", self.read_data())
+                self.server.count("messages")
+                self.reply("250 2.0.0 Queued")
+            elif verb in ("HELO", "MAIL", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    """Accepts every message on 127.0.0.1 and only counts it.
+
+    ``delay`` adds that many seconds before each reply, to model a remote
+    server's round trip.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, delay=0.0):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.delay = delay
+        self.stats = {"messages": 0, "recipients": 0, "bytes": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, name="fake-smtp", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
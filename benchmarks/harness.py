@@ -0,0 +1,170 @@
+"""Shared set-up for the benchmark suites.
+
+Each suite runs against a throwaway database created on a local Postgres
+server (``BENCH_DATABASE_URL``, falling back to ``DATABASE_URL``) and
+dropped afterwards, so your data is never touched. Gemini is replaced by the
+app's own ``AI_FAKE_MODEL`` client with no delay and SMTP by
+:class:`benchmarks.fakes.FakeSMTPServer`, so nothing leaves the machine.
+Results are written as JSON under ``benchmarks/results/`` for
+``python -m benchmarks.compare``.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import psycopg2
+from dotenv import dotenv_values
+from psycopg2.extensions import make_dsn
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+# Only used to create and drop the throwaway databases; needs CREATEDB.
+ADMIN_URL = (
+    os.getenv("BENCH_DATABASE_URL")
+    or os.getenv("DATABASE_URL")
+    or dotenv_values(ROOT / ".env").get("DATABASE_URL")
+)
+
+SEED_TASKS_SQL = """
+    INSERT INTO tasks (title, body, completed, archived, reminder_at, reminder_note, created_at)
+    SELECT 'Task ' || i || ': ' || (ARRAY['quarterly report', 'invoice run', 'code review',
+                                          'deploy checklist', 'team meeting'])[1 + i %% 5],
+           repeat('Collect the numbers, draft the summary and review it. ', 1 + i %% 8),
+           i %% 3 = 0,
+           i %% 10 = 0,
+           CASE WHEN i %% 7 = 0 THEN NOW() + (i %% 500) * INTERVAL '1 hour' END,
+           CASE WHEN i %% 7 = 0 THEN 'Book the room first' END,
+           NOW() - i * INTERVAL '1 minute'
+    FROM generate_series(1, %s) AS i
+"""
+
+SEED_SUBSCRIBERS_SQL = """
+    INSERT INTO subscribers (name, email, active)
+    SELECT 'Subscriber ' || i, 'subscriber' || i || '@example.test', i %% 4 <> 0
+    FROM generate_series(1, %s) AS i
+"""
+
+
+@contextmanager
+def disposable_database(admin_url=None):
+    """Create an empty database for one run and drop it afterwards; yields its DSN."""
+    admin_url = admin_url or ADMIN_URL
+    if not admin_url:
+        raise SystemExit("Set BENCH_DATABASE_URL (or DATABASE_URL) to a local Postgres server.")
+    name = f"taskflow_bench_{os.getpid()}_{uuid.uuid4().hex[:6]}"
+    admin = psycopg2.connect(admin_url)
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cur:
+            cur.execute(f'CREATE DATABASE "{name}"')
+        try:
+            yield make_dsn(admin_url, dbname=name)
+        finally:
+            with admin.cursor() as cur:
+                cur.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+    finally:
+        admin.close()
+
+
+def offline_env(database_url, page_cache="off", smtp_port=None):
+    """Point the app at ``database_url`` with Gemini and SMTP replaced by local fakes.
+
+    Settings are read when ``src`` modules are imported, so this has to run
+    first; child processes inherit the environment.
+    """
+    if any(name == "src" or name.startswith("src.") for name in sys.modules):
+        raise RuntimeError("offline_env() must be called before importing src")
+    os.environ.update({
+        "DATABASE_URL": database_url,
+        "DB_AUTO_MIGRATE": "true",
+        "AI_FAKE_MODEL": "true",
+        "AI_FAKE_DELAY": "0",
+        "GEMINI_API_KEY": "",
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_PORT": str(smtp_port or 1),
+        "MAIL_USE_TLS": "false",
+        "MAIL_USERNAME": "bench" if smtp_port else "",
+        "MAIL_PASSWORD": "bench" if smtp_port else "",
+        "MAIL_DEFAULT_SENDER": "bench@example.test",
+        "PAGE_CACHE": page_cache,
+        "PROFILE_REQUESTS": "false",
+    })
+
+
+def seed(dsn, tasks=20_000, subscribers=50):
+    """Fill a migrated database with ``tasks`` varied tasks and ``subscribers`` subscribers."""
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(SEED_TASKS_SQL, (tasks,))
+            cur.execute(SEED_SUBSCRIBERS_SQL, (subscribers,))
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("VACUUM ANALYZE")
+    finally:
+        conn.close()
+
+
+def summarize(samples):
+    """Latency statistics in milliseconds for a list of durations in seconds."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"n": 0}
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))] * 1e3
+
+    return {
+        "n": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1e3,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": ordered[-1] * 1e3,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(suite, results, output=None, **params):
+    """Write ``results`` with enough context to compare runs; returns the path."""
+    created = datetime.now(timezone.utc)
+    path = Path(output) if output else RESULTS_DIR / f"{suite}-{created:%Y%m%dT%H%M%S}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "suite": suite,
+        "created_at": created.isoformat(timespec="seconds"),
+        "git": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2, sort_keys=True, default=str))
+    print(f"[bench] Results written to {path}")
+    return path
+
+
+def print_table(rows, columns):
+    """Print ``{name: {column: value}}`` as an aligned table."""
+    width = max([len(name) for name in rows] + [4])
+    print(f"{'':<{width}}" + "".join(f"{column:>12}" for column in columns))
+    for name, values in rows.items():
+        cells = "".join(
+            f"{values[column]:>12.2f}" if isinstance(values.get(column), float) else f"{values.get(column, ''):>12}"
+            for column in columns
+        )
+        print(f"{name:<{width}}{cells}")
@@ -0,0 +1,166 @@
+"""Concurrent load: throughput and p50/p95/p99 latency over a read-mostly request mix.
+
+    uv run python -m benchmarks.load [-c 8] [-d 10] [--writes 0.05]
+    uv run python -m benchmarks.load --url http://127.0.0.1:8000 -c 32 -d 30
+
+Without ``--url`` the app is served in-process by werkzeug's threaded
+server against a seeded throwaway database; the driver then shares the
+interpreter (and the GIL) with the app, so compare such runs only with each
+other. Point ``--url`` at a real deployment (gunicorn, uWSGI) for absolute
+numbers; the ids to request are read from its ``/api/v1/tasks``.
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from benchmarks import harness
+
+# (weight, label, path template); {task} is a random task from the first pages.
+READS = [
+    (30, "tasks list", "/tasks/"),
+    (20, "task detail", "/tasks/{task}"),
+    (10, "archived list", "/tasks/archived"),
+    (10, "search", "/tasks/search?q=review"),
+    (5, "reminders status", "/reminders/status"),
+    (5, "subscribers list", "/subscribers/"),
+    (10, "api tasks", "/api/v1/tasks"),
+    (10, "api task", "/api/v1/tasks/{task}"),
+]
+WRITE = ("task toggle", "/tasks/{task}/toggle")
+
+
+class _Worker(threading.Thread):
+    def __init__(self, target, tasks, writes, deadline, seed):
+        super().__init__(daemon=True)
+        self.target = target
+        self.tasks = tasks
+        self.writes = writes
+        self.deadline = deadline
+        self.random = random.Random(seed)
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.conn = None
+
+    def _connection(self):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.target.hostname, self.target.port, timeout=30)
+        return self.conn
+
+    def _pick(self):
+        if self.random.random() < self.writes:
+            label, path, method = *WRITE, "POST"
+        else:
+            _, label, path = self.random.choices(READS, weights=[w for w, _, _ in READS])[0]
+            method = "GET"
+        return label, method, path.format(task=self.random.choice(self.tasks))
+
+    def run(self):
+        while time.perf_counter() < self.deadline:
+            label, method, path = self._pick()
+            started = time.perf_counter()
+            try:
+                conn = self._connection()
+                conn.request(method, path, headers={"Content-Length": "0"} if method == "POST" else {})
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+                if response.getheader("Connection", "").lower() == "close":
+                    self.conn = None
+            except (OSError, http.client.HTTPException):
+                self.errors[label] += 1
+                self.conn = None
+                continue
+            elapsed = time.perf_counter() - started
+            if status >= 500:
+                self.errors[label] += 1
+            else:
+                self.samples[label].append(elapsed)
+        if self.conn is not None:
+            self.conn.close()
+
+
+def drive(url, concurrency, duration, writes):
+    target = urlsplit(url)
+    conn = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+    conn.request("GET", "/api/v1/tasks?limit=100")
+    tasks = [item["id"] for item in json.loads(conn.getresponse().read())["items"]]
+    conn.close()
+
+    deadline = time.perf_counter() + duration
+    workers = [_Worker(target, tasks, writes, deadline, seed) for seed in range(concurrency)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    by_label, errors = defaultdict(list), defaultdict(int)
+    for worker in workers:
+        for label, samples in worker.samples.items():
+            by_label[label].extend(samples)
+        for label, count in worker.errors.items():
+            errors[label] += count
+    every = [sample for samples in by_label.values() for sample in samples]
+    results = {"all": {**harness.summarize(every), "rps": len(every) / elapsed, "errors": sum(errors.values())}}
+    for label, samples in sorted(by_label.items()):
+        results[label] = {**harness.summarize(samples), "rps": len(samples) / elapsed, "errors": errors[label]}
+    return results
+
+
+def serve(app):
+    """Serve ``app`` on a free local port from a background thread; returns the server."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class _Handler(WSGIRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like a browser or a proxy
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=_Handler)
+    threading.Thread(target=server.serve_forever, name="bench-server", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="benchmark this running server instead of an in-process one")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="client threads")
+    parser.add_argument("-d", "--duration", type=float, default=10, help="seconds to run")
+    parser.add_argument("--writes", type=float, default=0.05, help="share of requests that toggle a task")
+    parser.add_argument("--tasks", type=int, default=20_000, help="tasks to seed (in-process only)")
+    parser.add_argument("--page-cache", default="memory", choices=["off", "memory", "file"])
+    parser.add_argument("-o", "--output", help="results file (default: benchmarks/results/load-<time>.json)")
+    args = parser.parse_args()
+
+    params = dict(concurrency=args.concurrency, duration=args.duration, writes=args.writes)
+    if args.url:
+        results = drive(args.url, args.concurrency, args.duration, args.writes)
+        params["url"] = args.url
+    else:
+        with harness.disposable_database() as dsn:
+            harness.offline_env(dsn, page_cache=args.page_cache)
+            from src.app import create_app
+
+            app = create_app()
+            harness.seed(dsn, tasks=args.tasks)
+            server = serve(app)
+            try:
+                results = drive(f"http://127.0.0.1:{server.server_port}", args.concurrency, args.duration, args.writes)
+            finally:
+                server.shutdown()
+                app.extensions["db_pool"].closeall()
+        params.update(tasks=args.tasks, page_cache=args.page_cache)
+
+    harness.print_table(results, ["rps", "p50_ms", "p95_ms", "p99_ms", "errors"])
+    harness.save_results("load", results, args.output, **params)
+
+
+if __name__ == "__main__":
+    main()
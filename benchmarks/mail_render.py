@@ -0,0 +1,108 @@
+"""Per-message cost of rendering notification emails, and of delivering them.
+
+    uv run python -m benchmarks.mail_render [-n 5000] [--recipients 50] [--smtp-delay 0]
+
+Delivery goes through the real DeliveryEngine to a local fake SMTP server
+(``benchmarks.fakes``); ``--smtp-delay`` adds a per-reply round trip.
+"""
+import argparse
+import os
+import timeit
+from datetime import datetime, timezone
+
+from benchmarks import harness
+from benchmarks.fakes import FakeSMTPServer
+
+TASK = {
+    "id": 1,
+    "title": "Prepare the quarterly <report> & send it",
+    "body": "Collect numbers from finance.\nDraft the summary.\nReview with the team.",
+    "completed": False,
+    "archived": False,
+    "reminder_at": datetime(2026, 3, 1, 9, 30, tzinfo=timezone.utc),
+    "reminder_note": "Book the meeting room first",
+    "ai_recommendation": "Start with the data you already have, then fill the gaps.",
+    "created_at": datetime(2026, 2, 20, 14, 0, tzinfo=timezone.utc),
+    "updated_at": datetime(2026, 2, 25, 17, 45, tzinfo=timezone.utc),
+}
+TASKS = [dict(TASK, id=i, title=f"{TASK['title']} #{i}") for i in range(1, 26)]
+
+BUILDERS = [
+    "_build_html",
+    "_build_plaintext",
+    "_build_completed_html",
+    "_build_completed_plaintext",
+    "_build_reminder_html",
+    "_build_reminder_plaintext",
+]
+BULK_BUILDERS = ["_build_bulk_completed_html", "_build_bulk_completed_plaintext"]
+
+
+def run(number):
+    from src import mail
+
+    results = {}
+    startup = timeit.timeit(mail._prepare, number=1)
+    results["_prepare"] = startup * 1e6
+    for name, arg in [(name, TASK) for name in BUILDERS] + [(name, TASKS) for name in BULK_BUILDERS]:
+        fn = getattr(mail, name)
+        fn(arg)  # warm up
+        total = min(timeit.repeat(lambda: fn(arg), number=number, repeat=3))
+        results[name] = total / number * 1e6
+    return results
+
+
+def deliver(recipients, messages, smtp_delay):
+    """Send ``messages`` creation emails to ``recipients`` addresses each; µs per recipient."""
+    from flask import Flask
+    from flask_mail import Message
+    from src import mail
+
+    with FakeSMTPServer(delay=smtp_delay) as server:
+        os.environ.update({
+            "MAIL_SERVER": "127.0.0.1", "MAIL_PORT": str(server.port), "MAIL_USE_TLS": "false",
+            "MAIL_USERNAME": "bench", "MAIL_PASSWORD": "bench", "MAIL_DEFAULT_SENDER": "bench@example.test",
+        })
+        app = Flask(__name__)
+        mail.init_mail(app)
+        addresses = [f"subscriber{i}@example.test" for i in range(recipients)]
+        with app.app_context():
+            def send():
+                msg = Message(
+                    subject=f"[TaskFlow] New task: {TASK['title']}",
+                    body=mail._build_plaintext(TASK), html=mail._build_html(TASK),
+                )
+                report = mail.engine.deliver(msg, addresses)
+                if report.failed or report.undelivered:
+                    raise RuntimeError(report.summary())
+
+            send()  # connects and logs in once, as a long-running worker would
+            total = min(timeit.repeat(send, number=messages, repeat=3))
+            mail.engine._disconnect()
+    return {
+        f"deliver_per_recipient ({recipients} rcpt)": total / (messages * recipients) * 1e6,
+        f"deliver_per_message ({recipients} rcpt)": total / messages * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=5000, help="renders per timing run")
+    parser.add_argument("--recipients", type=int, default=50, help="recipients per delivered message")
+    parser.add_argument("--messages", type=int, default=10, help="messages per delivery timing run")
+    parser.add_argument("--smtp-delay", type=float, default=0.0, help="seconds the fake SMTP server waits per reply")
+    parser.add_argument("-o", "--output", help="results file (default: benchmarks/results/mail_render-<time>.json)")
+    args = parser.parse_args()
+
+    results = run(args.number)
+    results.update(deliver(args.recipients, args.messages, args.smtp_delay))
+    for name, micros in results.items():
+        print(f"{name:<40} {micros:10.1f} µs")
+    harness.save_results(
+        "mail_render", {name: {"us": micros} for name, micros in results.items()}, args.output,
+        number=args.number, recipients=args.recipients, messages=args.messages, smtp_delay=args.smtp_delay,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Per-route latency through the Flask test client, against a seeded throwaway database.
+
+    uv run python -m benchmarks.routes [-n 50] [--tasks 20000] [-k search] [--page-cache off]
+
+Every case is one request; the body is read in full, so streamed pages
+count completely. Routes the cases do not reach are listed at the end.
+"""
+import argparse
+import io
+import itertools
+import time
+
+from benchmarks import harness
+
+_unique = itertools.count()
+
+
+def _import_csv():
+    rows = "\n".join(f"Imported task {next(_unique)},Benchmark import,false,false" for _ in range(100))
+    return {"file": (io.BytesIO(f"title,body,completed,archived\n{rows}\n".encode()), "tasks.csv")}
+
+
+def cases(ids):
+    """``(name, method, path, kwargs or callable returning kwargs, iterations multiplier)``."""
+    task, archived, sub = ids["task"], ids["archived"], ids["subscriber"]
+    return [
+        ("tasks list", "GET", "/tasks/", None, 1),
+        ("tasks list, page 2", "GET", f"/tasks/?after={ids['cursor']}", None, 1),
+        ("tasks list, all", "GET", "/tasks/?all=1", None, 0.1),
+        ("task detail", "GET", f"/tasks/{task}", None, 1),
+        ("task new form", "GET", "/tasks/new", None, 1),
+        ("task create", "POST", "/tasks/new",
+         lambda: {"data": {"title": f"Benchmark task {next(_unique)}", "body": "Created by the route benchmark"}}, 1),
+        ("task edit form", "GET", f"/tasks/{task}/edit", None, 1),
+        ("task update", "POST", f"/tasks/{task}/edit", {"data": {"title": "Edited by the benchmark", "body": ""}}, 1),
+        ("task toggle", "POST", f"/tasks/{task}/toggle", None, 1),
+        ("task archive", "POST", f"/tasks/{archived}/archive", None, 1),
+        ("task unarchive", "POST", f"/tasks/{archived}/unarchive", None, 1),
+        ("bulk reopen", "POST", "/tasks/bulk", {"data": {"action": "reopen", "ids": ids["page"]}}, 1),
+        ("archived list", "GET", "/tasks/archived", None, 1),
+        ("search", "GET", "/tasks/search?q=quarterly+report", None, 1),
+        ("search, partial", "GET", "/tasks/search?q=rev&partial=1", None, 1),
+        ("ai suggest", "POST", "/tasks/ai-suggest",
+         lambda: {"json": {"title": f"Plan the offsite {next(_unique)}", "body": "Budget and venue"}}, 1),
+        ("ai suggest, stream", "POST", "/tasks/ai-suggest/stream",
+         lambda: {"json": {"title": f"Plan the offsite {next(_unique)}", "body": "Budget and venue"}}, 1),
+        ("task stats", "GET", "/tasks/stats", None, 1),
+        ("export csv", "GET", "/tasks/export?format=csv", None, 0.1),
+        ("import form", "GET", "/tasks/import", None, 1),
+        ("import 100 rows", "POST", "/tasks/import", lambda: {"data": _import_csv()}, 0.2),
+        ("reminders", "GET", "/reminders/", None, 0.2),
+        ("reminders status", "GET", "/reminders/status", None, 1),
+        ("subscribers list", "GET", "/subscribers/", None, 1),
+        ("subscriber new form", "GET", "/subscribers/new", None, 1),
+        ("subscriber create", "POST", "/subscribers/new",
+         lambda: {"data": {"name": "Bench", "email": f"bench{next(_unique)}@example.test"}}, 1),
+        ("subscriber edit form", "GET", f"/subscribers/{sub}/edit", None, 1),
+        ("subscriber update", "POST", f"/subscribers/{sub}/edit",
+         {"data": {"name": "Edited", "email": "subscriber1@example.test"}}, 1),
+        ("subscriber toggle", "POST", f"/subscribers/{sub}/toggle", None, 1),
+        ("api tasks", "GET", "/api/v1/tasks", None, 1),
+        ("api task", "GET", f"/api/v1/tasks/{task}", None, 1),
+        ("api task create", "POST", "/api/v1/tasks",
+         lambda: {"json": {"title": f"API task {next(_unique)}", "body": "Created through the API"}}, 1),
+        ("api task update", "PATCH", f"/api/v1/tasks/{task}", {"json": {"body": "Patched by the benchmark"}}, 1),
+        ("api search", "GET", "/api/v1/tasks/search?q=invoice", None, 1),
+        ("api reminders", "GET", "/api/v1/reminders", None, 0.2),
+        ("api reminders status", "GET", "/api/v1/reminders/status", None, 1),
+        ("api subscribers", "GET", "/api/v1/subscribers", None, 1),
+        ("api subscriber", "GET", f"/api/v1/subscribers/{sub}", None, 1),
+        ("api subscriber create", "POST", "/api/v1/subscribers",
+         lambda: {"json": {"name": "Bench", "email": f"api{next(_unique)}@example.test"}}, 1),
+        ("api subscriber update", "PATCH", f"/api/v1/subscribers/{sub}", {"json": {"name": "Patched"}}, 1),
+        ("index", "GET", "/", None, 1),
+        ("health", "GET", "/health", None, 1),
+        ("livez", "GET", "/livez", None, 1),
+        ("readyz", "GET", "/readyz", None, 1),
+    ]
+
+
+def _ids(dsn):
+    import psycopg2
+
+    with psycopg2.connect(dsn) as conn, conn.cursor() as cur:
+        cur.execute("SELECT id FROM tasks WHERE NOT archived ORDER BY created_at DESC, id DESC LIMIT 20")
+        page = [row[0] for row in cur.fetchall()]
+        cur.execute("SELECT id FROM tasks WHERE archived ORDER BY id LIMIT 1")
+        archived = cur.fetchone()[0]
+        cur.execute("SELECT id FROM subscribers ORDER BY id LIMIT 1")
+        sub = cur.fetchone()[0]
+    conn.close()
+    return {"task": page[0], "page": page, "archived": archived, "subscriber": sub}
+
+
+def _request(client, method, path, kwargs):
+    if callable(kwargs):
+        kwargs = kwargs()
+    started = time.perf_counter()
+    response = client.open(path, method=method, **(kwargs or {}))
+    response.get_data()
+    response.close()
+    elapsed = time.perf_counter() - started
+    if response.status_code >= 400:
+        raise RuntimeError(f"{method} {path} returned {response.status_code}")
+    return elapsed
+
+
+def run(app, dsn, number, select=None):
+    ids = _ids(dsn)
+    client = app.test_client()
+    # An opaque keyset cursor for the second page, taken from the API.
+    ids["cursor"] = client.get("/api/v1/tasks").get_json()["next_cursor"]
+    # /readyz answers 503 until the probe thread's first check is in.
+    deadline = time.monotonic() + 10
+    while not app.extensions["readiness"].state()["ready"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    results, reached = {}, set()
+    adapter = app.url_map.bind("localhost")
+    for name, method, path, kwargs, share in cases(ids):
+        if select and select not in name:
+            continue
+        reached.add(adapter.match(path.split("?")[0], method=method)[0])
+        iterations = max(3, round(number * share))
+        for _ in range(3):
+            _request(client, method, path, kwargs)
+        samples = [_request(client, method, path, kwargs) for _ in range(iterations)]
+        results[name] = {"route": f"{method} {path.split('?')[0]}", **harness.summarize(samples)}
+
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules()} - {"static", "metrics"}
+    return results, sorted(endpoints - reached) if not select else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=50, help="requests per route")
+    parser.add_argument("--tasks", type=int, default=20_000, help="tasks to seed")
+    parser.add_argument("-k", dest="select", help="only cases whose name contains this")
+    parser.add_argument("--page-cache", default="off", choices=["off", "memory", "file"])
+    parser.add_argument("-o", "--output", help="results file (default: benchmarks/results/routes-<time>.json)")
+    args = parser.parse_args()
+
+    with harness.disposable_database() as dsn:
+        harness.offline_env(dsn, page_cache=args.page_cache)
+        from src.app import create_app
+
+        app = create_app()
+        harness.seed(dsn, tasks=args.tasks)
+        results, uncovered = run(app, dsn, args.number, args.select)
+        app.extensions["db_pool"].closeall()
+
+    harness.print_table(results, ["p50_ms", "p95_ms", "p99_ms", "n"])
+    if uncovered:
+        print(f"[bench] Routes without a case: {', '.join(uncovered)}")
+    harness.save_results(
+        "routes", results, args.output,
+        number=args.number, tasks=args.tasks, page_cache=args.page_cache, uncovered=uncovered,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Memory and time per result row: RealDictCursor dicts vs compact Row records.
+
+    uv run python -m benchmarks.rows [-n 100000]
+
+Reads the first ``n`` tasks (the task list's columns) from DATABASE_URL.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import jinja2
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from src.blueprints.tasks import LIST_COLUMNS
+from src.db import DATABASE_URL
+from src.rows import RowCursor
+
+# The shape of the list templates: attribute lookups in a loop.
+TEMPLATE = jinja2.Environment(autoescape=True).from_string(
+    "{% for t in rows %}<li>{{ t.title }} {{ t.body }} {{ t.completed }} {{ t.created_at }}</li>{% endfor %}"
+)
+
+FACTORIES = [("RealDictCursor", RealDictCursor), ("RowCursor", RowCursor)]
+
+
+def measure(conn, factory, number):
+    sql = f"SELECT {LIST_COLUMNS} FROM tasks ORDER BY id LIMIT %s"
+    with conn.cursor(cursor_factory=factory) as cur:
+        cur.execute(sql, (number,))  # warm up: caches, record class
+        cur.fetchall()
+
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        cur.execute(sql, (number,))
+        rows = cur.fetchall()
+        fetch = time.perf_counter() - started
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    started = time.perf_counter()
+    for row in rows:
+        row["title"], row["completed"], row["created_at"]
+    by_key = time.perf_counter() - started
+
+    started = time.perf_counter()
+    if factory is RowCursor:
+        for row in rows:
+            row.title, row.completed, row.created_at
+    else:
+        for row in rows:
+            row.get("title"), row.get("completed"), row.get("created_at")
+    by_attr = time.perf_counter() - started
+
+    started = time.perf_counter()
+    TEMPLATE.render(rows=rows)
+    render = time.perf_counter() - started
+
+    # What the cyclic collector pays while the rows are alive.
+    started = time.perf_counter()
+    gc.collect()
+    collect = time.perf_counter() - started
+
+    return {
+        "rows": len(rows),
+        "fetch_ms": fetch * 1e3,
+        "retained_mb": retained / 1e6,
+        "peak_mb": peak / 1e6,
+        "bytes_per_row": retained / max(len(rows), 1),
+        "key_access_ms": by_key * 1e3,
+        "attr_access_ms": by_attr * 1e3,
+        "render_ms": render * 1e3,
+        "gc_collect_ms": collect * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=100_000, help="rows to fetch")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        results = {name: measure(conn, factory, args.number) for name, factory in FACTORIES}
+    finally:
+        conn.close()
+
+    names = [name for name, _ in FACTORIES]
+    print(f"{'':<16}" + "".join(f"{name:>16}" for name in names))
+    for metric in results[names[0]]:
+        print(f"{metric:<16}" + "".join(f"{results[name][metric]:>16.1f}" for name in names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Cold start: importing the app, create_app() and the first request, in fresh processes.
+
+    uv run python -m benchmarks.startup [-n 5] [--offline] [--budget 150]
+
+By default this runs against a disposable, already-migrated database, so
+the numbers are what a worker pays on every boot rather than on the first
+deploy. ``--offline`` boots with no database at all (``DB_AUTO_MIGRATE=false``,
+``DB_POOL_MIN=0``, nothing listening at ``DATABASE_URL``) and requests
+``/livez``, which is the configuration the create_app budget is about.
+
+Each boot also runs under ``python -X importtime``; the median cumulative
+import time of every top-level package appears as ``import <package>``
+cases, so a heavy import creeping back onto the boot path shows up in
+``benchmarks.compare``. ``--budget`` exits with status 1 if the median
+create_app() time exceeds it (milliseconds).
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from benchmarks import harness
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import src.app
+imported = time.perf_counter()
+app = src.app.create_app()
+created = time.perf_counter()
+app.test_client().get(sys.argv[1]).close()
+served = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1e3,
+    "create_app_ms": (created - imported) * 1e3,
+    "first_request_ms": (served - created) * 1e3,
+    "modules": len(sys.modules),
+}))
+"""
+
+# "import time: self [us] | cumulative | imported package", indented by nesting.
+_IMPORTTIME = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)$")
+MIN_IMPORT_MS = 1.0  # packages below this are left out of the report
+
+OFFLINE_ENV = {
+    "DATABASE_URL": "postgresql://bench@127.0.0.1:1/offline",
+    "DB_AUTO_MIGRATE": "false",
+    "DB_POOL_MIN": "0",
+}
+
+
+def _imports(stderr):
+    """Cumulative ms per top-level package imported by the application code."""
+    totals, children = defaultdict(float), []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if not match:
+            continue
+        cumulative_us, indent, name = match.groups()
+        ms = int(cumulative_us) / 1e3
+        # A module is reported after everything it imported, one level less indented.
+        if indent:
+            if len(indent) == 2:
+                children.append((name, ms))
+            continue
+        if name in ("src", "src.app"):
+            # Its direct imports: our own modules by name, libraries by distribution.
+            for child, child_ms in children:
+                totals[child if child.startswith("src.") else child.split(".")[0]] += child_ms
+        elif name.startswith("src."):
+            totals[name] += ms  # imported by create_app() itself (the blueprints)
+        children = []
+    return totals
+
+
+def boot(path):
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, path],
+        cwd=harness.ROOT, capture_output=True, text=True, check=True,
+    )
+    elapsed = (time.perf_counter() - started) * 1e3
+    sample = json.loads(proc.stdout.strip().splitlines()[-1])
+    # importtime's own bookkeeping adds a little to every number here; it
+    # is the same for every run, so runs still compare.
+    sample["process_ms"] = elapsed
+    return sample, _imports(proc.stderr)
+
+
+def run(number, path):
+    boot(path)  # applies the migrations and warms the OS file cache
+    samples, imports = [], defaultdict(list)
+    for _ in range(number):
+        sample, totals = boot(path)
+        samples.append(sample)
+        for name, ms in totals.items():
+            imports[name].append(ms)
+
+    results = {
+        metric: {
+            "min": min(s[metric] for s in samples),
+            "median": statistics.median(s[metric] for s in samples),
+            "max": max(s[metric] for s in samples),
+        }
+        for metric in samples[0]
+    }
+    for name, values in sorted(imports.items(), key=lambda item: -statistics.median(item[1])):
+        median = statistics.median(values)
+        if median >= MIN_IMPORT_MS:
+            results[f"import {name}"] = {"min": min(values), "median": median, "max": max(values)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=5, help="processes to start")
+    parser.add_argument("--offline", action="store_true", help="boot with no database and request /livez")
+    parser.add_argument("--budget", type=float, help="fail if median create_app() exceeds this many ms")
+    parser.add_argument("-o", "--output", help="results file (default: benchmarks/results/startup-<time>.json)")
+    args = parser.parse_args()
+
+    if args.offline:
+        os.environ.update(OFFLINE_ENV)
+        results = run(args.number, "/livez")
+    else:
+        with harness.disposable_database() as dsn:
+            harness.offline_env(dsn)
+            results = run(args.number, "/tasks/")
+    harness.print_table(results, ["min", "median", "max"])
+    harness.save_results("startup", results, args.output, number=args.number, offline=args.offline)
+
+    if args.budget is not None:
+        median = results["create_app_ms"]["median"]
+        verdict = "within" if median <= args.budget else "over"
+        print(f"[bench] create_app() median {median:.1f} ms, {verdict} the {args.budget:g} ms budget")
+        if median > args.budget:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
-from src.app import create_app
+import os
+from src.app import create_app, preload_app
 
 app = create_app()
 
+# `gunicorn --preload main:app` imports this module once, in the parent.
+if os.getenv("APP_PRELOAD", "false").lower() == "true":
+    preload_app(app)
+
 if __name__ == "__main__":
     app.run(debug=True)
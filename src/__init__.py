@@ -0,0 +1,4 @@
+from dotenv import load_dotenv
+
+# Before any src module reads its settings from the environment at import time.
+load_dotenv()
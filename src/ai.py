@@ -0,0 +1,422 @@
+import os
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+import psycopg2
+from flask import g
+from src.db import get_pool
+from src.metrics import record_query, span
+
+MODEL = os.getenv("GEMINI_MODEL", "gemini-3-flash-preview")
+# Serve canned, slowly streamed answers instead of calling Gemini (local dev/tests).
+FAKE_MODEL = os.getenv("AI_FAKE_MODEL", "false").lower() == "true"
+CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", 1000))
+CACHE_TTL = float(os.getenv("AI_CACHE_TTL", 86400))
+# google-genai takes about a second to import, so it is loaded on first use
+# (lazy), on a background thread after a worker's first request (background),
+# or once in the parent of a pre-fork server by src.app.preload_app.
+WARMUP = os.getenv("AI_WARMUP", "lazy").lower()
+
+PROMPT_TEMPLATE = (
+    "Eres un asistente de productividad. Dada esta tarea:\n\n{context}\n\n"
+    "Proporcione una recomendación concisa y práctica sobre cómo abordar y completar "
+    "esta tarea de manera efectiva. Sea directo y práctico. Máximo 3 oraciones."
+)
+
+_client = None
+_client_key = None
+_client_lock = threading.Lock()
+
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeModels:
+    CHUNKS = [
+        "Divide la tarea en pasos pequeños ",
+        "y empieza por el que desbloquea a los demás. ",
+        "Reserva un bloque de tiempo sin interrupciones ",
+        "y revisa el avance al final del día.",
+    ]
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def generate_content(self, model, contents):
+        time.sleep(self.delay * len(self.CHUNKS))
+        return _FakeResponse("".join(self.CHUNKS))
+
+    def generate_content_stream(self, model, contents):
+        for chunk in self.CHUNKS:
+            time.sleep(self.delay)
+            yield _FakeResponse(chunk)
+
+
+class _FakeAsyncModels(_FakeModels):
+    """``client.aio.models``: same answers, waiting on the event loop."""
+
+    async def generate_content(self, model, contents):
+        await asyncio.sleep(self.delay * len(self.CHUNKS))
+        return _FakeResponse("".join(self.CHUNKS))
+
+    async def generate_content_stream(self, model, contents):
+        async def chunks():
+            for chunk in self.CHUNKS:
+                await asyncio.sleep(self.delay)
+                yield _FakeResponse(chunk)
+        return chunks()
+
+
+class _FakeAio:
+    def __init__(self, delay):
+        self.models = _FakeAsyncModels(delay)
+
+
+class FakeClient:
+    """Stand-in for ``genai.Client`` that streams canned chunks."""
+
+    def __init__(self, delay=float(os.getenv("AI_FAKE_DELAY", 0.3))):
+        self.models = _FakeModels(delay)
+        self.aio = _FakeAio(delay)
+
+
+def configured():
+    return FAKE_MODEL or bool(os.getenv("GEMINI_API_KEY"))
+
+
+def get_client():
+    """Return the process-wide Gemini client, creating it on first use."""
+    global _client, _client_key
+    api_key = os.getenv("GEMINI_API_KEY")
+    with _client_lock:
+        if _client is None or _client_key != api_key:
+            if FAKE_MODEL:
+                _client = FakeClient()
+            else:
+                from google import genai
+                _client = genai.Client(api_key=api_key)
+            _client_key = api_key
+        return _client
+
+
+def warm_up():
+    """Import the Gemini SDK ahead of the first recommendation. No network."""
+    if configured() and not FAKE_MODEL:
+        from google import genai  # noqa: F401
+
+
+_warmed_pid = None
+
+
+def _warm_up_in_background(exc=None):
+    global _warmed_pid
+    if _warmed_pid == os.getpid():
+        return
+    _warmed_pid = os.getpid()
+    threading.Thread(target=warm_up, name="ai-warm-up", daemon=True).start()
+
+
+def init_ai(app):
+    if WARMUP == "background" and configured() and not FAKE_MODEL:
+        # Runs once the first request's response is built, so boot and the
+        # first response don't wait for the import.
+        app.teardown_request(_warm_up_in_background)
+
+
+def build_prompt(title, body):
+    context = f"Title: {title}"
+    if body:
+        context += f"\nDescription: {body}"
+    return PROMPT_TEMPLATE.format(context=context)
+
+
+def _normalize(text):
+    return " ".join(text.split()).casefold()
+
+
+def cache_key(title, body, model=MODEL):
+    raw = "\x1f".join([_normalize(title), _normalize(body), model, PROMPT_TEMPLATE])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class TTLCache:
+    """Small thread-safe LRU with per-entry expiry."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+_memory = TTLCache(CACHE_SIZE, CACHE_TTL)
+_counters = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+_counters_lock = threading.Lock()
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def cache_stats():
+    with _counters_lock:
+        stats = dict(_counters)
+    lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+    stats["hit_ratio"] = round((lookups - stats["misses"]) / lookups, 3) if lookups else 0.0
+    stats["memory_entries"] = len(_memory)
+    return stats
+
+
+CACHE_GET_SQL = """SELECT recommendation FROM ai_recommendation_cache
+                   WHERE key = %s AND created_at > NOW() - make_interval(secs => %s)"""
+CACHE_SET_SQL = """INSERT INTO ai_recommendation_cache (key, model, recommendation)
+                   VALUES (%s, %s, %s)
+                   ON CONFLICT (key) DO UPDATE
+                   SET recommendation = EXCLUDED.recommendation, created_at = NOW()"""
+
+
+@contextmanager
+def _cache_connection():
+    # A pool connection of its own, held for one query: g.db would stay
+    # checked out through the model call, and a streamed answer keeps the
+    # request context (and g.db) until the stream ends. putconn rolls back.
+    pool = get_pool()
+    with span("db_connect"):
+        conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+
+def _db_get(key):
+    with _cache_connection() as conn, conn.cursor() as cur:
+        cur.execute(CACHE_GET_SQL, (key, CACHE_TTL))
+        row = cur.fetchone()
+    return row["recommendation"] if row else None
+
+
+def _db_set(key, model, recommendation):
+    with _cache_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(CACHE_SET_SQL, (key, model, recommendation))
+        conn.commit()
+
+
+def _db_unreachable(e):
+    # Once the database is unreachable, the rest of the request uses only the
+    # memory cache: another attempt would sit through another connect timeout.
+    print(f"[ai] Warning: recommendation cache unavailable for this request: {e}")
+    g.ai_cache_unreachable = True
+
+
+def cached_recommendation(key):
+    """Look ``key`` up in memory, then Postgres. Returns ``(text, source)``."""
+    text = _memory.get(key)
+    if text is not None:
+        _count("memory_hits")
+        return text, "memory"
+    if g.get("ai_cache_unreachable"):
+        text = None
+    else:
+        try:
+            text = _db_get(key)
+        except psycopg2.OperationalError as e:
+            _db_unreachable(e)
+            text = None
+        except psycopg2.Error as e:
+            print(f"[ai] Warning: recommendation cache unavailable: {e}")
+            text = None
+    if text is not None:
+        _memory.set(key, text)
+        _count("db_hits")
+        return text, "db"
+    _count("misses")
+    return None, None
+
+
+def store_recommendation(key, text, model=MODEL):
+    _memory.set(key, text)
+    if g.get("ai_cache_unreachable"):
+        return
+    try:
+        _db_set(key, model, text)
+    except psycopg2.OperationalError as e:
+        _db_unreachable(e)
+    except psycopg2.Error as e:
+        print(f"[ai] Warning: could not persist recommendation: {e}")
+
+
+def recommend(title, body):
+    """Return ``(recommendation, cache_source)``; ``cache_source`` is None on a miss."""
+    key = cache_key(title, body)
+    text, source = cached_recommendation(key)
+    if text is not None:
+        return text, source
+
+    with span("ai"):
+        response = get_client().models.generate_content(
+            model=MODEL, contents=build_prompt(title, body)
+        )
+    text = response.text
+    if text:
+        store_recommendation(key, text)
+    return text, None
+
+
+def recommend_stream(title, body):
+    """Return ``(cache_source, chunks)`` where ``chunks`` yields text as it arrives.
+
+    A cache hit yields the whole recommendation at once. On a miss the model
+    is streamed and the full text is cached once the stream completes;
+    closing ``chunks`` early closes the upstream request and caches nothing.
+    """
+    key = cache_key(title, body)
+    text, source = cached_recommendation(key)
+    if text is not None:
+        return source, iter([text])
+    return None, _stream_and_store(key, title, body)
+
+
+def _stream_and_store(key, title, body):
+    stream = get_client().models.generate_content_stream(
+        model=MODEL, contents=build_prompt(title, body)
+    )
+    parts = []
+    try:
+        with span("ai"):
+            for chunk in stream:
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield chunk.text
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+    if parts:
+        store_recommendation(key, "".join(parts))
+
+
+# --- async variants, for the ASGI entry point (src/asgi.py) -------------------
+# Same caches and counters; Postgres through a psycopg 3 AsyncConnectionPool
+# and Gemini through the SDK's async client (``client.aio``).
+
+async def _execute_async(pool, sql, params):
+    started = time.perf_counter()
+    try:
+        async with pool.connection() as conn:
+            cur = await conn.execute(sql, params)
+            return await cur.fetchone() if cur.description else None
+    finally:
+        record_query(sql, time.perf_counter() - started)
+
+
+async def cached_recommendation_async(key, pool):
+    """:func:`cached_recommendation`, reading Postgres through ``pool``."""
+    import psycopg
+
+    text = _memory.get(key)
+    if text is not None:
+        _count("memory_hits")
+        return text, "memory"
+    try:
+        row = await _execute_async(pool, CACHE_GET_SQL, (key, CACHE_TTL))
+        text = row[0] if row else None
+    except (psycopg.Error, OSError) as e:
+        print(f"[ai] Warning: recommendation cache unavailable: {e}")
+        text = None
+    if text is not None:
+        _memory.set(key, text)
+        _count("db_hits")
+        return text, "db"
+    _count("misses")
+    return None, None
+
+
+async def store_recommendation_async(key, text, pool, model=MODEL):
+    import psycopg
+
+    _memory.set(key, text)
+    try:
+        await _execute_async(pool, CACHE_SET_SQL, (key, model, text))
+    except (psycopg.Error, OSError) as e:
+        print(f"[ai] Warning: could not persist recommendation: {e}")
+
+
+async def recommend_async(title, body, pool):
+    """:func:`recommend` without holding a thread while Gemini answers."""
+    key = cache_key(title, body)
+    text, source = await cached_recommendation_async(key, pool)
+    if text is not None:
+        return text, source
+
+    with span("ai"):
+        response = await get_client().aio.models.generate_content(
+            model=MODEL, contents=build_prompt(title, body)
+        )
+    text = response.text
+    if text:
+        await store_recommendation_async(key, text, pool)
+    return text, None
+
+
+async def recommend_stream_async(title, body, pool):
+    """:func:`recommend_stream` with an async iterator of chunks.
+
+    Closing the iterator early (``aclose``) closes the upstream request and
+    caches nothing.
+    """
+    key = cache_key(title, body)
+    text, source = await cached_recommendation_async(key, pool)
+    if text is not None:
+        async def whole():
+            yield text
+        return source, whole()
+    return None, _stream_and_store_async(key, title, body, pool)
+
+
+async def _stream_and_store_async(key, title, body, pool):
+    stream = await get_client().aio.models.generate_content_stream(
+        model=MODEL, contents=build_prompt(title, body)
+    )
+    parts = []
+    try:
+        with span("ai"):
+            async for chunk in stream:
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield chunk.text
+    finally:
+        close = getattr(stream, "aclose", None)
+        if close is not None:
+            await close()
+    if parts:
+        await store_recommendation_async(key, "".join(parts), pool)
@@ -1,28 +1,52 @@
+import gc
 import os
 import psycopg2
 from flask import Flask, render_template, jsonify
-from dotenv import load_dotenv
-from src.db import close_db, init_db
+from src.ai import init_ai
+from src.assets import build_assets_command, init_assets
+from src.db import close_db, init_db, init_pool
+from src.health import init_health, retry_after
 from src.mail import init_mail
+from src.metrics import init_metrics
+from src.page_cache import init_page_cache
+from src.outbox import outbox_worker_command
+from src.migrations import migrate_command
+from src.scheduler import reminder_scheduler_command
+from src.stats import init_stats, stats_reconcile_command
+from src.transfer import export_tasks_command, import_tasks_command
 
 
 def create_app():
-    load_dotenv()
-
     app = Flask(__name__, template_folder="templates")
     app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev-secret")
 
+    init_pool(app)
+    init_metrics(app)
+    init_health(app)
     app.teardown_appcontext(close_db)
 
     init_mail(app)
+    init_ai(app)
+    init_assets(app)
+    init_page_cache(app)
+    init_stats(app)
+    app.cli.add_command(outbox_worker_command)
+    app.cli.add_command(migrate_command)
+    app.cli.add_command(reminder_scheduler_command)
+    app.cli.add_command(stats_reconcile_command)
+    app.cli.add_command(export_tasks_command)
+    app.cli.add_command(import_tasks_command)
+    app.cli.add_command(build_assets_command)
 
     from src.blueprints.tasks import tasks_bp
     from src.blueprints.reminders import reminders_bp
     from src.blueprints.subscribers import subscribers_bp
+    from src.blueprints.api import api_bp
 
     app.register_blueprint(tasks_bp, url_prefix="/tasks")
     app.register_blueprint(reminders_bp, url_prefix="/reminders")
     app.register_blueprint(subscribers_bp, url_prefix="/subscribers")
+    app.register_blueprint(api_bp, url_prefix="/api/v1")
 
     @app.route("/")
     def index():
@@ -31,19 +55,50 @@ def create_app():
 
     @app.route("/health")
     def health():
-        from src.db import get_db
+        from src.db import get_db, pool_stats, replica_stats
+        from src.ai import cache_stats
+        from src.recipients import recipient_cache_stats
+        from src.page_cache import page_cache_stats
+        stats = {
+            "pool": pool_stats(), "ai_cache": cache_stats(),
+            "recipients": recipient_cache_stats(), "page_cache": page_cache_stats(),
+        }
+        replicas = replica_stats()
+        if replicas is not None:
+            stats["replicas"] = replicas
         try:
             db = get_db()
             with db.cursor() as cur:
                 cur.execute("SELECT 1")
-            return jsonify({"status": "ok"}), 200
+            return jsonify({"status": "ok", **stats}), 200
         except Exception:
-            return jsonify({"status": "db_unavailable"}), 503
+            return jsonify({"status": "db_unavailable", **stats}), 503
 
     @app.errorhandler(psycopg2.OperationalError)
     def handle_db_down(e):
-        return render_template("errors/db_down.html"), 503
+        # nav_stats=None: the nav counts would only retry the dead database.
+        return render_template("errors/db_down.html", nav_stats=None), 503, retry_after(e)
 
     init_db(app)
 
     return app
+
+
+def preload_app(app):
+    """Warm ``app`` in the parent of a pre-fork server (``gunicorn --preload``).
+
+    Workers inherit everything done here at fork and share it copy-on-write:
+    the Gemini SDK, the compiled page and email templates. The parent's pool
+    connections are closed so no socket is shared with a worker, and
+    ``gc.freeze()`` keeps the collector from writing to (and so copying) the
+    inherited objects.
+    """
+    from src import ai, mail
+
+    ai.warm_up()
+    mail.warm_up()
+    for name in app.jinja_env.list_templates(filter_func=lambda name: not name.startswith("emails/")):
+        app.jinja_env.get_template(name)
+    app.extensions["db_pool"].closeall()
+    gc.freeze()
+    return app
@@ -0,0 +1,326 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src import ai
+from src.app import create_app
+from src.db import DATABASE_URL
+from src.blueprints.tasks import _sse
+from src.metrics import REQUEST_SECONDS, async_spans, server_timing
+
+# ASGI entry point: `uvicorn src.asgi:app` (pip install ".[async]").
+#
+# The Gemini endpoints run as async views on the event loop, so any number of
+# slow model calls share one thread. Every other route is the unchanged Flask
+# app, run on a bounded pool of ASGI_THREADS threads that AI calls no longer
+# occupy.
+THREADS = int(os.getenv("ASGI_THREADS", 16))
+ASYNC_POOL_MIN = int(os.getenv("ASYNC_DB_POOL_MIN", 0))
+ASYNC_POOL_MAX = int(os.getenv("ASYNC_DB_POOL_MAX", os.getenv("DB_POOL_MAX", 10)))
+SPOOL_BYTES = 1024 * 1024  # request bodies larger than this are spooled to disk
+
+
+class Request:
+    def __init__(self, scope, body):
+        self.scope = scope
+        self.body = body
+        self.headers = {name.decode("latin1"): value.decode("latin1") for name, value in scope["headers"]}
+
+    def json(self):
+        """Like ``request.get_json(silent=True)``: None unless a valid JSON body."""
+        if self.headers.get("content-type", "").split(";")[0].strip() != "application/json":
+            return None
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return None
+
+
+def _json_response(payload, status=200):
+    body = (json.dumps(payload, sort_keys=True, separators=(",", ":")) + "\n").encode()
+    return status, [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())], body
+
+
+def _ai_input(request):
+    data = request.json()
+    data = data if isinstance(data, dict) else {}
+    return str(data.get("title", "")).strip(), str(data.get("body", "")).strip()
+
+
+# --- async views ----------------------------------------------------------------
+# Each returns (status, headers, body), or (status, headers, async iterator of
+# bytes) to stream. They mirror tasks.ai_suggest and tasks.ai_suggest_stream.
+
+async def ai_suggest(request, pool):
+    if not ai.configured():
+        return _json_response({"error": "AI not configured"}, 503)
+    title, body = _ai_input(request)
+    if not title:
+        return _json_response({"error": "Title is required"}, 400)
+    try:
+        recommendation, cache = await ai.recommend_async(title, body, pool)
+    except Exception as e:
+        return _json_response({"error": str(e)}, 500)
+    return _json_response({"recommendation": recommendation, "cached": cache is not None, "cache": cache})
+
+
+async def ai_suggest_stream(request, pool):
+    if not ai.configured():
+        return _json_response({"error": "AI not configured"}, 503)
+    title, body = _ai_input(request)
+    if not title:
+        return _json_response({"error": "Title is required"}, 400)
+
+    async def generate():
+        chunks = None
+        try:
+            cache, chunks = await ai.recommend_stream_async(title, body, pool)
+            async for text in chunks:
+                yield _sse("chunk", {"text": text}).encode()
+            yield _sse("done", {"cached": cache is not None, "cache": cache}).encode()
+        except Exception as e:
+            yield _sse("error", {"error": str(e)}).encode()
+        finally:
+            # Runs when the client goes away too, aborting the upstream call.
+            if chunks is not None:
+                await chunks.aclose()
+
+    headers = [
+        (b"content-type", b"text/event-stream; charset=utf-8"),
+        (b"cache-control", b"no-cache"),
+        (b"x-accel-buffering", b"no"),
+    ]
+    return 200, headers, generate()
+
+
+ASYNC_VIEWS = {"tasks.ai_suggest": ai_suggest, "tasks.ai_suggest_stream": ai_suggest_stream}
+
+
+# --- the Flask app, on threads ------------------------------------------------
+
+def _environ(scope, body):
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin1"),
+        "PATH_INFO": scope["path"].encode().decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("latin1"),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "SERVER_NAME": (scope.get("server") or ("localhost", 80))[0],
+        "SERVER_PORT": str((scope.get("server") or ("localhost", 80))[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for name, value in scope["headers"]:
+        name, value = name.decode("latin1"), value.decode("latin1")
+        if name == "content-type":
+            key = "CONTENT_TYPE"
+        elif name == "content-length":
+            key = "CONTENT_LENGTH"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        if key in environ:
+            value = environ[key] + ("; " if key == "HTTP_COOKIE" else ",") + value
+        environ[key] = value
+    return environ
+
+
+class WSGIBridge:
+    """Serves a WSGI app from ASGI on at most ``threads`` threads.
+
+    Unlike a plain adapter it streams the body as the app yields it, stops
+    when the client disconnects, and always calls the iterable's ``close()``,
+    which Flask relies on for teardown and streamed responses.
+    """
+
+    def __init__(self, wsgi_app, threads=THREADS):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="wsgi")
+
+    async def __call__(self, scope, receive, send):
+        body = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        try:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                body.write(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            body.seek(0)
+            disconnected = threading.Event()
+            watcher = asyncio.ensure_future(_watch_disconnect(receive, disconnected))
+            try:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self.executor, self._run, scope, body, send, loop, disconnected)
+            finally:
+                watcher.cancel()
+        finally:
+            body.close()
+
+    def _run(self, scope, body, send, loop, disconnected):
+        def call(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response.get("sent"):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response["start"] = {
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in headers],
+            }
+            return lambda data: None  # the legacy write() callable; Flask never uses it
+
+        iterable = self.wsgi_app(_environ(scope, body), start_response)
+        try:
+            for chunk in iterable:
+                if not response.get("sent"):
+                    call(response["start"])
+                    response["sent"] = True
+                if chunk:
+                    call({"type": "http.response.body", "body": chunk, "more_body": True})
+                if disconnected.is_set():
+                    return
+            if not response.get("sent"):
+                call(response["start"])
+            call({"type": "http.response.body", "body": b""})
+        finally:
+            close = getattr(iterable, "close", None)
+            if close is not None:
+                close()
+
+
+async def _watch_disconnect(receive, disconnected):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+    disconnected.set()
+
+
+# --- the ASGI app ---------------------------------------------------------------
+
+class AsyncApp:
+    """Routes the :data:`ASYNC_VIEWS` endpoints to async views, the rest to Flask.
+
+    The async views are found by endpoint in Flask's URL map, so they answer
+    on the same paths as their blueprint counterparts; only the methods the
+    blueprint declares are taken over. Postgres is reached through a psycopg
+    3 ``AsyncConnectionPool`` opened at startup (or on first use when the
+    server sends no lifespan events).
+    """
+
+    def __init__(self, flask_app, threads=THREADS):
+        self.flask_app = flask_app
+        self.wsgi = WSGIBridge(flask_app, threads)
+        self.routes = {}
+        for rule in flask_app.url_map.iter_rules():
+            view = ASYNC_VIEWS.get(rule.endpoint)
+            if view is not None:
+                # OPTIONS and HEAD are Flask's automatic answers; leave them to it.
+                self.routes[rule.rule] = (rule.endpoint, rule.methods - {"OPTIONS", "HEAD"}, view)
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+
+    async def pool(self):
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    from psycopg_pool import AsyncConnectionPool
+
+                    pool = AsyncConnectionPool(
+                        DATABASE_URL, min_size=ASYNC_POOL_MIN, max_size=ASYNC_POOL_MAX,
+                        timeout=float(os.getenv("DB_POOL_TIMEOUT", 5)),
+                        kwargs={"connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", 3))},
+                        open=False,
+                    )
+                    await pool.open(wait=False)
+                    self._pool = pool
+        return self._pool
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+        route = self.routes.get(scope["path"])
+        if route is None or scope["method"] not in route[1]:
+            return await self.wsgi(scope, receive, send)
+        await self._serve(route[0], route[2], scope, receive, send)
+
+    async def _serve(self, endpoint, view, scope, receive, send):
+        started = time.perf_counter()
+        async_spans.set({})
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+
+        status, headers, body = await view(Request(scope, b"".join(chunks)), await self.pool())
+        if isinstance(body, bytes):
+            timing = server_timing(async_spans.get(), time.perf_counter() - started)
+            await send({"type": "http.response.start", "status": status,
+                        "headers": headers + [(b"server-timing", timing.encode())]})
+            await send({"type": "http.response.body", "body": body})
+        else:
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await self._stream(body, receive, send)
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint, scope["method"], str(status))
+
+    async def _stream(self, body, receive, send):
+        async def pump():
+            async for chunk in body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+
+        pumping = asyncio.ensure_future(pump())
+        disconnected = asyncio.ensure_future(_watch_disconnect(receive, threading.Event()))
+        try:
+            await asyncio.wait({pumping, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            disconnected.cancel()
+            if not pumping.done():
+                pumping.cancel()  # the client went away: stop waiting on the model
+            try:
+                await pumping
+            except asyncio.CancelledError:
+                pass
+            await body.aclose()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await self.pool()
+                # Import the Gemini SDK now, off the loop: a first request
+                # importing it would stall every request on the loop.
+                await asyncio.get_running_loop().run_in_executor(self.wsgi.executor, ai.warm_up)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._pool is not None:
+                    await self._pool.close()
+                self.wsgi.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_asgi_app(flask_app=None, threads=THREADS):
+    return AsyncApp(flask_app or create_app(), threads)
+
+
+app = create_asgi_app()
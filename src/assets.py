@@ -0,0 +1,232 @@
+import os
+import io
+import gzip
+import json
+import shutil
+import hashlib
+import mimetypes
+import subprocess
+import tempfile
+import posixpath
+import re
+from pathlib import Path
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import with_appcontext
+
+SOURCE_DIR = Path(__file__).parent / "frontend"
+STYLESHEET = "app.css"
+DIST = "dist"  # under the static folder
+MANIFEST = "manifest.json"
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+HASH_LENGTH = 12
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt"}
+MIN_COMPRESS = 512  # bytes; smaller files are not worth a second request path
+
+TAILWIND = os.getenv("TAILWINDCSS", "tailwindcss")
+
+# static file -> [(output name, width or None to keep, format or None to copy)]
+IMAGES = {
+    # Shown at 32px in the sidebar and as the favicon.
+    "assets/img/logo_raw.png": [("assets/img/logo_raw.png", 64, "PNG")],
+    # The AI modal's loading animation, at most ~380px wide.
+    "assets/img/giphy.gif": [
+        ("assets/img/giphy.gif", None, None),
+        ("assets/img/giphy.webp", 320, "WEBP"),
+    ],
+}
+
+_URL = re.compile(r"""url\((['"]?)([^'")]+)\1\)""")
+
+
+# --- build ----------------------------------------------------------------------
+
+class _Build:
+    """Writes fingerprinted files into a fresh dist directory."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.files = {}       # logical name -> path relative to the static folder
+        self.encodings = {}   # static path -> ["br", "gzip"]
+        try:
+            import brotli
+        except ImportError:
+            brotli = None
+        self.brotli = brotli
+
+    def add(self, name, data):
+        stem, ext = posixpath.splitext(name)
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        hashed = f"{stem}.{digest}{ext}"
+        target = self.root / hashed
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        static_path = f"{DIST}/{hashed}"
+        self.files[name] = static_path
+        if ext in COMPRESSIBLE and len(data) >= MIN_COMPRESS:
+            self._precompress(target, static_path, data)
+        return hashed
+
+    def _precompress(self, target, static_path, data):
+        variants = []
+        if self.brotli is not None:
+            variants.append(("br", ".br", self.brotli.compress(data, quality=11)))
+        variants.append(("gzip", ".gz", gzip.compress(data, compresslevel=9, mtime=0)))
+        for encoding, suffix, compressed in variants:
+            if len(compressed) < len(data) * 0.9:
+                target.with_name(target.name + suffix).write_bytes(compressed)
+                self.encodings.setdefault(static_path, []).append(encoding)
+
+    def manifest(self):
+        return {"files": self.files, "encodings": self.encodings}
+
+
+def _image(source, width, fmt):
+    from PIL import Image, ImageSequence
+
+    with Image.open(source) as im:
+        frames, durations = [], []
+        for frame in ImageSequence.Iterator(im):
+            durations.append(frame.info.get("duration", 100))
+            frame = frame.convert("RGBA" if frame.has_transparency_data or frame.mode == "P" else "RGB")
+            if width and frame.width > width:
+                frame = frame.resize((width, round(frame.height * width / frame.width)), Image.LANCZOS)
+            frames.append(frame)
+        out = io.BytesIO()
+        if fmt == "WEBP":
+            frames[0].save(
+                out, "WEBP", save_all=len(frames) > 1, append_images=frames[1:],
+                duration=durations, loop=im.info.get("loop", 0), quality=60, method=4,
+            )
+        else:
+            frames[0].save(out, fmt, optimize=True)
+    return out.getvalue()
+
+
+def _build_images(build, static_folder):
+    for source, outputs in IMAGES.items():
+        path = Path(static_folder) / source
+        for name, width, fmt in outputs:
+            data = path.read_bytes() if fmt is None else _image(path, width, fmt)
+            build.add(name, data)
+            click.echo(f"  {name:<28} {len(data):>9,} bytes  (source {path.stat().st_size:,})")
+
+
+def _build_stylesheet(build):
+    binary = shutil.which(TAILWIND)
+    if binary is None:
+        raise click.ClickException(
+            f"{TAILWIND!r} not found; install the build extras (pip install '.[assets]') or set TAILWINDCSS"
+        )
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / STYLESHEET
+        subprocess.run(
+            [binary, "--input", STYLESHEET, "--output", str(output), "--minify"],
+            cwd=SOURCE_DIR, check=True, capture_output=True,
+        )
+        css = output.read_text()
+
+    # Fingerprint whatever the stylesheet points at (fonts, images) and
+    # rewrite the references; urls are relative to the source stylesheet.
+    def rewrite(match):
+        ref = match.group(2)
+        source = SOURCE_DIR / ref
+        if "://" in ref or ref.startswith(("data:", "/", "#")) or not source.is_file():
+            return match.group(0)
+        return f'url("{build.add(posixpath.normpath(ref), source.read_bytes())}")'
+
+    css = _URL.sub(rewrite, css)
+    build.add(STYLESHEET, css.encode())
+    click.echo(f"  {STYLESHEET:<28} {len(css):>9,} bytes")
+
+
+def build_assets(static_folder):
+    """Build the stylesheet and images into ``static/dist`` and write its manifest.
+
+    The new tree is assembled next to the old one and swapped in at the end,
+    so a running app never sees a half-written dist directory.
+    """
+    dist = Path(static_folder) / DIST
+    staging = Path(tempfile.mkdtemp(prefix=".dist-", dir=static_folder))
+    try:
+        build = _Build(staging)
+        _build_stylesheet(build)
+        _build_images(build, static_folder)
+        (staging / MANIFEST).write_text(json.dumps(build.manifest(), indent=2, sort_keys=True))
+        if dist.exists():
+            shutil.rmtree(dist)
+        staging.rename(dist)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return build
+
+
+@click.command("build-assets")
+@with_appcontext
+def build_assets_command():
+    """Build purged CSS, optimized images and their fingerprinted names."""
+    build = build_assets(current_app.static_folder)
+    if build.brotli is None:
+        click.echo("[assets] brotli not installed: gzip variants only", err=True)
+    click.echo(f"[assets] {len(build.files)} files written to {DIST}/ (restart the app to pick them up)")
+
+
+# --- serving --------------------------------------------------------------------
+
+def init_assets(app):
+    """Resolve static URLs to fingerprinted files when a build is present.
+
+    ``url_for('static', filename=...)`` transparently returns the hashed name
+    of any file in the manifest, and ``asset_url(name)`` does the same for
+    build-only files (the stylesheet, WebP variants), returning None when
+    there is no build. Hashed files are served with ``Cache-Control:
+    immutable`` and, when the client accepts it, their brotli/gzip variant.
+    """
+    try:
+        with open(Path(app.static_folder) / DIST / MANIFEST) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {"files": {}, "encodings": {}}
+    files = manifest["files"]
+    manifest["hashed"] = set(files.values())
+    app.extensions["assets"] = manifest
+
+    @app.url_defaults
+    def _hashed_static(endpoint, values):
+        if endpoint == "static" and values.get("filename") in files:
+            values["filename"] = files[values["filename"]]
+
+    app.jinja_env.globals["asset_url"] = asset_url
+    app.view_functions["static"] = _send_static
+
+
+def asset_url(name):
+    path = current_app.extensions["assets"]["files"].get(name)
+    return url_for("static", filename=path) if path else None
+
+
+def _send_static(filename):
+    app = current_app
+    if filename not in app.extensions["assets"]["hashed"]:
+        return app.send_static_file(filename)
+
+    encodings = app.extensions["assets"]["encodings"].get(filename, ())
+    accepted = request.accept_encodings
+    for encoding in encodings:
+        if accepted[encoding]:
+            suffix = ".br" if encoding == "br" else ".gz"
+            response = send_from_directory(
+                app.static_folder, filename + suffix,
+                mimetype=mimetypes.guess_type(filename)[0], conditional=True,
+            )
+            response.headers["Content-Encoding"] = encoding
+            break
+    else:
+        response = send_from_directory(app.static_folder, filename, conditional=True)
+    if encodings:
+        response.vary.add("Accept-Encoding")
+    # The name carries the content hash, so this URL never changes meaning.
+    response.headers["Cache-Control"] = IMMUTABLE
+    return response
@@ -0,0 +1,348 @@
+import hashlib
+from datetime import date, datetime
+import psycopg2
+from flask import Blueprint, Response, request, jsonify, url_for
+from src.db import get_db, get_read_db, rollback_db
+from src.health import retry_after
+from src.pagination import page_args
+from src.outbox import enqueue, TASK_COMPLETED
+from src.scheduler import reminder_status
+from src.search import search_tasks
+from src.blueprints.tasks import TASK_COLUMNS, task_page, get_task, insert_task, search_args
+from src.blueprints.subscribers import subscriber_page, get_subscriber
+from src.blueprints.reminders import query_reminders
+
+api_bp = Blueprint("api", __name__)
+
+TASK_FIELDS = ("title", "body", "reminder_at", "reminder_note", "completed", "archived")
+SUBSCRIBER_FIELDS = ("name", "email", "active")
+SUBSCRIBER_COLUMNS = "id, name, email, active, created_at, updated_at"
+
+
+# --- helpers ------------------------------------------------------------------
+
+def _error(message, status):
+    return jsonify({"error": message}), status
+
+
+def _serialize(row):
+    return {
+        key: value.isoformat() if isinstance(value, (datetime, date)) else value
+        for key, value in row.items()
+    }
+
+
+def _etag(*parts):
+    return hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:32]
+
+
+def _not_modified(etag):
+    """Return a bodiless 304 if the client already holds ``etag``, else None."""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def _precondition_failed(etag):
+    return bool(request.if_match) and not request.if_match.contains(etag)
+
+
+def _json(payload, etag=None, status=200):
+    response = jsonify(payload)
+    response.status_code = status
+    if etag:
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _collection_etag(cur, table, *args):
+    """Validator for a collection: the table's ``data_versions`` counter.
+
+    The counter is bumped by every statement that changes the table, inside
+    its transaction, so it moves in commit order; reading it sums a handful
+    of slot rows. The filter and paging arguments are folded in so every
+    view and page gets its own tag. Read before the rows: a write landing in
+    between can only pair newer rows with the older tag, which costs the
+    client one extra fetch, never a stale 304.
+    """
+    cur.execute("SELECT SUM(version)::bigint AS version FROM data_versions WHERE name = %s", (table,))
+    return _etag(table, cur.fetchone()["version"], *args)
+
+
+def _row_etag(row):
+    return _etag(row["id"], row["updated_at"])
+
+
+def _page_payload(page, endpoint, **args):
+    def link(**cursor):
+        return url_for(endpoint, limit=request.args.get("limit"), **args, **cursor)
+
+    return {
+        "items": [_serialize(row) for row in page.items],
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+        "next": link(after=page.next_cursor) if page.next_cursor else None,
+        "prev": link(before=page.prev_cursor) if page.prev_cursor else None,
+    }
+
+
+def _body(fields):
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return None, "Expected a JSON object"
+    unknown = set(data) - set(fields)
+    if unknown:
+        return None, f"Unknown field(s): {', '.join(sorted(unknown))}"
+    return data, None
+
+
+def _string(data, key, required=False, max_length=255):
+    value = data.get(key)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{key} must be a string")
+    value = value.strip() if value else None
+    if required and not value:
+        raise ValueError(f"{key} is required")
+    if value and max_length and len(value) > max_length:
+        raise ValueError(f"{key} is longer than {max_length} characters")
+    return value
+
+
+def _flag(data, key):
+    if not isinstance(data[key], bool):
+        raise ValueError(f"{key} must be true or false")
+    return data[key]
+
+
+@api_bp.errorhandler(psycopg2.OperationalError)
+def _db_down(e):
+    body, status = _error("Database unavailable", 503)
+    return body, status, retry_after(e)
+
+
+@api_bp.errorhandler(psycopg2.DataError)
+def _bad_value(e):
+    # The failed query may have run on the read connection; roll back what
+    # the request holds rather than checking out a primary just for this.
+    rollback_db()
+    return _error(f"Invalid value: {e.diag.message_primary or e}", 400)
+
+
+# --- tasks --------------------------------------------------------------------
+
+@api_bp.route("/tasks")
+def list_tasks():
+    archived = request.args.get("archived", "false").lower() == "true"
+    after, before, limit = page_args()
+    db = get_read_db()
+    with db.cursor() as cur:
+        etag = _collection_etag(cur, "tasks", archived, after, before, limit)
+        cached = _not_modified(etag)
+        if cached:
+            return cached
+        page = task_page(cur, archived, after, before, limit, columns=TASK_COLUMNS)
+    return _json(_page_payload(page, "api.list_tasks", archived=str(archived).lower()), etag)
+
+
+@api_bp.route("/tasks/search")
+def search():
+    q, archived, completed = search_args()
+    if not q:
+        return _error("q is required", 400)
+    _, _, limit = page_args()
+    db = get_read_db()
+    with db.cursor() as cur:
+        results = search_tasks(cur, q, archived, completed, limit)
+    return jsonify({"items": [_serialize(row) for row in results]})
+
+
+@api_bp.route("/tasks/<int:task_id>")
+def task_detail(task_id):
+    db = get_read_db()
+    with db.cursor() as cur:
+        task = get_task(cur, task_id)
+    if task is None:
+        return _error("Task not found", 404)
+    etag = _row_etag(task)
+    return _not_modified(etag) or _json(_serialize(task), etag)
+
+
+@api_bp.route("/tasks", methods=["POST"])
+def create_task():
+    data, error = _body(("title", "body", "reminder_at", "reminder_note", "ai_recommendation"))
+    if error:
+        return _error(error, 400)
+    try:
+        title = _string(data, "title", required=True)
+        body = _string(data, "body", max_length=None)
+        reminder_note = _string(data, "reminder_note", max_length=None)
+        ai_recommendation = _string(data, "ai_recommendation", max_length=None)
+        reminder_at = _string(data, "reminder_at")
+    except ValueError as e:
+        return _error(str(e), 400)
+
+    db = get_db()
+    with db.cursor() as cur:
+        task = insert_task(cur, title, body, reminder_at, reminder_note, ai_recommendation)
+    db.commit()
+    response = _json(_serialize(task), _row_etag(task), status=201)
+    response.headers["Location"] = url_for("api.task_detail", task_id=task["id"])
+    return response
+
+
+@api_bp.route("/tasks/<int:task_id>", methods=["PATCH"])
+def update_task(task_id):
+    data, error = _body(TASK_FIELDS)
+    if error:
+        return _error(error, 400)
+    try:
+        changes = {}
+        for key in ("title", "body", "reminder_at", "reminder_note"):
+            if key in data:
+                changes[key] = _string(
+                    data, key, required=key == "title",
+                    max_length=255 if key == "title" else None,
+                )
+        for key in ("completed", "archived"):
+            if key in data:
+                changes[key] = _flag(data, key)
+    except ValueError as e:
+        return _error(str(e), 400)
+
+    db = get_db()
+    with db.cursor() as cur:
+        cur.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = %s FOR UPDATE", (task_id,))
+        current = cur.fetchone()
+        if current is None:
+            db.rollback()
+            return _error("Task not found", 404)
+        if _precondition_failed(_row_etag(current)):
+            db.rollback()
+            return _error("Task was modified", 412)
+        if changes:
+            was_completed = current["completed"]
+            assignments = ", ".join(f"{key} = %s" for key in changes)
+            cur.execute(
+                f"UPDATE tasks SET {assignments} WHERE id = %s RETURNING {TASK_COLUMNS}",
+                (*changes.values(), task_id),
+            )
+            current = cur.fetchone()
+            if current["completed"] and not was_completed:
+                enqueue(cur, TASK_COMPLETED, task_id)
+    db.commit()
+    return _json(_serialize(current), _row_etag(current))
+
+
+# --- reminders ----------------------------------------------------------------
+
+@api_bp.route("/reminders")
+def list_reminders():
+    db = get_read_db()
+    with db.cursor() as cur:
+        etag = _collection_etag(cur, "tasks", "reminders")
+        cached = _not_modified(etag)
+        if cached:
+            return cached
+        reminders = query_reminders(cur)
+    return _json({"items": [_serialize(row) for row in reminders]}, etag)
+
+
+@api_bp.route("/reminders/status")
+def reminders_status():
+    db = get_read_db()
+    with db.cursor() as cur:
+        return jsonify(reminder_status(cur))
+
+
+# --- subscribers --------------------------------------------------------------
+
+@api_bp.route("/subscribers")
+def list_subscribers():
+    after, before, limit = page_args()
+    db = get_read_db()
+    with db.cursor() as cur:
+        etag = _collection_etag(cur, "subscribers", after, before, limit)
+        cached = _not_modified(etag)
+        if cached:
+            return cached
+        page = subscriber_page(cur, after, before, limit, columns=SUBSCRIBER_COLUMNS)
+    return _json(_page_payload(page, "api.list_subscribers"), etag)
+
+
+@api_bp.route("/subscribers/<int:sub_id>")
+def subscriber_detail(sub_id):
+    db = get_read_db()
+    with db.cursor() as cur:
+        subscriber = get_subscriber(cur, sub_id)
+    if subscriber is None:
+        return _error("Subscriber not found", 404)
+    etag = _row_etag(subscriber)
+    return _not_modified(etag) or _json(_serialize(subscriber), etag)
+
+
+@api_bp.route("/subscribers", methods=["POST"])
+def create_subscriber():
+    data, error = _body(("name", "email"))
+    if error:
+        return _error(error, 400)
+    try:
+        name = _string(data, "name", required=True)
+        email = _string(data, "email", required=True)
+    except ValueError as e:
+        return _error(str(e), 400)
+
+    db = get_db()
+    try:
+        with db.cursor() as cur:
+            cur.execute(
+                "INSERT INTO subscribers (name, email) VALUES (%s, %s) RETURNING *",
+                (name, email),
+            )
+            subscriber = cur.fetchone()
+        db.commit()
+    except psycopg2.IntegrityError:
+        db.rollback()
+        return _error("That email is already registered", 409)
+    response = _json(_serialize(subscriber), _row_etag(subscriber), status=201)
+    response.headers["Location"] = url_for("api.subscriber_detail", sub_id=subscriber["id"])
+    return response
+
+
+@api_bp.route("/subscribers/<int:sub_id>", methods=["PATCH"])
+def update_subscriber(sub_id):
+    data, error = _body(SUBSCRIBER_FIELDS)
+    if error:
+        return _error(error, 400)
+    try:
+        changes = {key: _string(data, key, required=True) for key in ("name", "email") if key in data}
+        if "active" in data:
+            changes["active"] = _flag(data, "active")
+    except ValueError as e:
+        return _error(str(e), 400)
+
+    db = get_db()
+    try:
+        with db.cursor() as cur:
+            cur.execute("SELECT * FROM subscribers WHERE id = %s FOR UPDATE", (sub_id,))
+            subscriber = cur.fetchone()
+            if subscriber is None:
+                db.rollback()
+                return _error("Subscriber not found", 404)
+            if _precondition_failed(_row_etag(subscriber)):
+                db.rollback()
+                return _error("Subscriber was modified", 412)
+            if changes:
+                assignments = ", ".join(f"{key} = %s" for key in changes)
+                cur.execute(
+                    f"UPDATE subscribers SET {assignments} WHERE id = %s RETURNING *",
+                    (*changes.values(), sub_id),
+                )
+                subscriber = cur.fetchone()
+        db.commit()
+    except psycopg2.IntegrityError:
+        db.rollback()
+        return _error("That email is already in use", 409)
+    return _json(_serialize(subscriber), _row_etag(subscriber))
@@ -1,17 +1,35 @@
-from flask import Blueprint, render_template
-from src.db import get_db
+from flask import Blueprint, jsonify
+from src.db import get_read_db, RowStream
+from src.pagination import Page, render_list
+from src.scheduler import reminder_status
+from src.blueprints.tasks import TASK_COLUMNS
+from src.page_cache import cached_page
 
 reminders_bp = Blueprint("reminders", __name__)
 
 
+REMINDERS_WHERE = "reminder_at IS NOT NULL AND archived = FALSE"
+
+
+REMINDERS_SQL = f"SELECT {TASK_COLUMNS} FROM tasks WHERE {REMINDERS_WHERE} ORDER BY reminder_at ASC"
+
+
+def query_reminders(cur):
+    cur.execute(REMINDERS_SQL)
+    return cur.fetchall()
+
+
 @reminders_bp.route("/")
+@cached_page("tasks")
 def list_reminders():
-    db = get_db()
+    # Not paginated, so always streamed from a server-side cursor.
+    page = Page(items=RowStream(REMINDERS_SQL), streaming=True)
+    return render_list("reminders/list.html", page, reminders=page.items)
+
+
+@reminders_bp.route("/status")
+def status():
+    db = get_read_db()
     with db.cursor() as cur:
-        cur.execute(
-            """SELECT * FROM tasks
-               WHERE reminder_at IS NOT NULL AND archived = FALSE
-               ORDER BY reminder_at ASC"""
-        )
-        reminders = cur.fetchall()
-    return render_template("reminders/list.html", reminders=reminders)
+        result = reminder_status(cur)
+    return jsonify(result)
@@ -1,16 +1,35 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
-from src.db import get_db
+from src.db import get_db, get_read_db
+from src.pagination import PAGE_SIZE, fetch_page, page_args, render_list, stream_all, wants_all
 
 subscribers_bp = Blueprint("subscribers", __name__)
 
 
+LIST_COLUMNS = "id, name, email, active, created_at"
+
+
+def subscriber_page(cur, after=None, before=None, limit=PAGE_SIZE, columns=LIST_COLUMNS):
+    return fetch_page(
+        cur, columns, "subscribers", "TRUE", (),
+        sort_key="created_at", after=after, before=before, limit=limit,
+    )
+
+
+def get_subscriber(cur, sub_id):
+    cur.execute("SELECT * FROM subscribers WHERE id = %s", (sub_id,))
+    return cur.fetchone()
+
+
 @subscribers_bp.route("/")
 def list_subscribers():
-    db = get_db()
-    with db.cursor() as cur:
-        cur.execute("SELECT * FROM subscribers ORDER BY created_at DESC")
-        subscribers = cur.fetchall()
-    return render_template("subscribers/list.html", subscribers=subscribers)
+    if wants_all():
+        page = stream_all(LIST_COLUMNS, "subscribers", "TRUE", (), "created_at")
+    else:
+        after, before, limit = page_args()
+        db = get_read_db()
+        with db.cursor() as cur:
+            page = subscriber_page(cur, after, before, limit)
+    return render_list("subscribers/list.html", page, subscribers=page.items)
 
 
 @subscribers_bp.route("/new", methods=["GET", "POST"])
@@ -45,8 +64,7 @@ def new_subscriber():
 def edit_subscriber(sub_id):
     db = get_db()
     with db.cursor() as cur:
-        cur.execute("SELECT * FROM subscribers WHERE id = %s", (sub_id,))
-        subscriber = cur.fetchone()
+        subscriber = get_subscriber(cur, sub_id)
 
     if subscriber is None:
         flash("Subscriber not found.", "error")
@@ -1,67 +1,163 @@
-import os
-from google import genai
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
-from src.db import get_db
-from src.mail import send_task_created, send_task_completed
+import io
+import json
+from datetime import date
+import psycopg2
+from flask import (
+    Blueprint, Response, render_template, request, redirect, url_for, flash, jsonify,
+    stream_with_context,
+)
+from src.db import get_db, get_read_db
+from src import ai
+from src.pagination import PAGE_SIZE, fetch_page, page_args, render_list, stream_all, wants_all
+from src.outbox import enqueue, enqueue_batch, TASK_CREATED, TASK_COMPLETED, TASKS_COMPLETED
+from src import transfer
+from src.search import search_tasks
+from src.page_cache import cached_page
+from src.stats import get_stats
 
 tasks_bp = Blueprint("tasks", __name__)
 
 
+# Columns rendered by the list templates. The body is only shown as a
+# 100-character preview, so one extra character is enough to decide on "…".
+LIST_COLUMNS = (
+    "id, title, LEFT(body, 101) AS body, completed, reminder_at, created_at, updated_at"
+)
+
+# Every column a task page or API client needs; the search tsvector is left out.
+TASK_COLUMNS = (
+    "id, title, body, completed, archived, reminder_at, reminder_note, "
+    "ai_recommendation, created_at, updated_at"
+)
+
+MAX_BULK = 1000
+
+# action -> (SET clause, guard, past-tense label). The guard limits the
+# statement to rows that actually change, so RETURNING lists exactly those.
+BULK_UPDATES = {
+    "complete": ("completed = TRUE", "archived = FALSE AND completed = FALSE", "completed"),
+    "reopen": ("completed = FALSE", "archived = FALSE AND completed = TRUE", "reopened"),
+    "archive": ("archived = TRUE", "archived = FALSE", "archived"),
+    "unarchive": ("archived = FALSE", "archived = TRUE", "restored"),
+}
+
+
+# archived -> (filter, sort key) for the two list views.
+TASK_VIEWS = {
+    False: ("archived = FALSE", "created_at"),
+    True: ("archived = TRUE", "updated_at"),
+}
+
+
+def task_page(cur, archived, after=None, before=None, limit=PAGE_SIZE, columns=LIST_COLUMNS):
+    where, sort_key = TASK_VIEWS[archived]
+    return fetch_page(
+        cur, columns, "tasks", where, (),
+        sort_key=sort_key, after=after, before=before, limit=limit,
+    )
+
+
+def task_stream(archived, columns=LIST_COLUMNS):
+    where, sort_key = TASK_VIEWS[archived]
+    return stream_all(columns, "tasks", where, (), sort_key)
+
+
+def get_task(cur, task_id):
+    cur.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = %s", (task_id,))
+    return cur.fetchone()
+
+
+def insert_task(cur, title, body=None, reminder_at=None, reminder_note=None, ai_recommendation=None):
+    """Insert a task and queue its creation email in the caller's transaction."""
+    cur.execute(
+        f"""INSERT INTO tasks (title, body, reminder_at, reminder_note, ai_recommendation)
+            VALUES (%s, %s, %s, %s, %s) RETURNING {TASK_COLUMNS}""",
+        (title, body, reminder_at, reminder_note, ai_recommendation),
+    )
+    task = cur.fetchone()
+    enqueue(cur, TASK_CREATED, task["id"])
+    return task
+
+
 @tasks_bp.route("/")
+@cached_page("tasks")
 def list_tasks():
-    db = get_db()
-    with db.cursor() as cur:
-        cur.execute(
-            "SELECT * FROM tasks WHERE archived = FALSE ORDER BY created_at DESC"
-        )
-        tasks = cur.fetchall()
-    return render_template("tasks/list.html", tasks=tasks)
+    if wants_all():
+        page = task_stream(False)
+    else:
+        after, before, limit = page_args()
+        db = get_read_db()
+        with db.cursor() as cur:
+            page = task_page(cur, False, after, before, limit)
+    return render_list("tasks/list.html", page, tasks=page.items)
 
 
 @tasks_bp.route("/<int:task_id>")
+@cached_page("tasks")
 def detail(task_id):
-    db = get_db()
+    db = get_read_db()
     with db.cursor() as cur:
-        cur.execute("SELECT * FROM tasks WHERE id = %s", (task_id,))
-        task = cur.fetchone()
+        task = get_task(cur, task_id)
     if task is None:
         flash("Task not found.", "error")
         return redirect(url_for("tasks.list_tasks"))
     return render_template("tasks/detail.html", task=task)
 
 
+def _ai_input():
+    data = request.get_json(silent=True) or {}
+    return data.get("title", "").strip(), data.get("body", "").strip()
+
+
 @tasks_bp.route("/ai-suggest", methods=["POST"])
 def ai_suggest():
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
+    if not ai.configured():
         return jsonify({"error": "AI not configured"}), 503
 
-    data = request.get_json(silent=True) or {}
-    title = data.get("title", "").strip()
-    body = data.get("body", "").strip()
-
+    title, body = _ai_input()
     if not title:
         return jsonify({"error": "Title is required"}), 400
 
     try:
-        client = genai.Client(api_key=api_key)
+        recommendation, cache = ai.recommend(title, body)
+        return jsonify({"recommendation": recommendation, "cached": cache is not None, "cache": cache})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        context = f"Title: {title}"
-        if body:
-            context += f"\nDescription: {body}"
 
-        prompt = (
-            f"Eres un asistente de productividad. Dada esta tarea:\n\n{context}\n\n"
-            "Proporcione una recomendación concisa y práctica sobre cómo abordar y completar "
-            "esta tarea de manera efectiva. Sea directo y práctico. Máximo 3 oraciones."
-        )
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
 
-        response = client.models.generate_content(
-            model="gemini-3-flash-preview", contents=prompt
-        )
-        return jsonify({"recommendation": response.text})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+
+@tasks_bp.route("/ai-suggest/stream", methods=["POST"])
+def ai_suggest_stream():
+    """Server-Sent Events variant of ai_suggest: ``chunk`` events, then ``done`` or ``error``."""
+    if not ai.configured():
+        return jsonify({"error": "AI not configured"}), 503
+
+    title, body = _ai_input()
+    if not title:
+        return jsonify({"error": "Title is required"}), 400
+
+    def generate():
+        chunks = None
+        try:
+            cache, chunks = ai.recommend_stream(title, body)
+            for text in chunks:
+                yield _sse("chunk", {"text": text})
+            yield _sse("done", {"cached": cache is not None, "cache": cache})
+        except Exception as e:
+            yield _sse("error", {"error": str(e)})
+        finally:
+            # Runs on client disconnect too (GeneratorExit), aborting the upstream call.
+            if chunks is not None and hasattr(chunks, "close"):
+                chunks.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @tasks_bp.route("/new", methods=["GET", "POST"])
@@ -79,19 +175,9 @@ def new_task():
 
         db = get_db()
         with db.cursor() as cur:
-            cur.execute(
-                """INSERT INTO tasks (title, body, reminder_at, reminder_note, ai_recommendation)
-                   VALUES (%s, %s, %s, %s, %s) RETURNING id""",
-                (title, body, reminder_at, reminder_note, ai_recommendation),
-            )
-            task_id = cur.fetchone()["id"]
+            task_id = insert_task(cur, title, body, reminder_at, reminder_note, ai_recommendation)["id"]
         db.commit()
 
-        with db.cursor() as cur:
-            cur.execute("SELECT * FROM tasks WHERE id = %s", (task_id,))
-            new_task = cur.fetchone()
-        send_task_created(new_task)
-
         flash("Task created.", "success")
         return redirect(url_for("tasks.detail", task_id=task_id))
 
@@ -102,8 +188,7 @@ def new_task():
 def edit_task(task_id):
     db = get_db()
     with db.cursor() as cur:
-        cur.execute("SELECT * FROM tasks WHERE id = %s", (task_id,))
-        task = cur.fetchone()
+        task = get_task(cur, task_id)
 
     if task is None:
         flash("Task not found.", "error")
@@ -138,15 +223,14 @@ def toggle_task(task_id):
     db = get_db()
     with db.cursor() as cur:
         cur.execute(
-            "UPDATE tasks SET completed = NOT completed WHERE id = %s RETURNING *",
+            "UPDATE tasks SET completed = NOT completed WHERE id = %s RETURNING completed",
             (task_id,),
         )
         task = cur.fetchone()
+        if task and task["completed"]:
+            enqueue(cur, TASK_COMPLETED, task_id)
     db.commit()
 
-    if task and task["completed"]:
-        send_task_completed(task)
-
     return redirect(request.referrer or url_for("tasks.list_tasks"))
 
 
@@ -160,15 +244,65 @@ def archive_task(task_id):
     return redirect(url_for("tasks.list_tasks"))
 
 
-@tasks_bp.route("/archived")
-def archived_tasks():
+def _bulk_ids():
+    ids = []
+    for value in request.form.getlist("ids"):
+        try:
+            ids.append(int(value))
+        except ValueError:
+            continue
+    return list(dict.fromkeys(ids))[:MAX_BULK]
+
+
+@tasks_bp.route("/bulk", methods=["POST"])
+def bulk_tasks():
+    """Apply one action to every selected task in a single statement."""
+    action = request.form.get("action", "")
+    ids = _bulk_ids()
+    back = request.referrer or url_for("tasks.list_tasks")
+
+    if action not in BULK_UPDATES and action != "delete":
+        flash("Unknown bulk action.", "error")
+        return redirect(back)
+    if not ids:
+        flash("No tasks selected.", "error")
+        return redirect(back)
+
     db = get_db()
     with db.cursor() as cur:
-        cur.execute(
-            "SELECT * FROM tasks WHERE archived = TRUE ORDER BY updated_at DESC"
-        )
-        tasks = cur.fetchall()
-    return render_template("tasks/archived.html", tasks=tasks)
+        if action == "delete":
+            # Only archived tasks can be removed for good.
+            cur.execute(
+                "DELETE FROM tasks WHERE id = ANY(%s) AND archived = TRUE RETURNING id",
+                (ids,),
+            )
+            label = "deleted"
+        else:
+            assignment, guard, label = BULK_UPDATES[action]
+            cur.execute(
+                f"UPDATE tasks SET {assignment} WHERE id = ANY(%s) AND {guard} RETURNING id",
+                (ids,),
+            )
+        changed = [row["id"] for row in cur.fetchall()]
+        if action == "complete":
+            enqueue_batch(cur, TASKS_COMPLETED, changed)
+    db.commit()
+
+    flash(f"{len(changed)} task{'s' if len(changed) != 1 else ''} {label}.", "success")
+    return redirect(back)
+
+
+@tasks_bp.route("/archived")
+@cached_page("tasks")
+def archived_tasks():
+    if wants_all():
+        page = task_stream(True)
+    else:
+        after, before, limit = page_args()
+        db = get_read_db()
+        with db.cursor() as cur:
+            page = task_page(cur, True, after, before, limit)
+    return render_list("tasks/archived.html", page, tasks=page.items)
 
 
 @tasks_bp.route("/<int:task_id>/unarchive", methods=["POST"])
@@ -179,3 +313,74 @@ def unarchive_task(task_id):
     db.commit()
     flash("Task restored.", "success")
     return redirect(url_for("tasks.archived_tasks"))
+
+
+def search_args():
+    return (
+        request.args.get("q", "").strip(),
+        request.args.get("archived", "false"),
+        request.args.get("completed", "any"),
+    )
+
+
+@tasks_bp.route("/search")
+def search():
+    """Full-text search. ``?partial=1`` returns just the results, for as-you-type."""
+    q, archived, completed = search_args()
+    results = []
+    if q:
+        db = get_read_db()
+        with db.cursor() as cur:
+            results = search_tasks(cur, q, archived, completed)
+    template = "partials/search_results.html" if request.args.get("partial") else "tasks/search.html"
+    return render_template(template, q=q, archived=archived, completed=completed, results=results)
+
+
+@tasks_bp.route("/stats")
+def task_stats():
+    """The nav counts as JSON: a handful of counter rows, no table scans."""
+    return jsonify(get_stats())
+
+
+@tasks_bp.route("/export")
+def export_tasks():
+    fmt = request.args.get("format", "csv")
+    if fmt not in transfer.FORMATS:
+        flash("Unknown export format.", "error")
+        return redirect(url_for("tasks.list_tasks"))
+    filename = f"tasks-{date.today():%Y%m%d}.{fmt}"
+    return Response(
+        stream_with_context(transfer.export_tasks(get_read_db(), fmt)),
+        mimetype=transfer.MIMETYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@tasks_bp.route("/import", methods=["GET", "POST"])
+def import_tasks():
+    if request.method == "POST":
+        upload = request.files.get("file")
+        if upload is None or not upload.filename:
+            flash("Choose a CSV or NDJSON file to import.", "error")
+            return render_template("tasks/import.html", report=None)
+
+        fmt = request.form.get("format") or transfer.format_for(upload.filename)
+        stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+        try:
+            report = transfer.import_tasks(get_db(), stream, fmt)
+        except (ValueError, UnicodeDecodeError) as e:
+            flash(f"Import failed: {e}", "error")
+            return render_template("tasks/import.html", report=None)
+        except psycopg2.DataError as e:
+            # A value validation let through but COPY refused; nothing was imported.
+            flash(f"Import failed: {e.diag.message_primary or e}", "error")
+            return render_template("tasks/import.html", report=None)
+
+        flash(
+            f"{report.imported} task{'s' if report.imported != 1 else ''} imported"
+            + (f", {report.rejected} rejected." if report.rejected else "."),
+            "success" if report.imported or not report.rejected else "error",
+        )
+        return render_template("tasks/import.html", report=report)
+
+    return render_template("tasks/import.html", report=None)
@@ -1,36 +1,259 @@
 import os
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from flask import g
-from dotenv import load_dotenv
-
-load_dotenv()
+from flask import g, current_app, has_request_context, request, session
+from src.pool import CircuitBreaker, ConnectionPool
+from src.migrations import migrate
+from src.metrics import TimedCursor, register_collector, span
+from src.replicas import REPLICA_URLS, Replica, ReplicaSet, parse_lsn, replica_name
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+STREAM_ITERSIZE = int(os.getenv("DB_STREAM_ITERSIZE", 500))
+
+# Session key holding the primary's WAL position after this session's last write.
+WRITTEN_LSN = "_db_lsn"
+
+
+def _make_pool(dsn, minconn):
+    return ConnectionPool(
+        dsn,
+        minconn=minconn,
+        maxconn=int(os.getenv("DB_POOL_MAX", 10)),
+        timeout=float(os.getenv("DB_POOL_TIMEOUT", 5)),
+        max_uses=int(os.getenv("DB_POOL_MAX_USES", 1000)),
+        max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", 1800)),
+        ping_after=float(os.getenv("DB_POOL_PING_AFTER", 30)),
+        breaker=CircuitBreaker(
+            threshold=int(os.getenv("DB_BREAKER_THRESHOLD", 3)),
+            reset_after=float(os.getenv("DB_BREAKER_RESET", 5)),
+        ),
+        cursor_factory=TimedCursor,
+        connect_timeout=int(os.getenv("DB_CONNECT_TIMEOUT", 3)),
+    )
+
+
+def init_pool(app):
+    pool = _make_pool(DATABASE_URL, int(os.getenv("DB_POOL_MIN", 1)))
+    app.extensions["db_pool"] = pool
+    try:
+        pool.prefill()
+    except psycopg2.OperationalError as e:
+        print(f"[db] Warning: could not prefill connection pool (DB unreachable): {e}")
+
+    if REPLICA_URLS:
+        # Replica pools fill on demand; each has its own breaker.
+        replicas = [
+            Replica(replica_name(dsn, i), _make_pool(dsn, 0)) for i, dsn in enumerate(REPLICA_URLS, 1)
+        ]
+        app.extensions["db_replicas"] = ReplicaSet(pool, replicas)
+        app.after_request(_remember_write)
+    return pool
+
+
+def get_pool():
+    return current_app.extensions["db_pool"]
 
 
 def get_db():
     if "db" not in g:
-        g.db = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+        with span("db_connect"):
+            g.db = get_pool().getconn()
     return g.db
 
 
+def _written_lsn(replicas):
+    """This session's last write, until every replica has replayed it."""
+    lsn = session.get(WRITTEN_LSN) if has_request_context() else None
+    if lsn is None:
+        return None
+    lsn = parse_lsn(lsn)
+    if replicas.caught_up(lsn):
+        session.pop(WRITTEN_LSN)
+        return None
+    return lsn
+
+
+def get_read_db():
+    """A connection for read-only queries, held for the rest of the request.
+
+    Without ``DATABASE_REPLICA_URLS`` this is :func:`get_db`. Otherwise it is
+    a replica connection, unless the request already uses the primary or no
+    replica is fresh enough: reads following this session's own write only
+    go to a replica that has replayed it (see :class:`~src.replicas.ReplicaSet`),
+    so the page after a redirect never shows the data from before.
+    """
+    if "db" in g:
+        return g.db
+    if "read_db" not in g:
+        replicas = current_app.extensions.get("db_replicas")
+        if replicas is None:
+            return get_db()
+        with span("db_connect"):
+            routed = replicas.checkout(_written_lsn(replicas))
+        if routed is None:
+            return get_db()
+        g.read_pool, g.read_db = routed
+    return g.read_db
+
+
+def get_read_pool():
+    """The pool :func:`get_read_db` reads from, for reads on a connection of their own."""
+    if "db" in g or current_app.extensions.get("db_replicas") is None:
+        return get_pool()
+    get_read_db()
+    return g.get("read_pool") or get_pool()
+
+
+def _remember_write(response):
+    # Anything but a GET may have committed on the primary: note how far its
+    # WAL got, so this session's reads wait for a replica to replay that far.
+    db = g.get("db")
+    if db is None or request.method in ("GET", "HEAD", "OPTIONS"):
+        return response
+    try:
+        with db.cursor() as cur:
+            cur.execute("SELECT pg_current_wal_lsn()::text AS lsn")
+            session[WRITTEN_LSN] = cur.fetchone().lsn
+        db.rollback()
+    except psycopg2.Error:
+        pass  # the write failed with the connection; close_db discards it
+    return response
+
+
+def rollback_db():
+    """Roll back whichever request connections are checked out; never connects."""
+    for name in ("db", "read_db"):
+        conn = g.get(name)
+        if conn is not None and not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass  # close_db hands it back and the pool discards it
+
+
 def close_db(e=None):
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        get_pool().putconn(db)
+    read_db = g.pop("read_db", None)
+    if read_db is not None:
+        read_pool = g.pop("read_pool")
+        if read_db.closed:
+            current_app.extensions["db_replicas"].lost(read_pool)
+        read_pool.putconn(read_db)
+
+
+class RowStream:
+    """Rows from a named (server-side) cursor, fetched ``itersize`` at a time.
+
+    Meant for streamed responses: the query runs on a connection of its own,
+    borrowed from the pool on first use and returned when the rows run out
+    or the stream is closed. ``stream_with_context`` keeps ``g.db`` alive
+    for as long as the stream, so :func:`~src.pagination.render_list`
+    returns the request's connections before streaming starts.
+
+    Iterate once. Truthiness peeks at the first row, so templates can keep
+    their ``{% if not rows %}`` empty states. ``count`` holds the number of
+    rows yielded so far.
+    """
+
+    def __init__(self, sql, params=(), itersize=STREAM_ITERSIZE):
+        self._pool = get_read_pool()
+        self._sql = sql
+        self._params = params
+        self._itersize = itersize
+        self._conn = None
+        self._cur = None
+        self._done = False
+        self._peeked = []
+        self.count = 0
+
+    def _open(self):
+        if self._cur is None and not self._done:
+            with span("db_connect"):
+                self._conn = self._pool.getconn()
+            self._cur = self._conn.cursor(name="row_stream")
+            self._cur.itersize = self._itersize
+            self._cur.execute(self._sql, self._params)
+        return self._cur
+
+    def __bool__(self):
+        if not self._peeked and not self._done:
+            row = self._open().fetchone()
+            if row is None:
+                self.close()
+            else:
+                self._peeked.append(row)
+        return bool(self._peeked)
+
+    def __iter__(self):
+        try:
+            while self._peeked:
+                self.count += 1
+                yield self._peeked.pop()
+            cur = self._open()
+            if cur is None:
+                return
+            for row in cur:
+                self.count += 1
+                yield row
+        finally:
+            self.close()
+
+    def close(self):
+        self._done = True
+        cur, self._cur = self._cur, None
+        conn, self._conn = self._conn, None
+        try:
+            if cur is not None and not cur.closed:
+                cur.close()
+        except psycopg2.Error:
+            pass
+        if conn is not None:
+            self._pool.putconn(conn)
+
+    def __del__(self):
+        self.close()
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+def replica_stats():
+    replicas = current_app.extensions.get("db_replicas")
+    return replicas.stats() if replicas is not None else None
+
+
+def _pool_metrics():
+    stats = pool_stats()
+    return [
+        ("taskflow_db_pool_connections", "gauge", "Pool connections by state.",
+         [({"state": "in_use"}, stats["in_use"]), ({"state": "idle"}, stats["idle"])]),
+        ("taskflow_db_pool_waiting", "gauge", "Requests waiting for a connection.", [({}, stats["waiting"])]),
+        ("taskflow_db_pool_timeouts_total", "counter", "Checkouts that hit DB_POOL_TIMEOUT.", [({}, stats["timeouts"])]),
+        ("taskflow_db_breaker_open", "gauge", "1 while the DB circuit breaker is failing connections fast.",
+         [({}, int(stats["breaker"]["state"] != "closed"))]),
+        ("taskflow_db_breaker_rejected_total", "counter", "Connection attempts refused by the open breaker.",
+         [({}, stats["breaker"]["rejected"])]),
+    ]
+
+
+register_collector(_pool_metrics)
 
 
 def init_db(app):
-    schema_path = os.path.join(os.path.dirname(__file__), "sql", "schema.sql")
+    """Bring the schema up to date at startup (skip with DB_AUTO_MIGRATE=false)."""
+    if os.getenv("DB_AUTO_MIGRATE", "true").lower() != "true":
+        return
     with app.app_context():
         try:
             db = get_db()
-            with open(schema_path) as f:
-                with db.cursor() as cur:
-                    cur.execute(f.read())
-            db.commit()
-            close_db()
         except psycopg2.OperationalError as e:
             print(f"[db] Warning: could not initialize schema (DB unreachable): {e}")
+            return
+        # A migration that fails once started stops startup: serving a
+        # half-migrated schema is worse than not serving.
+        try:
+            migrate(db)
+        finally:
             close_db()
@@ -0,0 +1,158 @@
+import os
+import time
+import smtplib
+import threading
+from dataclasses import dataclass, field
+from flask_mail import sanitize_address
+
+CHUNK_SIZE = int(os.getenv("MAIL_BCC_CHUNK", 1))
+RATE = float(os.getenv("MAIL_RATE", 0))
+PING_AFTER = float(os.getenv("MAIL_PING_AFTER", 30))
+
+# Stand-in To address rendered into the shared payload, swapped per recipient.
+PLACEHOLDER = "recipient@placeholder.invalid"
+UNDISCLOSED = "undisclosed-recipients:;"
+
+
+def _connection_lost(exc):
+    # SMTPException subclasses OSError, so plain socket errors must be told
+    # apart from protocol-level rejections explicitly.
+    if isinstance(exc, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    return isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+
+
+@dataclass
+class DeliveryReport:
+    sent: int = 0
+    failed: dict = field(default_factory=dict)  # address -> error (refused; retrying won't help)
+    undelivered: list = field(default_factory=list)  # not reached before the connection was lost
+    error: str = None  # why they weren't
+
+    def summary(self):
+        parts = []
+        if self.failed:
+            failures = "; ".join(f"{addr}: {err}" for addr, err in list(self.failed.items())[:20])
+            more = len(self.failed) - 20
+            parts.append(f"{len(self.failed)} recipient(s) failed: {failures}" + (f" (+{more} more)" if more > 0 else ""))
+        if self.undelivered:
+            parts.append(f"{len(self.undelivered)} recipient(s) not reached, connection lost: {self.error}")
+        return "; ".join(parts) or None
+
+
+class DeliveryEngine:
+    """Sends one rendered message to many recipients over a reused SMTP session.
+
+    The MIME payload is encoded once. With ``chunk_size == 1`` every recipient
+    gets their own SMTP transaction and their own ``To`` header; larger chunks
+    send BCC-style to ``undisclosed-recipients``. Either way no address is
+    exposed to another subscriber and a refused address only fails itself.
+    ``rate`` caps SMTP transactions per second (0 = unthrottled).
+    """
+
+    def __init__(self, mail, chunk_size=CHUNK_SIZE, rate=RATE, ping_after=PING_AFTER):
+        self.mail = mail
+        self.chunk_size = max(1, chunk_size)
+        self.rate = rate
+        self.ping_after = ping_after
+        self._conn = None
+        self._pid = None
+        self._last_used = 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = self.mail.connect()
+        conn.__enter__()
+        self._conn = conn
+        self._pid = os.getpid()
+        self._last_used = time.monotonic()
+
+    def _disconnect(self):
+        conn, self._conn = self._conn, None
+        if conn is not None and conn.host is not None and self._pid == os.getpid():
+            try:
+                conn.host.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+
+    def _host(self):
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = None
+            self._connect()
+        elif self._conn.host is not None and time.monotonic() - self._last_used > self.ping_after:
+            try:
+                healthy = self._conn.host.noop()[0] == 250
+            except OSError:
+                healthy = False
+            if not healthy:
+                self._disconnect()
+                self._connect()
+        return self._conn.host
+
+    def _throttle(self):
+        if not self.rate:
+            return
+        now = time.monotonic()
+        if self._next_slot > now:
+            time.sleep(self._next_slot - now)
+            now = self._next_slot
+        self._next_slot = now + 1.0 / self.rate
+
+    def _transaction(self, sender, rcpts, payload):
+        """Run one SMTP transaction, reconnecting once if the session dropped."""
+        for attempt in (1, 2):
+            host = self._host()
+            if host is None:  # MAIL_SUPPRESS_SEND / testing
+                return {}
+            try:
+                refused = host.sendmail(sender, rcpts, payload)
+                self._last_used = time.monotonic()
+                return {addr: f"{code} {msg.decode(errors='replace')}" for addr, (code, msg) in refused.items()}
+            except smtplib.SMTPRecipientsRefused as e:
+                self._last_used = time.monotonic()
+                return {addr: f"{code} {msg.decode(errors='replace')}" for addr, (code, msg) in e.recipients.items()}
+            except OSError as e:
+                if not _connection_lost(e) or attempt == 2:
+                    raise
+                self._disconnect()
+
+    def deliver(self, message, recipients):
+        """Send ``message`` (a flask_mail.Message) to each address in ``recipients``.
+
+        If the connection drops for good partway through, the addresses not
+        yet sent to are left in ``report.undelivered`` for the caller to retry.
+        """
+        report = DeliveryReport()
+        if not recipients:
+            return report
+
+        sender = sanitize_address(message.sender)
+        message.recipients = [PLACEHOLDER]
+        payload = message.as_bytes()
+        placeholder = PLACEHOLDER.encode()
+
+        with self._lock:
+            # Connect (or fail) before sending anything, so an unreachable
+            # server raises and the caller can retry the whole message.
+            self._host()
+            for i in range(0, len(recipients), self.chunk_size):
+                chunk = recipients[i:i + self.chunk_size]
+                to = sanitize_address(chunk[0]) if len(chunk) == 1 else UNDISCLOSED
+                body = payload.replace(placeholder, to.encode(), 1)
+                self._throttle()
+                try:
+                    refused = self._transaction(sender, chunk, body)
+                except OSError as e:
+                    if _connection_lost(e):
+                        report.undelivered = list(recipients[i:])
+                        report.error = str(e)
+                        break
+                    refused = {addr: str(e) for addr in chunk}
+                report.failed.update(refused)
+                report.sent += len(chunk) - len(refused)
+        return report
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
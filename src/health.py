@@ -0,0 +1,125 @@
+import os
+import math
+import time
+import threading
+import psycopg2
+from flask import current_app, jsonify
+from src.pool import CircuitOpen
+
+PROBE_INTERVAL = float(os.getenv("READYZ_INTERVAL", 2))
+# A result older than this means the prober itself is stuck (e.g. in connect).
+STALE_AFTER = float(os.getenv("READYZ_STALE_AFTER", max(3 * PROBE_INTERVAL, 10)))
+
+
+class ReadinessProbe:
+    """Checks the database in the background so probes never have to.
+
+    A daemon thread borrows a pool connection every ``interval`` seconds and
+    runs ``SELECT 1``. Because it goes through the pool, it is also what
+    usually takes the circuit breaker's half-open trial, so user requests
+    keep failing fast until the database is back. ``/readyz`` only reads the
+    cached result, and answers not ready until the first check is in. The
+    thread starts with the first request each process serves, so forked
+    workers get their own.
+    """
+
+    def __init__(self, pool, interval=PROBE_INTERVAL, stale_after=STALE_AFTER):
+        self.pool = pool
+        self.interval = interval
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+        self._result = None  # (ok, error, latency_ms, checked_at monotonic)
+        self.checks = 0
+        self.failures = 0
+
+    def start(self):
+        """Start this process's probe thread, if it isn't running yet."""
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._result = None
+            self._thread = threading.Thread(target=self._run, name="readiness-probe", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self.check()
+            time.sleep(self.interval)
+
+    def check(self):
+        started = time.monotonic()
+        ok, error = True, None
+        try:
+            conn = self.pool.getconn()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+            except psycopg2.Error:
+                self.pool.putconn(conn, discard=True)
+                raise
+            self.pool.putconn(conn)
+        except psycopg2.Error as e:
+            ok, error = False, str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+        with self._lock:
+            self.checks += 1
+            self.failures += not ok
+            self._result = (ok, error, (time.monotonic() - started) * 1000, time.monotonic())
+
+    def state(self):
+        self.start()
+        result = self._result
+        breaker = self.pool.breaker.state
+        if result is None:
+            # The thread's first check hasn't finished; never run one in the request.
+            return {"ready": False, "error": "no database check yet", "checked_ms_ago": None,
+                    "latency_ms": None, "breaker": breaker}
+        ok, error, latency_ms, checked_at = result
+        age = time.monotonic() - checked_at
+        if age > self.stale_after:
+            ok, error = False, f"no database check for {age:.0f}s"
+        elif breaker == self.pool.breaker.OPEN:
+            ok, error = False, error or "circuit breaker open"
+        return {
+            "ready": ok,
+            "error": error,
+            "checked_ms_ago": round(age * 1000, 1),
+            "latency_ms": round(latency_ms, 3),
+            "breaker": breaker,
+        }
+
+    def stats(self):
+        with self._lock:
+            return {"checks": self.checks, "failures": self.failures, "interval": self.interval}
+
+
+def retry_after(error):
+    """``Retry-After`` headers for a 503 caused by ``error``."""
+    if isinstance(error, CircuitOpen):
+        return {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+    return {}
+
+
+def _livez():
+    # The process is up and serving requests; deliberately ignores the database.
+    return jsonify({"status": "ok"})
+
+
+def _readyz():
+    state = current_app.extensions["readiness"].state()
+    return jsonify({"status": "ready" if state["ready"] else "not_ready", **state}), 200 if state["ready"] else 503
+
+
+def init_health(app):
+    """Register ``/livez`` and ``/readyz`` for orchestrator and load-balancer probes."""
+    app.extensions["readiness"] = ReadinessProbe(app.extensions["db_pool"])
+    app.add_url_rule("/livez", "livez", _livez)
+    app.add_url_rule("/readyz", "readyz", _readyz)
+    # Start probing with the first request a worker serves, so the first
+    # /readyz usually finds a result; never in a preloading parent.
+    app.before_request(app.extensions["readiness"].start)
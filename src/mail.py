@@ -1,9 +1,17 @@
 import os
-from flask_mail import Mail, Message
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from flask_mail import Mail, Message, Attachment
+from src.delivery import DeliveryEngine
+from src.metrics import span
 
 mail = Mail()
+engine = DeliveryEngine(mail)
 
 LOGO_PATH = os.path.join(os.path.dirname(__file__), "static", "assets", "img", "logo_raw.png")
+EMAIL_TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "templates", "emails")
+
+_templates = {}
+_logo = None  # inline logo Attachment, built once; None if the file is missing
 
 
 def init_mail(app):
@@ -18,383 +26,163 @@ def init_mail(app):
     mail.init_app(app)
 
 
+def _longdate(value):
+    return value.strftime("%B %d, %Y at %H:%M") if value else ""
+
+
+def _prepare():
+    """Compile the email templates and load the logo.
+
+    Done on the first render rather than in ``init_mail``: web workers only
+    queue mail, so only the outbox worker (or a preloaded parent) pays for it.
+    """
+    global _logo
+    logo = None
+    if os.path.exists(LOGO_PATH):
+        with open(LOGO_PATH, "rb") as f:
+            logo = Attachment(
+                filename="logo.png",
+                content_type="image/png",
+                data=f.read(),
+                disposition="inline",
+                headers={"Content-ID": "<logo>"},
+            )
+
+    env = Environment(
+        loader=FileSystemLoader(EMAIL_TEMPLATES_DIR),
+        autoescape=select_autoescape(["html"]),
+        trim_blocks=True,
+        lstrip_blocks=True,
+        auto_reload=False,
+    )
+    env.filters["longdate"] = _longdate
+    env.globals["has_logo"] = logo is not None
+    env.globals["rule"] = "─" * 36
+    compiled = {}
+    for name in ("task_created", "task_completed", "task_reminder", "tasks_completed"):
+        for ext in ("html", "txt"):
+            compiled[f"{name}.{ext}"] = env.get_template(f"{name}.{ext}")
+    # Published in one step, so a concurrent _render never sees half the set.
+    _logo = logo
+    _templates.update(compiled)
+
+
+def warm_up():
+    if not _templates:
+        _prepare()
+
+
+def _render(name, task=None, **context):
+    warm_up()
+    return _templates[name].render(task=task, **context)
+
+
 def _build_html(task):
-    reminder_block = ""
-    if task.get("reminder_at"):
-        note_row = ""
-        if task.get("reminder_note"):
-            note_row = f"""
-            <tr>
-              <td style="padding:4px 0 0 0; color:#94a3b8; font-size:13px;">
-                {task['reminder_note']}
-              </td>
-            </tr>"""
-        reminder_block = f"""
-        <tr>
-          <td style="padding:24px 0 0 0;">
-            <table width="100%" cellpadding="0" cellspacing="0" border="0"
-                   style="background:#1e1b4b; border:1px solid rgba(99,102,241,.3); border-radius:8px;">
-              <tr>
-                <td style="padding:14px 16px;">
-                  <p style="margin:0 0 4px 0; font-size:11px; font-weight:600; letter-spacing:.08em;
-                             text-transform:uppercase; color:#6366f1;">Reminder</p>
-                  <p style="margin:0; font-size:14px; font-weight:600; color:#a5b4fc;">
-                    🔔 {task['reminder_at'].strftime('%B %d, %Y at %H:%M')}
-                  </p>{note_row}
-                </td>
-              </tr>
-            </table>
-          </td>
-        </tr>"""
-
-    description_block = ""
-    if task.get("body"):
-        description_block = f"""
-        <tr>
-          <td style="padding:20px 0 0 0;">
-            <p style="margin:0 0 6px 0; font-size:11px; font-weight:600; letter-spacing:.08em;
-                       text-transform:uppercase; color:#475569;">Description</p>
-            <p style="margin:0; font-size:14px; line-height:1.6; color:#94a3b8;
-                       white-space:pre-wrap;">{task['body']}</p>
-          </td>
-        </tr>"""
-
-    ai_block = ""
-    if task.get("ai_recommendation"):
-        ai_block = f"""
-        <tr>
-          <td style="padding:20px 0 0 0;">
-            <table width="100%" cellpadding="0" cellspacing="0" border="0"
-                   style="background:rgba(99,102,241,.08); border:1px solid rgba(99,102,241,.2); border-radius:8px;">
-              <tr>
-                <td style="padding:14px 16px;">
-                  <p style="margin:0 0 6px 0; font-size:11px; font-weight:600; letter-spacing:.08em;
-                             text-transform:uppercase; color:#6366f1;">✨ AI Recommendation</p>
-                  <p style="margin:0; font-size:14px; line-height:1.6; color:#a5b4fc;">
-                    {task['ai_recommendation']}
-                  </p>
-                </td>
-              </tr>
-            </table>
-          </td>
-        </tr>"""
-
-    logo_tag = '<img src="cid:logo" alt="TaskFlow" width="28" height="28" style="border-radius:6px; vertical-align:middle; margin-right:8px;">'
-    if not os.path.exists(LOGO_PATH):
-        logo_tag = '<span style="display:inline-block;width:28px;height:28px;background:#6366f1;border-radius:6px;vertical-align:middle;margin-right:8px;"></span>'
-
-    return f"""<!DOCTYPE html>
-<html lang="en">
-<head><meta charset="UTF-8"><meta name="viewport" content="width=device-width,initial-scale=1"></head>
-<body style="margin:0;padding:0;background:#0f1117;font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',sans-serif;">
-  <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background:#0f1117;padding:40px 16px;">
-    <tr>
-      <td align="center">
-        <table width="560" cellpadding="0" cellspacing="0" border="0" style="max-width:560px;width:100%;">
-
-          <!-- Header -->
-          <tr>
-            <td style="background:#1a1d27;border-radius:12px 12px 0 0;padding:24px 32px;
-                       border-bottom:1px solid rgba(99,102,241,.2);">
-              <table width="100%" cellpadding="0" cellspacing="0" border="0">
-                <tr>
-                  <td>
-                    {logo_tag}
-                    <span style="font-size:18px;font-weight:700;color:#f1f5f9;vertical-align:middle;">TaskFlow</span>
-                  </td>
-                  <td align="right">
-                    <span style="font-size:11px;font-weight:600;letter-spacing:.08em;text-transform:uppercase;color:#475569;">
-                      New Task
-                    </span>
-                  </td>
-                </tr>
-              </table>
-            </td>
-          </tr>
-
-          <!-- Body -->
-          <tr>
-            <td style="background:#1a1d27;padding:32px 32px 0 32px;border-radius:0;">
-              <table width="100%" cellpadding="0" cellspacing="0" border="0">
-
-                <!-- Title -->
-                <tr>
-                  <td>
-                    <p style="margin:0 0 8px 0;font-size:11px;font-weight:600;letter-spacing:.08em;
-                               text-transform:uppercase;color:#475569;">Task</p>
-                    <h1 style="margin:0;font-size:22px;font-weight:700;color:#f1f5f9;line-height:1.3;">
-                      {task['title']}
-                    </h1>
-                  </td>
-                </tr>
-
-                <!-- Status -->
-                <tr>
-                  <td style="padding:16px 0 0 0;">
-                    <span style="display:inline-flex;align-items:center;gap:6px;padding:4px 12px;
-                                 border-radius:99px;font-size:12px;font-weight:600;
-                                 background:rgba(100,116,139,.12);color:#94a3b8;
-                                 border:1px solid rgba(100,116,139,.25);">
-                      ○ &nbsp;Pending
-                    </span>
-                  </td>
-                </tr>
-
-                {description_block}
-                {ai_block}
-                {reminder_block}
-
-                <!-- Divider -->
-                <tr>
-                  <td style="padding:28px 0 0 0;">
-                    <hr style="border:none;border-top:1px solid rgba(255,255,255,.05);margin:0;">
-                  </td>
-                </tr>
-
-                <!-- Created at -->
-                <tr>
-                  <td style="padding:16px 0 0 0;">
-                    <p style="margin:0;font-size:12px;color:#334155;">
-                      Created on
-                      <strong style="color:#475569;">
-                        {task['created_at'].strftime('%B %d, %Y at %H:%M') if task.get('created_at') else ''}
-                      </strong>
-                    </p>
-                  </td>
-                </tr>
-
-              </table>
-            </td>
-          </tr>
-
-          <!-- Footer -->
-          <tr>
-            <td style="background:#1a1d27;border-radius:0 0 12px 12px;padding:20px 32px 28px 32px;
-                       border-top:1px solid rgba(255,255,255,.04);">
-              <p style="margin:0;font-size:12px;color:#334155;text-align:center;">
-                You're receiving this because you're subscribed to TaskFlow notifications.
-              </p>
-            </td>
-          </tr>
-
-        </table>
-      </td>
-    </tr>
-  </table>
-</body>
-</html>"""
+    return _render("task_created.html", task)
 
 
 def _build_plaintext(task):
-    lines = [
-        "New task created in TaskFlow",
-        "─" * 36,
-        f"Title:  {task['title']}",
-        "Status: Pending",
-    ]
-    if task.get("reminder_at"):
-        lines.append(f"Reminder: {task['reminder_at'].strftime('%B %d, %Y at %H:%M')}")
-        if task.get("reminder_note"):
-            lines.append(f"Note: {task['reminder_note']}")
-    if task.get("body"):
-        lines += ["", "Description:", task["body"]]
-    if task.get("ai_recommendation"):
-        lines += ["", "✨ AI Recommendation:", task["ai_recommendation"]]
-    if task.get("created_at"):
-        lines += ["", f"Created: {task['created_at'].strftime('%B %d, %Y at %H:%M')}"]
-    return "\n".join(lines)
+    return _render("task_created.txt", task)
 
 
 def _build_completed_html(task):
-    logo_tag = '<img src="cid:logo" alt="TaskFlow" width="28" height="28" style="border-radius:6px; vertical-align:middle; margin-right:8px;">'
-    if not os.path.exists(LOGO_PATH):
-        logo_tag = '<span style="display:inline-block;width:28px;height:28px;background:#6366f1;border-radius:6px;vertical-align:middle;margin-right:8px;"></span>'
-
-    completed_at = ""
-    if task.get("updated_at"):
-        completed_at = task["updated_at"].strftime("%B %d, %Y at %H:%M")
-
-    ai_block = ""
-    if task.get("ai_recommendation"):
-        ai_block = f"""
-        <tr>
-          <td style="padding:20px 0 0 0;">
-            <table width="100%" cellpadding="0" cellspacing="0" border="0"
-                   style="background:rgba(99,102,241,.08); border:1px solid rgba(99,102,241,.2); border-radius:8px;">
-              <tr>
-                <td style="padding:14px 16px;">
-                  <p style="margin:0 0 6px 0; font-size:11px; font-weight:600; letter-spacing:.08em;
-                             text-transform:uppercase; color:#6366f1;">✨ AI Recommendation</p>
-                  <p style="margin:0; font-size:14px; line-height:1.6; color:#a5b4fc;">
-                    {task['ai_recommendation']}
-                  </p>
-                </td>
-              </tr>
-            </table>
-          </td>
-        </tr>"""
-
-    return f"""<!DOCTYPE html>
-<html lang="en">
-<head><meta charset="UTF-8"><meta name="viewport" content="width=device-width,initial-scale=1"></head>
-<body style="margin:0;padding:0;background:#0f1117;font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',sans-serif;">
-  <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background:#0f1117;padding:40px 16px;">
-    <tr>
-      <td align="center">
-        <table width="560" cellpadding="0" cellspacing="0" border="0" style="max-width:560px;width:100%;">
-
-          <!-- Header -->
-          <tr>
-            <td style="background:#1a1d27;border-radius:12px 12px 0 0;padding:24px 32px;
-                       border-bottom:1px solid rgba(34,197,94,.2);">
-              <table width="100%" cellpadding="0" cellspacing="0" border="0">
-                <tr>
-                  <td>
-                    {logo_tag}
-                    <span style="font-size:18px;font-weight:700;color:#f1f5f9;vertical-align:middle;">TaskFlow</span>
-                  </td>
-                  <td align="right">
-                    <span style="font-size:11px;font-weight:600;letter-spacing:.08em;text-transform:uppercase;color:#22c55e;">
-                      ✓ Task Completed
-                    </span>
-                  </td>
-                </tr>
-              </table>
-            </td>
-          </tr>
-
-          <!-- Body -->
-          <tr>
-            <td style="background:#1a1d27;padding:32px 32px 0 32px;">
-              <table width="100%" cellpadding="0" cellspacing="0" border="0">
-
-                <!-- Title -->
-                <tr>
-                  <td>
-                    <p style="margin:0 0 8px 0;font-size:11px;font-weight:600;letter-spacing:.08em;
-                               text-transform:uppercase;color:#475569;">Task</p>
-                    <h1 style="margin:0;font-size:22px;font-weight:700;color:#f1f5f9;line-height:1.3;
-                               text-decoration:line-through;opacity:.7;">
-                      {task['title']}
-                    </h1>
-                  </td>
-                </tr>
-
-                <!-- Status badge -->
-                <tr>
-                  <td style="padding:16px 0 0 0;">
-                    <span style="display:inline-flex;align-items:center;gap:6px;padding:4px 12px;
-                                 border-radius:99px;font-size:12px;font-weight:600;
-                                 background:rgba(34,197,94,.12);color:#4ade80;
-                                 border:1px solid rgba(34,197,94,.25);">
-                      ✓ &nbsp;Done
-                    </span>
-                  </td>
-                </tr>
-
-                {ai_block}
-
-                <!-- Divider -->
-                <tr>
-                  <td style="padding:28px 0 0 0;">
-                    <hr style="border:none;border-top:1px solid rgba(255,255,255,.05);margin:0;">
-                  </td>
-                </tr>
-
-                <!-- Completed at -->
-                <tr>
-                  <td style="padding:16px 0 0 0;">
-                    <p style="margin:0;font-size:12px;color:#334155;">
-                      Completed on
-                      <strong style="color:#475569;">{completed_at}</strong>
-                    </p>
-                  </td>
-                </tr>
-
-              </table>
-            </td>
-          </tr>
-
-          <!-- Footer -->
-          <tr>
-            <td style="background:#1a1d27;border-radius:0 0 12px 12px;padding:20px 32px 28px 32px;
-                       border-top:1px solid rgba(255,255,255,.04);">
-              <p style="margin:0;font-size:12px;color:#334155;text-align:center;">
-                You're receiving this because you're subscribed to TaskFlow notifications.
-              </p>
-            </td>
-          </tr>
-
-        </table>
-      </td>
-    </tr>
-  </table>
-</body>
-</html>"""
+    return _render("task_completed.html", task)
 
 
 def _build_completed_plaintext(task):
-    completed_at = ""
-    if task.get("updated_at"):
-        completed_at = task["updated_at"].strftime("%B %d, %Y at %H:%M")
-    lines = [
-        "Task completed in TaskFlow",
-        "─" * 36,
-        f"Title:  {task['title']}",
-        "Status: ✓ Done",
-    ]
-    if completed_at:
-        lines.append(f"Completed: {completed_at}")
-    if task.get("ai_recommendation"):
-        lines += ["", "✨ AI Recommendation:", task["ai_recommendation"]]
-    return "\n".join(lines)
-
-
-def _send(task, subject, html, plaintext):
-    """Shared delivery logic for all notification types."""
-    if not os.getenv("MAIL_USERNAME"):
-        return
+    return _render("task_completed.txt", task)
+
+
+def _build_reminder_html(task):
+    return _render("task_reminder.html", task)
 
-    from src.db import get_db
-    db = get_db()
-    with db.cursor() as cur:
-        cur.execute("SELECT email FROM subscribers WHERE active = TRUE")
-        rows = cur.fetchall()
 
-    recipients = [row["email"] for row in rows]
+def _build_reminder_plaintext(task):
+    return _render("task_reminder.txt", task)
+
+
+def _build_bulk_completed_html(tasks):
+    return _render("tasks_completed.html", tasks=tasks)
+
+
+def _build_bulk_completed_plaintext(tasks):
+    return _render("tasks_completed.txt", tasks=tasks)
+
+
+def _send(task, subject, html, plaintext, recipients=None):
+    """Shared delivery logic for all notification types.
+
+    Called from the outbox worker. ``recipients`` narrows a retry to the
+    addresses a previous attempt didn't reach; those who have unsubscribed
+    since are dropped. Returns a DeliveryReport with per-recipient failures
+    and the addresses left undelivered; raises if nobody could be reached so
+    the message is retried.
+    """
+    if not os.getenv("MAIL_USERNAME"):
+        return None
+
+    from src.recipients import active_recipients
+    if recipients is None:
+        recipients = list(active_recipients())
+    else:
+        active = set(active_recipients())
+        recipients = [addr for addr in recipients if addr in active]
     if not recipients:
-        return
+        return None
 
-    msg = Message(subject=subject, recipients=recipients, body=plaintext, html=html)
+    msg = Message(subject=subject, body=plaintext, html=html)
+    if _logo is not None:
+        msg.attachments.append(_logo)
 
-    if os.path.exists(LOGO_PATH):
-        with open(LOGO_PATH, "rb") as f:
-            msg.attach(
-                filename="logo.png",
-                content_type="image/png",
-                data=f.read(),
-                disposition="inline",
-                headers={"Content-ID": "<logo>"},
-            )
-    try:
-        mail.send(msg)
-    except Exception as e:
-        print(f"[mail] Failed to send email: {e}")
+    with span("mail"):
+        report = engine.deliver(msg, recipients)
+    if report.failed or report.undelivered:
+        print(f"[mail] {report.summary()}")
+    if (report.failed or report.undelivered) and not report.sent:
+        raise RuntimeError(report.summary())
+    return report
 
 
-def send_task_created(task):
-    _send(
+def send_task_created(task, recipients=None):
+    return _send(
         task,
         subject=f"[TaskFlow] New task: {task['title']}",
         html=_build_html(task),
         plaintext=_build_plaintext(task),
+        recipients=recipients,
     )
 
 
-def send_task_completed(task):
-    _send(
+def send_task_completed(task, recipients=None):
+    return _send(
         task,
         subject=f"[TaskFlow] Task completed: {task['title']}",
         html=_build_completed_html(task),
         plaintext=_build_completed_plaintext(task),
+        recipients=recipients,
+    )
+
+
+def send_task_reminder(task, recipients=None):
+    return _send(
+        task,
+        subject=f"[TaskFlow] Reminder: {task['title']}",
+        html=_build_reminder_html(task),
+        plaintext=_build_reminder_plaintext(task),
+        recipients=recipients,
+    )
+
+
+def send_tasks_completed(tasks, recipients=None):
+    """One notification for a bulk completion, listing every task."""
+    if not tasks:
+        return None
+    if len(tasks) == 1:
+        return send_task_completed(tasks[0], recipients)
+    return _send(
+        tasks,
+        subject=f"[TaskFlow] {len(tasks)} tasks completed",
+        html=_build_bulk_completed_html(tasks),
+        plaintext=_build_bulk_completed_plaintext(tasks),
+        recipients=recipients,
     )
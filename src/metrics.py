@@ -0,0 +1,305 @@
+import os
+import re
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from flask import current_app, g, has_app_context, has_request_context, request
+from werkzeug.middleware.profiler import ProfilerMiddleware
+from src.rows import RowCursor
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+# Opt-in: with PROFILE_REQUESTS=true, a request carrying ?_profile=1 or
+# "X-Profile: 1" runs under cProfile and leaves a .prof file in PROFILE_DIR.
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "false").lower() == "true"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_STATEMENTS = 500  # distinct normalized statements tracked; the rest count as "other"
+MAX_SQL_LENGTH = 300
+
+
+# --- registry -------------------------------------------------------------------
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, labels, value) for labels, value in self._values.items()]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = buckets
+        self._series = {}  # labels -> [count per bucket..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        out = []
+        for labels, values in series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), values):
+                cumulative += count
+                out.append((f"{self.name}_bucket", (*labels, bound), cumulative))
+            out.append((f"{self.name}_sum", labels, values[-1]))
+            out.append((f"{self.name}_count", labels, cumulative))
+        return out
+
+
+_registry = []
+_collectors = []  # callables returning [(name, kind, help, [(labels dict, value), ...]), ...]
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def render_metrics():
+    """The registry in Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            names = metric.labels + ("le",) if name.endswith("_bucket") else metric.labels
+            lines.append(f"{name}{_labels(names, labels)} {value}")
+    for collect in _collectors:
+        for name, kind, help, samples in collect():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_SECONDS = _register(Histogram(
+    "taskflow_http_request_duration_seconds", "Time to serve a request, body included.",
+    ("endpoint", "method", "status"),
+))
+QUERY_SECONDS = _register(Histogram("taskflow_db_query_duration_seconds", "Statement execution time."))
+STATEMENT_CALLS = _register(Counter(
+    "taskflow_db_statement_calls_total", "Executions per normalized statement.", ("statement",),
+))
+STATEMENT_SECONDS = _register(Counter(
+    "taskflow_db_statement_seconds_total", "Execution time per normalized statement.", ("statement",),
+))
+SLOW_QUERIES = _register(Counter("taskflow_db_slow_queries_total", "Statements slower than SLOW_QUERY_MS."))
+SPAN_SECONDS = _register(Histogram(
+    "taskflow_span_duration_seconds", "Time spent in DB connection checkout, Gemini calls and SMTP sends.",
+    ("span",),
+))
+
+
+# --- spans and statements -------------------------------------------------------
+
+# Spans of the request an async view (src/asgi.py) is serving; there is no flask.g there.
+async_spans = ContextVar("async_spans", default=None)
+
+
+def _request_spans():
+    if has_app_context():
+        return g.get("spans")
+    return async_spans.get()
+
+
+def record_span(name, seconds, observe=True):
+    if observe:
+        SPAN_SECONDS.observe(seconds, name)
+    spans = _request_spans()
+    if spans is not None:
+        span = spans.setdefault(name, [0, 0.0])
+        span[0] += 1
+        span[1] += seconds
+
+
+@contextmanager
+def span(name):
+    """Time a block as ``name``: process-wide histogram plus the request's Server-Timing."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - started)
+
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql):
+    """One line, literals replaced by ``?``: the label a statement is counted under."""
+    if isinstance(sql, bytes):
+        sql = sql.decode(errors="replace")
+    sql = _LITERALS.sub("?", _SPACE.sub(" ", sql).strip())
+    return sql[:MAX_SQL_LENGTH]
+
+
+_statements = set()
+_statements_lock = threading.Lock()
+
+
+def record_query(sql, seconds):
+    statement = normalize_sql(sql if isinstance(sql, (str, bytes)) else str(sql))
+    if statement not in _statements:
+        with _statements_lock:
+            if len(_statements) < MAX_STATEMENTS:
+                _statements.add(statement)
+            else:
+                statement = "other"
+    QUERY_SECONDS.observe(seconds)
+    STATEMENT_CALLS.inc(statement)
+    STATEMENT_SECONDS.inc(statement, amount=seconds)
+    record_span("db", seconds, observe=False)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc()
+        where = request.endpoint if has_request_context() else "-"
+        print(f"[db] Slow query ({seconds * 1000:.1f} ms, {where}): {statement}")
+
+
+class TimedCursor(RowCursor):
+    """:class:`RowCursor` that records every statement's count and duration.
+
+    For server-side (named) cursors this times the DECLARE, not the fetches.
+    """
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record_query(query, time.perf_counter() - started)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record_query(query, time.perf_counter() - started)
+
+    def copy_expert(self, sql, file, size=8192):
+        started = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            record_query(sql, time.perf_counter() - started)
+
+
+# --- Flask integration ----------------------------------------------------------
+
+def server_timing(spans, total):
+    parts = []
+    for name, (count, seconds) in spans.items():
+        part = f"{name};dur={seconds * 1000:.1f}"
+        if name == "db":
+            part += f';desc="{count} {"query" if count == 1 else "queries"}"'
+        parts.append(part)
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.spans = {}
+
+
+def _finish_request(response):
+    started = g.get("request_started")
+    if started is None:
+        return response
+    response.headers["Server-Timing"] = server_timing(g.spans, time.perf_counter() - started)
+    labels = (request.endpoint or "unmatched", request.method, str(response.status_code))
+    # Observed when the body has been sent, so streamed pages count in full.
+    response.call_on_close(lambda: REQUEST_SECONDS.observe(time.perf_counter() - started, *labels))
+    return response
+
+
+def _metrics_view():
+    return current_app.response_class(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+class _ProfileOnRequest:
+    """Profile only the requests that ask for it, via werkzeug's ProfilerMiddleware."""
+
+    def __init__(self, app, profile_dir):
+        os.makedirs(profile_dir, exist_ok=True)
+        self.app = app
+        self.profiler = ProfilerMiddleware(
+            app, stream=None, profile_dir=profile_dir,
+            filename_format="{method}.{path}.{elapsed:.0f}ms.{time:.0f}.prof",
+        )
+
+    def __call__(self, environ, start_response):
+        wanted = environ.get("HTTP_X_PROFILE") == "1" or "_profile=1" in environ.get("QUERY_STRING", "").split("&")
+        return (self.profiler if wanted else self.app)(environ, start_response)
+
+
+def register_collector(collect):
+    _collectors.append(collect)
+
+
+def init_metrics(app):
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    if METRICS_ENABLED:
+        app.add_url_rule("/metrics", "metrics", _metrics_view)
+    if PROFILE_REQUESTS:
+        app.wsgi_app = _ProfileOnRequest(app.wsgi_app, PROFILE_DIR)
+        print(f"[metrics] Request profiling enabled: ?_profile=1 writes to {PROFILE_DIR}/")
+
+
+def serve_metrics(app, port):
+    """Serve /metrics from a background thread (for the worker commands)."""
+    from wsgiref.simple_server import make_server, WSGIRequestHandler
+
+    class _Quiet(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    def wsgi(environ, start_response):
+        with app.app_context():
+            body = render_metrics().encode()
+        start_response("200 OK", [("Content-Type", "text/plain; version=0.0.4"), ("Content-Length", str(len(body)))])
+        return [body]
+
+    server = make_server("0.0.0.0", port, wsgi, handler_class=_Quiet)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,152 @@
+import os
+import re
+import time
+import click
+from flask.cli import with_appcontext
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "sql", "migrations")
+
+# Arbitrary, app-wide key for pg_advisory_lock so only one process migrates.
+ADVISORY_LOCK_KEY = 727274001
+# Seconds between attempts to take it while another process migrates.
+LOCK_POLL_INTERVAL = 0.5
+
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+_FILENAME = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+
+
+def load_migrations():
+    """Return ``[(version, name, sql)]`` sorted by version."""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = _FILENAME.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, filename)) as f:
+            migrations.append((int(match.group(1)), match.group(2), f.read()))
+    migrations.sort()
+    return migrations
+
+
+def _split_statements(sql):
+    # Only used for no-transaction migrations, which are plain DDL lists:
+    # statements end with ";" at the end of a line.
+    body = "\n".join(
+        line for line in sql.splitlines() if not line.lstrip().startswith("--")
+    )
+    return [stmt.strip() for stmt in re.split(r";\s*$", body, flags=re.M) if stmt.strip()]
+
+
+def _applied_versions(cur):
+    cur.execute("SELECT to_regclass('schema_migrations') AS t")
+    if cur.fetchone()["t"] is None:
+        return set()
+    cur.execute("SELECT version FROM schema_migrations")
+    return {row["version"] for row in cur.fetchall()}
+
+
+def _apply(conn, version, name, sql):
+    if sql.lstrip().startswith(NO_TRANSACTION_MARKER):
+        # CREATE INDEX CONCURRENTLY and friends refuse to run inside a
+        # transaction block, so each statement is sent on its own.
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            for stmt in _split_statements(sql):
+                cur.execute(stmt)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (version, name),
+            )
+        return
+
+    conn.autocommit = False
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (version, name),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = True
+
+
+def pending_migrations(conn):
+    with conn.cursor() as cur:
+        applied = _applied_versions(cur)
+    conn.rollback()
+    return [m for m in load_migrations() if m[0] not in applied]
+
+
+def migrate(conn):
+    """Apply pending migrations. Returns the list of versions applied.
+
+    The common case — schema already current — costs one catalog lookup and
+    one indexed read and takes no locks. Otherwise the process waits for a
+    session advisory lock, so concurrent workers booting together apply
+    each migration exactly once.
+
+    The wait polls ``pg_try_advisory_lock`` between sleeps rather than
+    blocking in ``pg_advisory_lock``: a blocked statement keeps its snapshot
+    open, and ``CREATE INDEX CONCURRENTLY`` in the migrating process waits
+    for every older snapshot, so it would wait on the very workers waiting
+    on it.
+    """
+    if not pending_migrations(conn):
+        return []
+
+    applied_now = []
+    previous_autocommit = conn.autocommit
+    conn.autocommit = True
+    try:
+        while True:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_lock(%s) AS locked", (ADVISORY_LOCK_KEY,))
+                if cur.fetchone()["locked"]:
+                    break
+            time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """CREATE TABLE IF NOT EXISTS schema_migrations (
+                           version    INTEGER PRIMARY KEY,
+                           name       VARCHAR(255) NOT NULL,
+                           applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                       )"""
+                )
+            # Another process may have finished the job while we waited.
+            for version, name, sql in pending_migrations(conn):
+                print(f"[db] Applying migration {version:04d}_{name}")
+                _apply(conn, version, name, sql)
+                applied_now.append(version)
+        finally:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (ADVISORY_LOCK_KEY,))
+    finally:
+        conn.autocommit = previous_autocommit
+    return applied_now
+
+
+@click.command("migrate")
+@click.option("--status", is_flag=True, help="List pending migrations without applying them.")
+@with_appcontext
+def migrate_command(status):
+    """Apply pending database migrations."""
+    from src.db import get_db
+
+    db = get_db()
+    if status:
+        pending = pending_migrations(db)
+        for version, name, _ in pending:
+            click.echo(f"pending  {version:04d}_{name}")
+        if not pending:
+            click.echo("Database is up to date.")
+        return
+    applied = migrate(db)
+    click.echo(f"Applied {len(applied)} migration(s)." if applied else "Database is up to date.")
@@ -0,0 +1,186 @@
+import os
+import time
+import click
+import psycopg2
+from flask import current_app
+from flask.cli import with_appcontext
+from src.db import get_db
+from src.metrics import serve_metrics
+
+BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 20))
+POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 1))
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", 30))
+BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", 3600))
+# Seconds a claimed message stays with its worker before another may retry it.
+LEASE = float(os.getenv("OUTBOX_LEASE", 300))
+
+TASK_CREATED = "task_created"
+TASK_COMPLETED = "task_completed"
+TASK_REMINDER = "task_reminder"
+# One notification covering several tasks (bulk completion); uses task_ids.
+TASKS_COMPLETED = "tasks_completed"
+
+
+def enqueue(cur, kind, task_id):
+    """Queue a notification inside the caller's transaction."""
+    if not os.getenv("MAIL_USERNAME"):
+        return
+    cur.execute(
+        "INSERT INTO outbox (kind, task_id) VALUES (%s, %s)",
+        (kind, task_id),
+    )
+
+
+def enqueue_batch(cur, kind, task_ids):
+    """Queue one notification covering all of ``task_ids``."""
+    if not os.getenv("MAIL_USERNAME") or not task_ids:
+        return
+    cur.execute(
+        "INSERT INTO outbox (kind, task_ids) VALUES (%s, %s)",
+        (kind, list(task_ids)),
+    )
+
+
+def _backoff(attempts):
+    return min(BACKOFF_BASE * (2 ** (attempts - 1)), BACKOFF_MAX)
+
+
+def _batch_tasks(task_ids):
+    db = get_db()
+    with db.cursor() as cur:
+        cur.execute("SELECT * FROM tasks WHERE id = ANY(%s) ORDER BY id", (task_ids,))
+        rows = cur.fetchall()
+    db.rollback()  # don't sit idle in a transaction while the mail goes out
+    return rows
+
+
+def _dispatch(kind, task, recipients=None):
+    from src.mail import send_task_created, send_task_completed, send_task_reminder, send_tasks_completed
+
+    if kind == TASK_CREATED:
+        return send_task_created(task, recipients)
+    if kind == TASK_COMPLETED:
+        return send_task_completed(task, recipients)
+    if kind == TASK_REMINDER:
+        return send_task_reminder(task, recipients)
+    if kind == TASKS_COMPLETED:
+        return send_tasks_completed(_batch_tasks(task["task_ids"]), recipients)
+    else:
+        raise ValueError(f"unknown outbox kind: {kind}")
+
+
+# Claims due rows, and rows whose lease ran out because their worker died
+# mid-send. The claim counts as an attempt, so a message that keeps killing
+# its worker still runs out of attempts.
+CLAIM_SQL = """
+    WITH claimed AS (
+        UPDATE outbox
+        SET status = 'sending', attempts = attempts + 1,
+            next_attempt_at = NOW() + make_interval(secs => %s)
+        WHERE id IN (
+            SELECT id FROM outbox
+            WHERE status IN ('pending', 'sending') AND next_attempt_at <= NOW()
+            ORDER BY next_attempt_at, id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, kind, attempts, task_id, task_ids, recipients
+    )
+    SELECT c.id AS outbox_id, c.kind, c.attempts, c.task_ids, c.recipients AS outbox_recipients, t.*
+    FROM claimed c LEFT JOIN tasks t ON t.id = c.task_id
+    ORDER BY c.id"""
+
+# Only while the claim is still ours: if the lease ran out and another
+# worker claimed the row, attempts has moved on and this matches nothing.
+FAILED_SQL = """
+    UPDATE outbox
+    SET status = %s, last_error = %s, next_attempt_at = NOW() + make_interval(secs => %s)
+    WHERE id = %s AND status = 'sending' AND attempts = %s"""
+
+# The connection dropped partway through: retry only the addresses not reached.
+UNDELIVERED_SQL = """
+    UPDATE outbox
+    SET status = %s, recipients = %s, last_error = %s, next_attempt_at = NOW() + make_interval(secs => %s)
+    WHERE id = %s AND status = 'sending' AND attempts = %s"""
+
+SENT_SQL = """
+    UPDATE outbox
+    SET status = 'sent', sent_at = NOW(), last_error = %s
+    WHERE id = %s AND status = 'sending' AND attempts = %s"""
+
+
+def deliver_batch(batch_size=BATCH_SIZE, lease=LEASE):
+    """Claim and deliver up to ``batch_size`` due messages. Returns the number claimed.
+
+    The claim is its own short transaction: ``FOR UPDATE SKIP LOCKED`` picks
+    the rows, which are marked ``sending`` for ``lease`` seconds and
+    committed, so no lock or transaction stays open while mail is sent and
+    any number of workers can run side by side. Each message's outcome is
+    then committed on its own, so a worker that dies after sending N
+    messages leaves those N recorded as sent. A message whose outcome never
+    got committed is sent again after its lease expires. If the SMTP
+    connection drops partway through a message, the addresses it had not
+    reached are stored on the row and the retry goes to them alone.
+    """
+    db = get_db()
+    with db.cursor() as cur:
+        cur.execute(CLAIM_SQL, (lease, batch_size))
+        rows = cur.fetchall()
+    db.commit()
+
+    for row in rows:
+        attempts = row["attempts"]
+        try:
+            if attempts > MAX_ATTEMPTS:
+                raise RuntimeError("lease expired on the last attempt; the worker died while sending")
+            report = _dispatch(row["kind"], row, row["outbox_recipients"])
+        except Exception as e:
+            status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+            print(f"[outbox] Delivery of #{row['outbox_id']} failed (attempt {attempts}): {e}")
+            with db.cursor() as cur:
+                cur.execute(FAILED_SQL, (status, str(e), _backoff(attempts), row["outbox_id"], attempts))
+        else:
+            if report and report.undelivered:
+                status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+                print(f"[outbox] #{row['outbox_id']} reached {report.sent}, "
+                      f"{len(report.undelivered)} left for a retry (attempt {attempts})")
+                with db.cursor() as cur:
+                    cur.execute(UNDELIVERED_SQL, (status, report.undelivered, report.summary(),
+                                                  _backoff(attempts), row["outbox_id"], attempts))
+            else:
+                # Refused addresses are recorded but not retried: the server
+                # gave a final answer for them.
+                with db.cursor() as cur:
+                    cur.execute(SENT_SQL, (report.summary() if report else None, row["outbox_id"], attempts))
+        db.commit()
+    return len(rows)
+
+
+def run_worker(app, batch_size=BATCH_SIZE, poll_interval=POLL_INTERVAL, once=False):
+    while True:
+        claimed = 0
+        with app.app_context():
+            try:
+                claimed = deliver_batch(batch_size)
+            except psycopg2.OperationalError as e:
+                print(f"[outbox] Warning: database unavailable, retrying: {e}")
+        if once:
+            return
+        if claimed < batch_size:
+            time.sleep(poll_interval)
+
+
+@click.command("outbox-worker")
+@click.option("--batch-size", default=BATCH_SIZE, show_default=True, help="Messages claimed per transaction.")
+@click.option("--poll-interval", default=POLL_INTERVAL, show_default=True, help="Seconds to sleep when the queue is drained.")
+@click.option("--once", is_flag=True, help="Deliver a single batch and exit.")
+@click.option("--metrics-port", default=0, help="Serve Prometheus /metrics on this port (0 to disable).")
+@with_appcontext
+def outbox_worker_command(batch_size, poll_interval, once, metrics_port):
+    """Deliver queued notification emails."""
+    app = current_app._get_current_object()
+    if metrics_port:
+        serve_metrics(app, metrics_port)
+    print(f"[outbox] Worker started (batch={batch_size}, poll={poll_interval}s)")
+    run_worker(app, batch_size, poll_interval, once)
@@ -0,0 +1,309 @@
+import os
+import time
+import json
+import stat
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import wraps
+import psycopg2
+from flask import current_app, request, session
+from src.db import get_read_db
+from src.metrics import register_collector
+from src.stats import get_stats
+
+# memory: per-process LRU. file: a directory shared by every worker on the host.
+PAGE_CACHE = os.getenv("PAGE_CACHE", "memory").lower()
+PAGE_CACHE_BYTES = int(os.getenv("PAGE_CACHE_BYTES", 64 * 1024 * 1024))
+PAGE_CACHE_MAX_PAGE = int(os.getenv("PAGE_CACHE_MAX_PAGE", 2 * 1024 * 1024))
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "taskflow-page-cache"))
+# Pages keyed by an old version are never read again; this ages them out.
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", 3600))
+
+
+class MemoryStore:
+    """Thread-safe LRU bounded by the total size of the cached bodies."""
+
+    kind = "memory"
+
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (entry, size, expires)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            entry, size, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                self._bytes -= size
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        size = len(entry[0])
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (entry, size, time.monotonic() + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._data:
+                _, (_, evicted, _) = self._data.popitem(last=False)
+                self._bytes -= evicted
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._data), "bytes": self._bytes}
+
+
+class FileStore:
+    """One file per page in a local directory, shared by all worker processes.
+
+    Writes go to a temporary file and are renamed into place, so readers
+    never see a partial page. Expired and excess files are pruned every
+    ``PRUNE_EVERY`` writes, oldest first.
+
+    A file is a one-line JSON header (mimetype, render time) followed by the
+    raw body: data only, nothing that runs on load. Whoever can write the
+    directory can still serve any page, so it is created ``0700`` and
+    refused unless it belongs to this user and nobody else can write it.
+    """
+
+    kind = "file"
+    PRUNE_EVERY = 100
+
+    def __init__(self, directory, max_bytes, ttl):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._writes = 0
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.lstat(directory)
+        if not stat.S_ISDIR(info.st_mode):
+            raise RuntimeError(f"PAGE_CACHE_DIR {directory} is not a directory")
+        if info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise RuntimeError(
+                f"PAGE_CACHE_DIR {directory} must be owned by this user and not group- or world-writable"
+            )
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + ".page")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl < time.time():
+                return None
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                return f.read(), header["mimetype"], header["render_ms"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def set(self, key, entry):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            body, mimetype, render_ms = entry
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps({"mimetype": mimetype, "render_ms": render_ms}).encode() + b"\n")
+                f.write(body)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def _files(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".page"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def prune(self):
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        cutoff = time.time() - self.ttl
+        for mtime, size, path in files:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        files = self._files()
+        return {"entries": len(files), "bytes": sum(size for _, size, _ in files)}
+
+
+def _make_store():
+    if PAGE_CACHE == "file":
+        return FileStore(PAGE_CACHE_DIR, PAGE_CACHE_BYTES, PAGE_CACHE_TTL)
+    if PAGE_CACHE == "memory":
+        return MemoryStore(PAGE_CACHE_BYTES, PAGE_CACHE_TTL)
+    return None
+
+
+_counters = {"hits": 0, "misses": 0, "bypassed": 0, "stored": 0, "saved_ms": 0.0}
+_counters_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    with _counters_lock:
+        _counters[name] += amount
+
+
+def _page_cache_metrics():
+    with _counters_lock:
+        stats = dict(_counters)
+    return [
+        ("taskflow_page_cache_requests_total", "counter", "Cached-page lookups by result.",
+         [({"result": name}, stats[name]) for name in ("hits", "misses", "bypassed")]),
+        ("taskflow_page_cache_saved_seconds_total", "counter", "Render time saved by cache hits.",
+         [({}, round(stats["saved_ms"] / 1000, 6))]),
+    ]
+
+
+register_collector(_page_cache_metrics)
+
+
+def init_page_cache(app):
+    app.extensions["page_cache"] = _make_store()
+
+
+def page_cache_stats():
+    with _counters_lock:
+        stats = dict(_counters)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    stats["saved_ms"] = round(stats["saved_ms"], 1)
+    store = current_app.extensions.get("page_cache")
+    stats["store"] = store.kind if store else "off"
+    if store:
+        stats.update(store.stats())
+    return stats
+
+
+def _versions(tables):
+    """``"tasks=41|archived=3,..."`` for the given tables, or None if a counter is missing.
+
+    The nav counts follow (:func:`~src.stats.get_stats`): every page shows
+    them, and they move with other tables and, every ``STATS_OVERDUE_TTL``
+    seconds at most, with the clock.
+    """
+    db = get_read_db()
+    with db.cursor() as cur:
+        cur.execute(
+            "SELECT name, SUM(version)::bigint AS version FROM data_versions"
+            " WHERE name = ANY(%s) GROUP BY name ORDER BY name",
+            (list(tables),),
+        )
+        rows = cur.fetchall()
+    db.rollback()
+    if len(rows) != len(tables):
+        return None
+    stats = ",".join(f"{name}={value}" for name, value in sorted(get_stats().items()))
+    return ",".join(f"{row.name}={row.version}" for row in rows) + "|" + stats
+
+
+def _capture(body, store, key, mimetype, started):
+    """Pass a streamed body through, keeping a copy to cache if it completes."""
+    chunks, size, complete = [], 0, False
+    try:
+        for chunk in body:
+            if chunks is not None:
+                data = chunk.encode() if isinstance(chunk, str) else chunk
+                size += len(data)
+                if size > PAGE_CACHE_MAX_PAGE:
+                    chunks = None
+                else:
+                    chunks.append(data)
+            yield chunk
+        complete = True
+    finally:
+        close = getattr(body, "close", None)
+        if close is not None:
+            close()
+        if complete and chunks is not None:
+            store.set(key, (b"".join(chunks), mimetype, (time.perf_counter() - started) * 1000))
+            _count("stored")
+
+
+def cached_page(*tables):
+    """Cache a view's rendered HTML until one of ``tables`` changes.
+
+    The key is the request path and query string plus the current
+    ``data_versions`` of ``tables``; the version is read before the view runs,
+    and from the same server as its data (:func:`~src.db.get_read_db`), so a
+    page is never stored under a version newer than its data. Requests
+    with pending flash messages skip the cache entirely, since those pages
+    are one-offs. Streamed pages are cached once they have been sent in full
+    and only if they fit in ``PAGE_CACHE_MAX_PAGE``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            store = current_app.extensions.get("page_cache")
+            if store is None or request.method != "GET" or session.get("_flashes"):
+                if store is not None:
+                    _count("bypassed")
+                return view(*args, **kwargs)
+
+            started = time.perf_counter()
+            try:
+                versions = _versions(tables)
+            except psycopg2.OperationalError:
+                raise  # the connection is gone; the view would fail the same way
+            except psycopg2.Error:
+                get_read_db().rollback()
+                versions = None
+            if versions is None:
+                _count("bypassed")
+                return view(*args, **kwargs)
+            key = f"{request.full_path}|{versions}"
+
+            entry = store.get(key)
+            if entry is not None:
+                body, mimetype, render_ms = entry
+                _count("hits")
+                _count("saved_ms", max(render_ms - (time.perf_counter() - started) * 1000, 0.0))
+                response = current_app.response_class(body, mimetype=mimetype)
+                response.headers["X-Page-Cache"] = "hit"
+                return response
+
+            _count("misses")
+            response = current_app.make_response(view(*args, **kwargs))
+            response.headers["X-Page-Cache"] = "miss"
+            if response.status_code != 200 or response.mimetype != "text/html" or session.get("_flashes"):
+                return response
+            if response.is_streamed:
+                response.response = _capture(response.response, store, key, response.mimetype, started)
+            else:
+                body = response.get_data()
+                if len(body) <= PAGE_CACHE_MAX_PAGE:
+                    store.set(key, (body, response.mimetype, (time.perf_counter() - started) * 1000))
+                    _count("stored")
+            return response
+
+        return wrapper
+
+    return decorator
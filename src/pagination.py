@@ -0,0 +1,150 @@
+import os
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+from flask import current_app, request, render_template, stream_with_context
+from werkzeug.local import LocalProxy
+from src.db import RowStream, close_db
+
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 200))
+# Allow ``?all=1``: stream a whole list through a server-side cursor.
+STREAM_ALL = os.getenv("LIST_STREAM_ALL", "true").lower() == "true"
+# Template output pieces buffered per write while streaming.
+STREAM_BUFFER = int(os.getenv("LIST_STREAM_BUFFER", 200))
+
+
+@dataclass
+class Page:
+    items: list
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+    streaming: bool = False
+
+    @property
+    def paginated(self):
+        return self.next_cursor is not None or self.prev_cursor is not None
+
+
+def encode_cursor(row, sort_key):
+    raw = f"{row[sort_key].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """``(timestamp, id)`` from a cursor, or None if it is not one we issued.
+
+    Both parts are parsed here, so a tampered cursor reads as absent instead
+    of reaching the query as text Postgres can't cast.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def page_args():
+    """Read ``after``/``before``/``limit`` from the query string."""
+    try:
+        limit = int(request.args.get("limit", PAGE_SIZE))
+    except ValueError:
+        limit = PAGE_SIZE
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    return request.args.get("after"), request.args.get("before"), limit
+
+
+def wants_all():
+    return STREAM_ALL and request.args.get("all") == "1"
+
+
+def stream_all(columns, table, where, params, sort_key):
+    """Every matching row, in the same order as :func:`fetch_page`, as a lazy stream."""
+    rows = RowStream(
+        f"SELECT {columns} FROM {table} WHERE {where} ORDER BY {sort_key} DESC, id DESC",
+        params,
+    )
+    return Page(items=rows, streaming=True)
+
+
+def render_list(template_name, page, **context):
+    """Render a list view; a streaming page is sent while its rows are read.
+
+    Flask's ``stream_template`` yields every template fragment separately.
+    This streams the same way but groups ``STREAM_BUFFER`` fragments per
+    write, so the first rows paint immediately without thousands of tiny
+    writes.
+
+    ``stream_with_context`` keeps the request context, and ``g`` with it,
+    alive until the stream ends, so the request's own connections are handed
+    back first: the page then holds only its :class:`RowStream`'s. Lazy
+    context values (the nav counts) are read before that.
+    """
+    if not page.streaming:
+        return render_template(template_name, page=page, stream_all=STREAM_ALL, **context)
+    app = current_app._get_current_object()
+    context["page"] = page
+    context.setdefault("stream_all", STREAM_ALL)
+    app.update_template_context(context)
+    for key, value in context.items():
+        if isinstance(value, LocalProxy):
+            context[key] = value._get_current_object()
+    close_db()
+    stream = app.jinja_env.get_template(template_name).stream(context)
+    stream.enable_buffering(STREAM_BUFFER)
+    response = app.response_class(stream_with_context(stream))
+    # Hand the stream's connection back even if the client goes away mid-page.
+    response.call_on_close(page.items.close)
+    return response
+
+
+def fetch_page(cur, columns, table, where, params, sort_key, after=None, before=None, limit=PAGE_SIZE):
+    """Keyset-paginate ``table`` newest-first on ``(sort_key, id)``.
+
+    ``after`` continues past the last row of the previous page, ``before``
+    walks back from the first row of the current one. Both are opaque
+    cursors produced by :func:`encode_cursor`. Each page is a single index
+    range scan of ``limit + 1`` rows, so its cost does not grow with depth.
+    """
+    params = list(params)
+    backwards = False
+    cursor = decode_cursor(after)
+    if cursor:
+        where += f" AND ({sort_key}, id) < (%s::timestamptz, %s)"
+        params += cursor
+    else:
+        cursor = decode_cursor(before)
+        if cursor:
+            backwards = True
+            where += f" AND ({sort_key}, id) > (%s::timestamptz, %s)"
+            params += cursor
+
+    direction = "ASC" if backwards else "DESC"
+    cur.execute(
+        f"""SELECT {columns} FROM {table}
+            WHERE {where}
+            ORDER BY {sort_key} {direction}, id {direction}
+            LIMIT %s""",
+        params + [limit + 1],
+    )
+    rows = cur.fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    if backwards:
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, cursor is not None
+
+    page = Page(items=rows)
+    if rows and has_next:
+        page.next_cursor = encode_cursor(rows[-1], sort_key)
+    if rows and has_prev:
+        page.prev_cursor = encode_cursor(rows[0], sort_key)
+    return page
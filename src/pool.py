@@ -0,0 +1,293 @@
+import os
+import time
+import threading
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """No connection became available within the acquire timeout."""
+
+
+class CircuitOpen(psycopg2.OperationalError):
+    """The database is marked unreachable; no connection was attempted."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Fails connection attempts fast while the database is unreachable.
+
+    Closed, it lets every attempt through. ``threshold`` consecutive
+    connection failures open it: attempts then raise :class:`CircuitOpen`
+    at once instead of each waiting out the connect timeout. After
+    ``reset_after`` seconds it turns half-open and lets a single trial
+    connection through; success closes it, failure opens it again. A
+    ``threshold`` of 0 disables it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold=3, reset_after=5.0):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._trips = 0
+        self._rejected = 0
+        self._last_error = None
+
+    def _retry_after(self):
+        return max(0.0, self._opened_at + self.reset_after - time.monotonic())
+
+    def before(self):
+        """Call before connecting; raises :class:`CircuitOpen` instead of letting the attempt through."""
+        if self.state == self.CLOSED or not self.threshold:
+            return
+        with self._lock:
+            if self.state == self.OPEN and self._retry_after() == 0:
+                self.state = self.HALF_OPEN
+            if self.state == self.CLOSED or (self.state == self.HALF_OPEN and not self._trial):
+                self._trial = self.state == self.HALF_OPEN
+                return
+            self._rejected += 1
+            retry_after = self._retry_after()
+            raise CircuitOpen(
+                f"database unavailable ({self._last_error}); next connection attempt in {retry_after:.1f}s",
+                retry_after,
+            )
+
+    def success(self):
+        if self.state == self.CLOSED and not self._failures:
+            return
+        with self._lock:
+            if self.state != self.CLOSED:
+                print("[db] Database reachable again, circuit closed")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial = False
+
+    def failure(self, error):
+        if not self.threshold:
+            return
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(error).strip().splitlines()[0] if str(error).strip() else type(error).__name__
+            if self.state == self.HALF_OPEN or self._failures >= self.threshold:
+                if self.state == self.CLOSED:
+                    self._trips += 1
+                    print(f"[db] {self._failures} failed connection attempts, circuit open: {self._last_error}")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self._failures,
+                "trips": self._trips,
+                "rejected": self._rejected,
+                "retry_after": round(self._retry_after(), 3) if self.state != self.CLOSED else 0.0,
+                "last_error": self._last_error,
+            }
+
+
+class ConnectionPool:
+    """Thread-safe psycopg2 connection pool.
+
+    Connections are health-checked on checkout when they have been idle for
+    longer than ``ping_after`` seconds, and recycled once they have been used
+    ``max_uses`` times or have lived for ``max_lifetime`` seconds. New
+    connections go through ``breaker`` (a :class:`CircuitBreaker`).
+    """
+
+    def __init__(self, dsn, minconn=1, maxconn=10, timeout=5.0, max_uses=1000,
+                 max_lifetime=1800.0, ping_after=30.0, breaker=None, **connect_kwargs):
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_uses = max_uses
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+        self.breaker = breaker or CircuitBreaker()
+        self.connect_kwargs = connect_kwargs
+
+        self._cond = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = []       # [(conn, returned_at)], most recently used last
+        self._meta = {}       # id(conn) -> {"created": ts, "uses": n}
+        self._in_use = 0
+        self._waiting = 0
+        self._acquires = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._recycled = 0
+        self._discarded = 0
+
+    def _check_fork(self):
+        # Connections must never be shared across a fork; a child process
+        # forgets the parent's sockets and starts with an empty pool.
+        if os.getpid() != self._pid:
+            self._reset()
+
+    def _connect(self):
+        self.breaker.before()
+        try:
+            conn = psycopg2.connect(self.dsn, **self.connect_kwargs)
+        except Exception as e:
+            self.breaker.failure(e)
+            raise
+        self.breaker.success()
+        self._meta[id(conn)] = {"created": time.monotonic(), "uses": 0}
+        return conn
+
+    def _close(self, conn):
+        self._meta.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, conn):
+        meta = self._meta.get(id(conn))
+        if meta is None:
+            return True
+        if self.max_uses and meta["uses"] >= self.max_uses:
+            return True
+        if self.max_lifetime and time.monotonic() - meta["created"] >= self.max_lifetime:
+            return True
+        return False
+
+    def _healthy(self, conn, idle_for):
+        if conn.closed:
+            return False
+        if idle_for < self.ping_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def prefill(self):
+        with self._cond:
+            self._check_fork()
+            while len(self._idle) + self._in_use < self.minconn:
+                self._idle.append((self._connect(), time.monotonic()))
+
+    def getconn(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self._cond:
+            self._check_fork()
+            while True:
+                while self._idle:
+                    conn, returned_at = self._idle.pop()
+                    if self._expired(conn):
+                        self._recycled += 1
+                        self._close(conn)
+                        continue
+                    if not self._healthy(conn, time.monotonic() - returned_at):
+                        self._discarded += 1
+                        self._close(conn)
+                        continue
+                    return self._checkout(conn, started)
+
+                if self._in_use < self.maxconn:
+                    # Reserve the slot before releasing the lock to connect.
+                    self._in_use += 1
+                    try:
+                        self._cond.release()
+                        try:
+                            conn = self._connect()
+                        finally:
+                            self._cond.acquire()
+                    except Exception:
+                        self._in_use -= 1
+                        self._cond.notify()
+                        raise
+                    self._in_use -= 1
+                    return self._checkout(conn, started)
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"could not acquire a database connection within {self.timeout}s "
+                        f"({self._in_use}/{self.maxconn} in use)"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+    def _checkout(self, conn, started):
+        waited = time.monotonic() - started
+        self._in_use += 1
+        self._acquires += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        self._meta[id(conn)]["uses"] += 1
+        return conn
+
+    def putconn(self, conn, discard=False):
+        with self._cond:
+            if os.getpid() != self._pid:
+                return
+            self._in_use -= 1
+            try:
+                if not discard and not conn.closed:
+                    status = conn.get_transaction_status()
+                    if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                        discard = True
+                    elif status != extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+            if discard or conn.closed:
+                self._discarded += 1
+                self._close(conn)
+            elif self._expired(conn):
+                self._recycled += 1
+                self._close(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            for conn, _ in self._idle:
+                self._close(conn)
+            self._idle = []
+
+    def stats(self):
+        with self._cond:
+            return {
+                "min": self.minconn,
+                "max": self.maxconn,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "acquires": self._acquires,
+                "wait_avg_ms": round(self._wait_total / self._acquires * 1000, 3) if self._acquires else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+                "timeouts": self._timeouts,
+                "recycled": self._recycled,
+                "discarded": self._discarded,
+                "breaker": self.breaker.stats(),
+            }
@@ -0,0 +1,141 @@
+import os
+import time
+import select
+import threading
+import psycopg2
+from src.db import DATABASE_URL, get_db
+
+CHANNEL = "subscribers_changed"
+# Max age of the cached list while the listener is down (or not yet up).
+FALLBACK_TTL = float(os.getenv("SUBSCRIBER_CACHE_TTL", 30))
+# Safety net even while LISTEN is healthy.
+MAX_AGE = float(os.getenv("SUBSCRIBER_CACHE_MAX_AGE", 3600))
+RECONNECT_DELAY = 5.0
+
+
+class RecipientCache:
+    """In-process cache of active subscriber emails.
+
+    A background thread LISTENs on ``subscribers_changed`` (sent by a trigger
+    on ``subscribers``) and drops the cache on every notification, so all
+    processes see changes within milliseconds. If the listener connection is
+    lost, entries expire after ``fallback_ttl`` seconds until it reconnects.
+    """
+
+    def __init__(self, dsn=DATABASE_URL, fallback_ttl=FALLBACK_TTL, max_age=MAX_AGE):
+        self.dsn = dsn
+        self.fallback_ttl = fallback_ttl
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._emails = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._listening = False
+        self._pid = None
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            # First use in this process (or first use after a fork).
+            self._pid = os.getpid()
+            self._emails = None
+            self._listening = False
+            self._thread = threading.Thread(target=self._listen, name="recipient-cache-listener", daemon=True)
+            self._thread.start()
+
+    def _listen(self):
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CHANNEL}")
+                with self._lock:
+                    self._listening = True
+                # Anything may have changed while we were not listening.
+                self.invalidate()
+                while True:
+                    if select.select([conn], [], [], 60)[0]:
+                        conn.poll()
+                        if conn.notifies:
+                            conn.notifies.clear()
+                            self.invalidate()
+                    else:
+                        # Idle: make sure the socket is still alive.
+                        with conn.cursor() as cur:
+                            cur.execute("SELECT 1")
+            except (psycopg2.Error, OSError) as e:
+                print(f"[recipients] Warning: listener disconnected, using {self.fallback_ttl}s TTL: {e}")
+            finally:
+                with self._lock:
+                    self._listening = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except psycopg2.Error:
+                        pass
+            time.sleep(RECONNECT_DELAY)
+
+    def invalidate(self):
+        with self._lock:
+            self._emails = None
+            self._generation += 1
+            self.invalidations += 1
+
+    def _fresh(self):
+        if self._emails is None:
+            return False
+        ttl = self.max_age if self._listening else self.fallback_ttl
+        return time.monotonic() - self._loaded_at < ttl
+
+    def get(self):
+        self._ensure_listener()
+        with self._lock:
+            if self._fresh():
+                self.hits += 1
+                return self._emails
+            self.misses += 1
+            generation = self._generation
+
+        db = get_db()
+        with db.cursor() as cur:
+            cur.execute("SELECT email FROM subscribers WHERE active = TRUE ORDER BY id")
+            emails = tuple(row["email"] for row in cur.fetchall())
+        db.rollback()  # the outbox worker sends right after; don't hold a transaction open
+
+        with self._lock:
+            # Don't cache a result that an invalidation raced past.
+            if generation == self._generation:
+                self._emails = emails
+                self._loaded_at = time.monotonic()
+        return emails
+
+    def stats(self):
+        with self._lock:
+            return {
+                "listening": self._listening,
+                "cached": self._emails is not None,
+                "size": len(self._emails) if self._emails is not None else 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+_cache = RecipientCache()
+
+
+def active_recipients():
+    return _cache.get()
+
+
+def recipient_cache_stats():
+    return _cache.stats()
@@ -0,0 +1,293 @@
+import os
+import time
+import itertools
+import threading
+from collections import deque
+import psycopg2
+from flask import current_app
+from src.pool import CircuitBreaker
+from src.metrics import register_collector, span
+
+# Comma-separated DSNs of streaming replicas of DATABASE_URL; empty disables routing.
+REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# round_robin spreads reads evenly; least_lag sends each one to the freshest replica.
+STRATEGY = os.getenv("DB_REPLICA_STRATEGY", "round_robin").lower()
+MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", 5))
+CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", 1))
+# After a write, how long the session's next read may wait for a replica to
+# replay it before going to the primary instead. 0: go to the primary at once.
+WAIT = float(os.getenv("DB_REPLICA_WAIT", 0))
+
+_PRIMARY_SQL = "SELECT pg_current_wal_lsn()::text AS lsn"
+_REPLICA_SQL = """
+    SELECT pg_is_in_recovery() AS standby,
+           CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn() ELSE pg_current_wal_lsn() END::text AS lsn
+"""
+_REPLAYED_SQL = (
+    "SELECT NOT pg_is_in_recovery() OR COALESCE(pg_last_wal_replay_lsn() >= %s::pg_lsn, FALSE) AS replayed"
+)
+
+
+def parse_lsn(text):
+    """``"16/B374D848"`` as an integer, so positions compare and subtract."""
+    high, low = text.split("/")
+    return (int(high, 16) << 32) | int(low, 16)
+
+
+def format_lsn(lsn):
+    return f"{lsn >> 32:X}/{lsn & 0xFFFFFFFF:X}"
+
+
+def _first_line(error):
+    return str(error).strip().splitlines()[0] if str(error).strip() else type(error).__name__
+
+
+class Replica:
+    """One replica's pool and what the lag monitor last saw of it."""
+
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.standby = True
+        self.lsn = None          # WAL position replayed, as an integer
+        self.lag_bytes = None    # behind the primary's last known WAL position
+        self.lag_seconds = None  # how long ago the primary passed self.lsn; 0 when caught up
+        self.checked_at = None   # monotonic
+        self.error = None
+
+
+class ReplicaSet:
+    """Routes read-only queries to streaming replicas.
+
+    A daemon thread reads the primary's WAL position and each replica's
+    replay position every ``interval`` seconds. A replica's lag in seconds
+    is how long ago the primary was where the replica is now, from that
+    history of primary positions, so it grows while replay is stuck even
+    when no transaction is being replayed. A replica takes reads while
+    its last check is recent, it is at most ``max_lag`` seconds behind and
+    its circuit breaker is closed; among those, ``strategy`` picks one.
+
+    A read that must see a given write (``min_lsn``) goes to a replica known
+    to have replayed it. If none has, it waits up to ``wait`` seconds on one
+    for the replay, then falls back to the primary. Like
+    :class:`~src.health.ReadinessProbe`, the thread starts on first use in
+    each process.
+    """
+
+    def __init__(self, primary, replicas, strategy=STRATEGY, max_lag=MAX_LAG, interval=CHECK_INTERVAL, wait=WAIT):
+        if strategy not in ("round_robin", "least_lag"):
+            raise ValueError(f"unknown DB_REPLICA_STRATEGY {strategy!r}")
+        self.primary = primary
+        self.replicas = replicas
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.interval = interval
+        self.stale_after = max(3 * interval, 5.0)
+        self.wait = wait
+        self._lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+        self._next = itertools.count()
+        # (monotonic, primary LSN) samples, enough to tell a lag beyond max_lag.
+        self._history = deque(maxlen=max(int(max_lag / interval) * 2 + 2, 10))
+        self._routes = {}  # (target, reason) -> reads
+
+    # --- lag monitor ---------------------------------------------------------
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="replica-lag", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self.check()
+            time.sleep(self.interval)
+
+    def _query(self, pool, sql):
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+                row = cur.fetchone()
+            conn.rollback()
+        except psycopg2.Error:
+            pool.putconn(conn, discard=True)
+            raise
+        pool.putconn(conn)
+        return row
+
+    def _lag_seconds(self, lsn, now):
+        """Seconds since the primary's WAL first went past ``lsn``, per the samples."""
+        if not self._history or lsn >= self._history[-1][1]:
+            return 0.0
+        for sampled_at, primary_lsn in self._history:
+            if primary_lsn > lsn:
+                return now - sampled_at
+        return 0.0
+
+    def check(self):
+        try:
+            self._history.append((time.monotonic(), parse_lsn(self._query(self.primary, _PRIMARY_SQL).lsn)))
+        except psycopg2.Error:
+            pass  # replicas keep serving, measured against the last position seen
+        for replica in self.replicas:
+            try:
+                row = self._query(replica.pool, _REPLICA_SQL)
+            except psycopg2.Error as e:
+                replica.error = _first_line(e)
+                replica.checked_at = time.monotonic()
+                continue
+            if not row.standby and replica.standby:
+                print(f"[db] Warning: replica {replica.name} is not in recovery; treating it as caught up")
+            now = time.monotonic()
+            replica.standby = row.standby
+            replica.lsn = parse_lsn(row.lsn) if row.lsn else 0
+            if not row.standby:
+                replica.lag_bytes, replica.lag_seconds = 0, 0.0
+            else:
+                replica.lag_bytes = max(self._history[-1][1] - replica.lsn, 0) if self._history else None
+                replica.lag_seconds = self._lag_seconds(replica.lsn, now)
+            replica.error = None
+            replica.checked_at = now
+
+    # --- routing -------------------------------------------------------------
+
+    def _usable(self, replica, now):
+        return (
+            replica.error is None
+            and replica.checked_at is not None
+            and now - replica.checked_at <= self.stale_after
+            and replica.lag_seconds is not None
+            and replica.lag_seconds <= self.max_lag
+            and replica.pool.breaker.state == CircuitBreaker.CLOSED
+        )
+
+    def _pick(self, replicas):
+        if self.strategy == "least_lag":
+            return min(replicas, key=lambda r: (r.lag_seconds, r.lag_bytes or 0))
+        return replicas[next(self._next) % len(replicas)]
+
+    def route(self, min_lsn=None):
+        """``(replica or None, reason)`` for a read that must see ``min_lsn``."""
+        self._ensure_thread()
+        now = time.monotonic()
+        usable = [replica for replica in self.replicas if self._usable(replica, now)]
+        if not usable:
+            return None, "no_replica"
+        if min_lsn is None:
+            return self._pick(usable), "replica"
+        replayed = [replica for replica in usable if replica.lsn >= min_lsn]
+        if replayed:
+            return self._pick(replayed), "replayed"
+        if self.wait > 0:
+            return self._pick(usable), "waited"
+        return None, "read_your_writes"
+
+    def caught_up(self, lsn):
+        """Whether every replica has replayed ``lsn``, so a session can stop tracking it."""
+        return all(replica.lsn is not None and replica.lsn >= lsn for replica in self.replicas)
+
+    def _wait_for(self, conn, lsn):
+        deadline = time.monotonic() + self.wait
+        with span("db_replica_wait"), conn.cursor() as cur:
+            while True:
+                cur.execute(_REPLAYED_SQL, (format_lsn(lsn),))
+                replayed = cur.fetchone().replayed
+                conn.rollback()
+                if replayed or time.monotonic() >= deadline:
+                    return replayed
+                time.sleep(0.01)
+
+    def checkout(self, min_lsn=None):
+        """``(pool, connection)`` on a replica for a read, or None to read from the primary."""
+        replica, reason = self.route(min_lsn)
+        if replica is not None:
+            try:
+                conn = replica.pool.getconn()
+                if reason != "waited" or self._wait_for(conn, min_lsn):
+                    self._count(replica.name, reason)
+                    return replica.pool, conn
+                replica.pool.putconn(conn)
+                reason = "wait_timeout"
+            except psycopg2.OperationalError as e:
+                replica.error = _first_line(e)
+                reason = "replica_down"
+        self._count("primary", reason)
+        return None
+
+    def lost(self, pool):
+        """A replica connection broke mid-request: stop routing there until the next check."""
+        for replica in self.replicas:
+            if replica.pool is pool:
+                replica.error = "connection lost"
+                pool.closeall()  # its idle connections are most likely dead too
+
+    def _count(self, target, reason):
+        with self._lock:
+            self._routes[(target, reason)] = self._routes.get((target, reason), 0) + 1
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            routes = [
+                {"target": target, "reason": reason, "reads": reads}
+                for (target, reason), reads in sorted(self._routes.items())
+            ]
+        return {
+            "strategy": self.strategy,
+            "max_lag": self.max_lag,
+            "wait": self.wait,
+            "routes": routes,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "usable": self._usable(replica, now),
+                    "standby": replica.standby,
+                    "lsn": format_lsn(replica.lsn) if replica.lsn is not None else None,
+                    "lag_bytes": replica.lag_bytes,
+                    "lag_seconds": round(replica.lag_seconds, 3) if replica.lag_seconds is not None else None,
+                    "checked_ms_ago": round((now - replica.checked_at) * 1000, 1) if replica.checked_at else None,
+                    "error": replica.error,
+                    "pool": replica.pool.stats(),
+                }
+                for replica in self.replicas
+            ],
+        }
+
+
+def replica_name(dsn, index):
+    """``replica<index>:host:port`` for labels and logs; never the credentials."""
+    try:
+        params = psycopg2.extensions.parse_dsn(dsn)
+    except psycopg2.ProgrammingError:
+        return f"replica{index}"
+    host = params.get("host") or "localhost"
+    if host.startswith("/"):
+        host = "local"  # a Unix socket directory
+    return f"replica{index}:{host}:{params.get('port', 5432)}"
+
+
+def _replica_metrics():
+    replicas = current_app.extensions.get("db_replicas")
+    if replicas is None:
+        return []
+    stats = replicas.stats()
+    return [
+        ("taskflow_db_reads_total", "counter", "Read-only checkouts by where they were routed and why.",
+         [({"target": route["target"], "reason": route["reason"]}, route["reads"]) for route in stats["routes"]]),
+        ("taskflow_db_replica_up", "gauge", "1 while a replica takes reads.",
+         [({"replica": r["name"]}, int(r["usable"])) for r in stats["replicas"]]),
+        ("taskflow_db_replica_lag_seconds", "gauge", "Replica replay lag (0 when caught up with the primary).",
+         [({"replica": r["name"]}, r["lag_seconds"]) for r in stats["replicas"] if r["lag_seconds"] is not None]),
+        ("taskflow_db_replica_lag_bytes", "gauge", "WAL the replica has yet to replay.",
+         [({"replica": r["name"]}, r["lag_bytes"]) for r in stats["replicas"] if r["lag_bytes"] is not None]),
+    ]
+
+
+register_collector(_replica_metrics)
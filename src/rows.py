@@ -0,0 +1,124 @@
+from functools import lru_cache
+import psycopg2
+from psycopg2.extras import NamedTupleCursor
+
+try:
+    # The C descriptor namedtuple uses: reads the tuple slot directly.
+    from _collections import _tuplegetter
+except ImportError:
+    def _tuplegetter(index, doc):
+        return property(lambda self: tuple.__getitem__(self, index), doc=doc)
+
+# table -> record class; filled in below once the classes exist.
+TABLE_RECORDS = {}
+
+# (connection dsn, pg_class oid) -> record class. OIDs belong to a database,
+# and a replica or a recreated database has its own, so each one is looked
+# up by name the first time a result from it shows up.
+_table_classes = {}
+
+
+class Row(tuple):
+    """A result row: a tuple with named fields.
+
+    Fields read as attributes (``task.title``) or by key (``task["title"]``),
+    and ``keys``/``items``/``get`` make it a drop-in for the dict rows the
+    app used to get, so ``dict(row)`` and ``**row`` work too. The field
+    names live on the class, not on every row, so a row costs one tuple.
+    """
+
+    __slots__ = ()
+    _fields = ()
+    _index = {}
+
+    _make = classmethod(tuple.__new__)
+
+    def __getitem__(self, key):
+        if key.__class__ is str:
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def get(self, key, default=None):
+        i = self._index.get(key)
+        return default if i is None else tuple.__getitem__(self, i)
+
+    def keys(self):
+        return self._fields
+
+    def values(self):
+        return tuple(self)
+
+    def items(self):
+        return zip(self._fields, self)
+
+    def _asdict(self):
+        return dict(zip(self._fields, self))
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={value!r}" for name, value in zip(self._fields, self))
+        return f"{type(self).__name__}({fields})"
+
+
+class Task(Row):
+    """A row from ``tasks``, with whichever columns the query selected."""
+
+    __slots__ = ()
+
+
+class Subscriber(Row):
+    """A row from ``subscribers``, with whichever columns the query selected."""
+
+    __slots__ = ()
+
+
+TABLE_RECORDS.update(tasks=Task, subscribers=Subscriber)
+
+
+@lru_cache(maxsize=1024)
+def record_class(base, fields):
+    """Return the ``base`` subclass for rows with these column names.
+
+    Built once per distinct column list. Every column gets the same slot
+    descriptor a namedtuple field has, so attribute access costs the same. With
+    duplicate names (``SELECT o.*, t.*``) the last one wins, as it did
+    with dict rows.
+    """
+    index = {name: i for i, name in enumerate(fields)}
+    namespace = {"__slots__": (), "_fields": fields, "_index": index}
+    for name, i in index.items():
+        if name.isidentifier() and name not in Row.__dict__:
+            namespace[name] = _tuplegetter(i, f"Column {name!r}")
+    return type(base.__name__, (base,), namespace)
+
+
+def _table_class(conn, oid):
+    key = (conn.dsn, oid)
+    base = _table_classes.get(key)
+    if base is None:
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cur:
+            cur.execute("SELECT relname FROM pg_class WHERE oid = %s AND relkind = 'r'", (oid,))
+            row = cur.fetchone()
+        base = _table_classes[key] = TABLE_RECORDS.get(row[0], Row) if row else Row
+    return base
+
+
+class RowCursor(NamedTupleCursor):
+    """Cursor factory producing :class:`Row` records.
+
+    A query whose first column comes straight from ``tasks`` or
+    ``subscribers`` yields :class:`Task` or :class:`Subscriber` records;
+    anything else (aggregates, joins led by another table) yields plain
+    :class:`Row`. The table is read from the result description, so no
+    call site has to say what it selects.
+    """
+
+    def _make_nt(self):
+        description = self.description or ()
+        fields = tuple(column.name for column in description)
+        base = Row
+        if description and description[0].table_oid:
+            base = _table_class(self.connection, description[0].table_oid)
+        return record_class(base, fields)
@@ -0,0 +1,254 @@
+import os
+import time
+import heapq
+import threading
+from datetime import datetime, timedelta, timezone
+import click
+import psycopg2
+from flask import current_app
+from flask.cli import with_appcontext
+from src.db import get_db
+from src.metrics import serve_metrics
+from src.outbox import enqueue, TASK_REMINDER
+
+HORIZON = float(os.getenv("REMINDER_HORIZON", 600))
+REFRESH_INTERVAL = float(os.getenv("REMINDER_REFRESH_INTERVAL", 15))
+CATCHUP = float(os.getenv("REMINDER_CATCHUP", 86400))
+# Re-read a little before the watermark: updated_at is the writer's
+# transaction start, which can be earlier than its commit.
+WATERMARK_OVERLAP = 60
+
+# Each query below is a range scan on a partial index from 0003/0005.
+WINDOW_SQL = """
+    SELECT t.id, t.reminder_at FROM tasks t
+    WHERE t.reminder_at IS NOT NULL AND t.archived = FALSE
+      AND t.reminder_at > %s AND t.reminder_at <= %s
+      AND t.completed = FALSE
+      AND NOT EXISTS (
+          SELECT 1 FROM reminder_deliveries d
+          WHERE d.task_id = t.id AND d.reminder_at = t.reminder_at
+      )"""
+
+CHANGED_SQL = """
+    SELECT t.id, t.reminder_at FROM tasks t
+    WHERE t.reminder_at IS NOT NULL AND t.archived = FALSE
+      AND t.updated_at > %s
+      AND t.reminder_at <= %s
+      AND t.completed = FALSE
+      AND NOT EXISTS (
+          SELECT 1 FROM reminder_deliveries d
+          WHERE d.task_id = t.id AND d.reminder_at = t.reminder_at
+      )"""
+
+CLAIM_SQL = """
+    INSERT INTO reminder_deliveries (task_id, reminder_at)
+    SELECT id, reminder_at FROM tasks
+    WHERE id = ANY(%s)
+      AND reminder_at IS NOT NULL AND archived = FALSE AND completed = FALSE
+      AND reminder_at <= %s
+    ON CONFLICT DO NOTHING
+    RETURNING task_id, reminder_at, fired_at"""
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+class ReminderScheduler:
+    """Fires due reminders from an in-memory min-heap.
+
+    The heap only holds reminders due within ``horizon`` seconds. It is
+    topped up every ``refresh_interval`` seconds by two indexed range
+    queries: reminders that slid into the window, and reminders edited since
+    the last refresh. Entries are never trusted blindly — firing is an
+    ``INSERT ... ON CONFLICT DO NOTHING`` into ``reminder_deliveries`` that
+    re-checks the task, so stale entries are dropped and concurrent
+    instances never fire the same reminder twice.
+    """
+
+    def __init__(self, app, horizon=HORIZON, refresh_interval=REFRESH_INTERVAL, catchup=CATCHUP):
+        self.app = app
+        self.horizon = timedelta(seconds=horizon)
+        self.refresh_interval = refresh_interval
+        self.catchup = timedelta(seconds=catchup)
+
+        self._heap = []          # [(reminder_at, task_id)]
+        self._scheduled = {}     # task_id -> reminder_at of its live heap entry
+        self._loaded_until = None
+        self._watermark = None
+        self._next_refresh = 0.0
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        self.fired = 0
+        self.lost_claims = 0
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self.lag_total = 0.0
+
+    def _push(self, task_id, reminder_at):
+        if self._scheduled.get(task_id) == reminder_at:
+            return
+        self._scheduled[task_id] = reminder_at
+        heapq.heappush(self._heap, (reminder_at, task_id))
+
+    def refresh(self, now):
+        until = now + self.horizon
+        db = get_db()
+        with db.cursor() as cur:
+            lower = self._loaded_until or now - self.catchup
+            cur.execute(WINDOW_SQL, (lower, until))
+            rows = cur.fetchall()
+            if self._watermark is not None:
+                cur.execute(CHANGED_SQL, (self._watermark - timedelta(seconds=WATERMARK_OVERLAP), until))
+                rows += cur.fetchall()
+        db.rollback()
+
+        with self._lock:
+            for row in rows:
+                self._push(row["id"], row["reminder_at"])
+            self._watermark = now
+            self._loaded_until = until
+
+    def _pop_due(self, now):
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                reminder_at, task_id = heapq.heappop(self._heap)
+                # Lazy deletion: a newer entry for the same task supersedes this one.
+                if self._scheduled.get(task_id) != reminder_at:
+                    continue
+                del self._scheduled[task_id]
+                due.append(task_id)
+        return due
+
+    def fire_due(self, now):
+        """Claim and enqueue every reminder due at ``now``. Returns the number fired."""
+        due = self._pop_due(now)
+        if not due:
+            return 0
+
+        db = get_db()
+        try:
+            with db.cursor() as cur:
+                cur.execute(CLAIM_SQL, (due, now))
+                claimed = cur.fetchall()
+                for row in claimed:
+                    enqueue(cur, TASK_REMINDER, row["task_id"])
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Put them back so the next pass retries.
+            with self._lock:
+                for task_id in due:
+                    heapq.heappush(self._heap, (now, task_id))
+                    self._scheduled[task_id] = now
+            raise
+
+        with self._lock:
+            self.lost_claims += len(due) - len(claimed)
+            for row in claimed:
+                lag = (row["fired_at"] - row["reminder_at"]).total_seconds()
+                self.fired += 1
+                self.lag_last = lag
+                self.lag_total += lag
+                self.lag_max = max(self.lag_max, lag)
+        return len(claimed)
+
+    def _seconds_until_next(self):
+        with self._lock:
+            wait = self._next_refresh - time.monotonic()
+            if self._heap:
+                wait = min(wait, (self._heap[0][0] - _utcnow()).total_seconds())
+        return max(0.0, wait)
+
+    def run_once(self):
+        now = _utcnow()
+        with self.app.app_context():
+            if time.monotonic() >= self._next_refresh:
+                self.refresh(now)
+                self._next_refresh = time.monotonic() + self.refresh_interval
+            self.fire_due(now)
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except psycopg2.OperationalError as e:
+                print(f"[scheduler] Warning: database unavailable, retrying: {e}")
+                self._stop.wait(self.refresh_interval)
+                continue
+            self._stop.wait(self._seconds_until_next())
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        now = _utcnow()
+        with self._lock:
+            due = sum(1 for reminder_at, _ in self._heap if reminder_at <= now)
+            return {
+                "scheduled": len(self._scheduled),
+                "due": due,
+                "next_at": self._heap[0][0].isoformat() if self._heap else None,
+                "loaded_until": self._loaded_until.isoformat() if self._loaded_until else None,
+                "fired": self.fired,
+                "lost_claims": self.lost_claims,
+                "lag_last_s": round(self.lag_last, 3),
+                "lag_avg_s": round(self.lag_total / self.fired, 3) if self.fired else 0.0,
+                "lag_max_s": round(self.lag_max, 3),
+            }
+
+
+def reminder_status(cur):
+    """Cluster-wide view from the database: backlog and recent firing lag."""
+    cur.execute(
+        """SELECT COUNT(*) AS backlog, MIN(t.reminder_at) AS oldest_due
+           FROM tasks t
+           WHERE t.reminder_at IS NOT NULL AND t.archived = FALSE AND t.completed = FALSE
+             AND t.reminder_at <= NOW() AND t.reminder_at > NOW() - make_interval(secs => %s)
+             AND NOT EXISTS (
+                 SELECT 1 FROM reminder_deliveries d
+                 WHERE d.task_id = t.id AND d.reminder_at = t.reminder_at
+             )""",
+        (CATCHUP,),
+    )
+    backlog = cur.fetchone()
+    cur.execute(
+        """SELECT COUNT(*) AS fired,
+                  EXTRACT(EPOCH FROM AVG(fired_at - reminder_at)) AS lag_avg_s,
+                  EXTRACT(EPOCH FROM MAX(fired_at - reminder_at)) AS lag_max_s
+           FROM reminder_deliveries
+           WHERE fired_at > NOW() - INTERVAL '1 hour'"""
+    )
+    recent = cur.fetchone()
+    return {
+        "backlog": backlog["backlog"],
+        "oldest_due": backlog["oldest_due"].isoformat() if backlog["oldest_due"] else None,
+        "fired_last_hour": recent["fired"],
+        "lag_avg_s": float(recent["lag_avg_s"] or 0),
+        "lag_max_s": float(recent["lag_max_s"] or 0),
+    }
+
+
+@click.command("reminder-scheduler")
+@click.option("--stats-interval", default=60.0, show_default=True, help="Seconds between stats log lines (0 to disable).")
+@click.option("--metrics-port", default=0, help="Serve Prometheus /metrics on this port (0 to disable).")
+@with_appcontext
+def reminder_scheduler_command(stats_interval, metrics_port):
+    """Fire due task reminders."""
+    scheduler = ReminderScheduler(current_app._get_current_object())
+    if metrics_port:
+        serve_metrics(current_app._get_current_object(), metrics_port)
+
+    if stats_interval:
+        def log_stats():
+            while not scheduler._stop.wait(stats_interval):
+                print(f"[scheduler] {scheduler.stats()}")
+        threading.Thread(target=log_stats, daemon=True).start()
+
+    print(f"[scheduler] Started (horizon={HORIZON}s, refresh={REFRESH_INTERVAL}s)")
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        scheduler.stop()
@@ -0,0 +1,56 @@
+import os
+import re
+
+SEARCH_LIMIT = int(os.getenv("SEARCH_LIMIT", 20))
+# Ranking needs every match's tsvector; cap how many matches get ranked so a
+# one-letter prefix cannot turn into a full-table sort. Past the cap, which
+# matches get ranked is arbitrary (whatever the GIN bitmap scan yields first):
+# ordering them would mean reading and sorting every match, since no index
+# on tasks serves the search filters in updated_at order.
+RANK_CANDIDATES = int(os.getenv("SEARCH_RANK_CANDIDATES", 2000))
+MAX_TERMS = 8
+# Shorter terms match whole words only: a one- or two-letter prefix expands
+# to most of the index and would blow the latency budget.
+MIN_PREFIX = int(os.getenv("SEARCH_MIN_PREFIX", 3))
+
+_WORD = re.compile(r"\w+")
+
+# filter value -> SQL predicate
+ARCHIVED_FILTERS = {"false": "archived = FALSE", "true": "archived = TRUE", "any": "TRUE"}
+COMPLETED_FILTERS = {"any": "TRUE", "false": "completed = FALSE", "true": "completed = TRUE"}
+
+RESULT_COLUMNS = (
+    "id, title, LEFT(body, 101) AS body, completed, archived, reminder_at, created_at, updated_at"
+)
+
+
+def build_tsquery(text):
+    """Turn free text into a prefix tsquery: ``"weekly rep"`` -> ``"weekly:* & rep:*"``.
+
+    Only word characters survive, so the result is always valid
+    ``to_tsquery`` input. Returns None when nothing searchable is left.
+    """
+    terms = _WORD.findall(text.lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" if len(term) >= MIN_PREFIX else term for term in terms)
+
+
+def search_tasks(cur, text, archived="false", completed="any", limit=SEARCH_LIMIT):
+    """Return up to ``limit`` tasks matching ``text``, best match first."""
+    query = build_tsquery(text)
+    if query is None:
+        return []
+    filters = f"{ARCHIVED_FILTERS.get(archived, 'archived = FALSE')} AND {COMPLETED_FILTERS.get(completed, 'TRUE')}"
+    cur.execute(
+        f"""SELECT {RESULT_COLUMNS}, ts_rank_cd(search, q) AS rank
+            FROM (
+                SELECT * FROM tasks
+                WHERE search @@ to_tsquery('simple', %(q)s) AND {filters}
+                LIMIT %(candidates)s
+            ) t, to_tsquery('simple', %(q)s) q
+            ORDER BY rank DESC, updated_at DESC, id DESC
+            LIMIT %(limit)s""",
+        {"q": query, "candidates": RANK_CANDIDATES, "limit": limit},
+    )
+    return cur.fetchall()
@@ -41,3 +41,4 @@ CREATE TRIGGER subscribers_updated_at
     BEFORE UPDATE ON subscribers
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at();
+
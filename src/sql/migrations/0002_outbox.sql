@@ -0,0 +1,16 @@
+-- Transactional mail outbox: rows are written in the same transaction as the
+-- task change and delivered by `flask outbox-worker`.
+CREATE TABLE IF NOT EXISTS outbox (
+    id              BIGSERIAL PRIMARY KEY,
+    kind            VARCHAR(32) NOT NULL,
+    task_id         INTEGER NOT NULL REFERENCES tasks(id),
+    status          VARCHAR(16) NOT NULL DEFAULT 'pending',
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    last_error      TEXT,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    sent_at         TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS outbox_pending_idx
+    ON outbox (next_attempt_at, id) WHERE status = 'pending';
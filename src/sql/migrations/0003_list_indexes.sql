@@ -0,0 +1,21 @@
+-- migrate: no-transaction
+-- Indexes for the keyset-paginated list views and the reminders query.
+-- Built CONCURRENTLY so live reads and writes on tasks/subscribers are never
+-- blocked. Each index is dropped first so a half-built (INVALID) index left
+-- by an interrupted run is rebuilt on retry.
+
+DROP INDEX CONCURRENTLY IF EXISTS tasks_active_created_idx;
+CREATE INDEX CONCURRENTLY tasks_active_created_idx
+    ON tasks (created_at DESC, id DESC) WHERE archived = FALSE;
+
+DROP INDEX CONCURRENTLY IF EXISTS tasks_archived_updated_idx;
+CREATE INDEX CONCURRENTLY tasks_archived_updated_idx
+    ON tasks (updated_at DESC, id DESC) WHERE archived = TRUE;
+
+DROP INDEX CONCURRENTLY IF EXISTS tasks_reminder_at_idx;
+CREATE INDEX CONCURRENTLY tasks_reminder_at_idx
+    ON tasks (reminder_at) WHERE reminder_at IS NOT NULL AND archived = FALSE;
+
+DROP INDEX CONCURRENTLY IF EXISTS subscribers_created_idx;
+CREATE INDEX CONCURRENTLY subscribers_created_idx
+    ON subscribers (created_at DESC, id DESC);
@@ -0,0 +1,13 @@
+-- One row per fired reminder. The primary key doubles as the claim: a
+-- scheduler instance fires a reminder only if its INSERT wins, so any number
+-- of instances can run without double-sending. Keying on reminder_at means a
+-- rescheduled reminder fires again at its new time.
+CREATE TABLE IF NOT EXISTS reminder_deliveries (
+    task_id     INTEGER NOT NULL REFERENCES tasks(id),
+    reminder_at TIMESTAMPTZ NOT NULL,
+    fired_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (task_id, reminder_at)
+);
+
+CREATE INDEX IF NOT EXISTS reminder_deliveries_fired_idx
+    ON reminder_deliveries (fired_at);
@@ -0,0 +1,7 @@
+-- migrate: no-transaction
+-- Lets the reminder scheduler pick up edited reminders incrementally
+-- (WHERE updated_at > watermark) without scanning the whole tasks table.
+
+DROP INDEX CONCURRENTLY IF EXISTS tasks_reminder_updated_idx;
+CREATE INDEX CONCURRENTLY tasks_reminder_updated_idx
+    ON tasks (updated_at) WHERE reminder_at IS NOT NULL AND archived = FALSE;
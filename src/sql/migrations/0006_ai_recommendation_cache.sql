@@ -0,0 +1,11 @@
+-- Shared second-level cache for /tasks/ai-suggest, keyed by a hash of the
+-- normalized title/body, model and prompt template (see src/ai.py).
+CREATE TABLE IF NOT EXISTS ai_recommendation_cache (
+    key            CHAR(64) PRIMARY KEY,
+    model          VARCHAR(64) NOT NULL,
+    recommendation TEXT NOT NULL,
+    created_at     TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ai_recommendation_cache_created_idx
+    ON ai_recommendation_cache (created_at);
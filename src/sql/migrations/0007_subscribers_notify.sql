@@ -0,0 +1,17 @@
+-- Broadcast every change to subscribers so processes caching the active
+-- recipient list (src/recipients.py) can drop it immediately. Statement-level,
+-- and NOTIFY collapses duplicates per transaction, so bulk changes send one
+-- message.
+CREATE OR REPLACE FUNCTION notify_subscribers_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('subscribers_changed', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS subscribers_notify ON subscribers;
+CREATE TRIGGER subscribers_notify
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON subscribers
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_subscribers_changed();
@@ -0,0 +1,15 @@
+-- Bulk operations: one outbox row can carry a batch of tasks (a single
+-- "N tasks completed" notification), and archived tasks can be deleted
+-- permanently, taking their queued mail and reminder history with them.
+ALTER TABLE outbox ADD COLUMN IF NOT EXISTS task_ids INTEGER[];
+ALTER TABLE outbox ALTER COLUMN task_id DROP NOT NULL;
+
+ALTER TABLE outbox DROP CONSTRAINT IF EXISTS outbox_task_id_fkey;
+ALTER TABLE outbox
+    ADD CONSTRAINT outbox_task_id_fkey
+    FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE;
+
+ALTER TABLE reminder_deliveries DROP CONSTRAINT IF EXISTS reminder_deliveries_task_id_fkey;
+ALTER TABLE reminder_deliveries
+    ADD CONSTRAINT reminder_deliveries_task_id_fkey
+    FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE;
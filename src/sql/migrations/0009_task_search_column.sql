@@ -0,0 +1,12 @@
+-- Full-text search document for tasks, maintained by Postgres itself.
+-- 'simple' does no stemming or stop-word removal, so English and Spanish
+-- text (AI recommendations are in Spanish) are indexed alike; the search
+-- endpoint uses prefix queries instead. Weights rank title matches first.
+-- Adding a STORED generated column rewrites the table once.
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(body, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(reminder_note, '')), 'C') ||
+        setweight(to_tsvector('simple', coalesce(ai_recommendation, '')), 'D')
+    ) STORED;
@@ -0,0 +1,5 @@
+-- migrate: no-transaction
+-- GIN index for the search column added in 0009, built without blocking writes.
+
+DROP INDEX CONCURRENTLY IF EXISTS tasks_search_idx;
+CREATE INDEX CONCURRENTLY tasks_search_idx ON tasks USING GIN (search);
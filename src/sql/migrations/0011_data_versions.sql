@@ -0,0 +1,36 @@
+-- Version counters for the rendered-page cache (src/page_cache.py). Each
+-- statement that changes a table bumps that table's counter once, so a page
+-- cached under the versions it was rendered with is stale exactly when one
+-- of them has moved. The bump commits together with the change, so nobody
+-- can read a new version and still see the old rows.
+--
+-- Statement-level rather than inside the row-level update_updated_at(): that
+-- trigger only sees UPDATEs, and would bump the counter once per row of a
+-- bulk change.
+CREATE TABLE IF NOT EXISTS data_versions (
+    name    TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO data_versions (name) VALUES ('tasks'), ('subscribers')
+ON CONFLICT (name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_data_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tasks_data_version ON tasks;
+CREATE TRIGGER tasks_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tasks
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_data_version();
+
+DROP TRIGGER IF EXISTS subscribers_data_version ON subscribers;
+CREATE TRIGGER subscribers_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON subscribers
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_data_version();
@@ -0,0 +1,105 @@
+-- Row counts for the nav and /tasks/stats, kept current by triggers so
+-- nothing has to COUNT(*) the tables on a page load (src/stats.py).
+--
+-- Statement-level triggers with transition tables, like the data_versions
+-- ones: a statement changing N rows updates each affected counter once,
+-- and a statement that moves no row between counters (editing a title)
+-- updates none. Counters are updated in name order, so concurrent writers
+-- always lock them in the same order and cannot deadlock on them.
+-- `flask stats-reconcile` corrects whatever slips past the triggers
+-- (session_replication_role = replica, disabled triggers, manual fixes).
+CREATE TABLE IF NOT EXISTS stats_counters (
+    name       TEXT PRIMARY KEY,
+    value      BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- The counter a row belongs to; the triggers and the reconciliation share these.
+CREATE OR REPLACE FUNCTION task_stat(t tasks)
+RETURNS TEXT AS $$
+    SELECT CASE WHEN t.archived THEN 'tasks_archived'
+                WHEN t.completed THEN 'tasks_completed'
+                ELSE 'tasks_pending' END;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION subscriber_stat(s subscribers)
+RETURNS TEXT AS $$
+    SELECT CASE WHEN s.active THEN 'subscribers_active' ELSE 'subscribers_inactive' END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- TG_ARGV[0] names the table's classifier function above.
+CREATE OR REPLACE FUNCTION count_stats()
+RETURNS TRIGGER AS $$
+DECLARE
+    delta RECORD;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        UPDATE stats_counters SET value = 0, updated_at = NOW()
+        WHERE starts_with(name, TG_TABLE_NAME || '_') AND value <> 0;
+        RETURN NULL;
+    END IF;
+    FOR delta IN EXECUTE format(
+        'SELECT name, SUM(n) AS n FROM (%s) rows GROUP BY name HAVING SUM(n) <> 0 ORDER BY name',
+        CASE TG_OP
+            WHEN 'INSERT' THEN format('SELECT %I(r) AS name, 1 AS n FROM new_rows r', TG_ARGV[0])
+            WHEN 'DELETE' THEN format('SELECT %I(r) AS name, -1 AS n FROM old_rows r', TG_ARGV[0])
+            ELSE format('SELECT %1$I(r) AS name, 1 AS n FROM new_rows r'
+                        ' UNION ALL SELECT %1$I(r), -1 FROM old_rows r', TG_ARGV[0])
+        END)
+    LOOP
+        UPDATE stats_counters SET value = value + delta.n, updated_at = NOW() WHERE name = delta.name;
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+INSERT INTO stats_counters (name) VALUES
+    ('tasks_pending'), ('tasks_completed'), ('tasks_archived'),
+    ('subscribers_active'), ('subscribers_inactive')
+ON CONFLICT (name) DO NOTHING;
+
+-- A trigger with transition tables takes a single event, hence one per event.
+DROP TRIGGER IF EXISTS tasks_stats_insert ON tasks;
+CREATE TRIGGER tasks_stats_insert
+    AFTER INSERT ON tasks REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_stats('task_stat');
+
+DROP TRIGGER IF EXISTS tasks_stats_update ON tasks;
+CREATE TRIGGER tasks_stats_update
+    AFTER UPDATE ON tasks REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_stats('task_stat');
+
+DROP TRIGGER IF EXISTS tasks_stats_delete ON tasks;
+CREATE TRIGGER tasks_stats_delete
+    AFTER DELETE ON tasks REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_stats('task_stat');
+
+DROP TRIGGER IF EXISTS tasks_stats_truncate ON tasks;
+CREATE TRIGGER tasks_stats_truncate
+    AFTER TRUNCATE ON tasks
+    FOR EACH STATEMENT EXECUTE FUNCTION count_stats();
+
+DROP TRIGGER IF EXISTS subscribers_stats_insert ON subscribers;
+CREATE TRIGGER subscribers_stats_insert
+    AFTER INSERT ON subscribers REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_stats('subscriber_stat');
+
+DROP TRIGGER IF EXISTS subscribers_stats_update ON subscribers;
+CREATE TRIGGER subscribers_stats_update
+    AFTER UPDATE ON subscribers REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_stats('subscriber_stat');
+
+DROP TRIGGER IF EXISTS subscribers_stats_delete ON subscribers;
+CREATE TRIGGER subscribers_stats_delete
+    AFTER DELETE ON subscribers REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_stats('subscriber_stat');
+
+DROP TRIGGER IF EXISTS subscribers_stats_truncate ON subscribers;
+CREATE TRIGGER subscribers_stats_truncate
+    AFTER TRUNCATE ON subscribers
+    FOR EACH STATEMENT EXECUTE FUNCTION count_stats();
+
+-- The counters start at zero. The initial count runs in 0017, outside this
+-- transaction: here it would hold the trigger change's table locks, which
+-- block every write to tasks (and DROP TRIGGER's every read), for as long
+-- as counting the table takes.
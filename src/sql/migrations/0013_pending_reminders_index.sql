@@ -0,0 +1,10 @@
+-- migrate: no-transaction
+-- Overdue reminders change with the clock, so src/stats.py counts them when
+-- asked instead of keeping a counter. This index holds only the reminders
+-- still waiting on an open task, so that count is an index-only range scan
+-- over the overdue ones alone. The reminder scheduler's window query, which
+-- has the same filter, reads it too.
+
+DROP INDEX CONCURRENTLY IF EXISTS tasks_pending_reminder_idx;
+CREATE INDEX CONCURRENTLY tasks_pending_reminder_idx
+    ON tasks (reminder_at) WHERE reminder_at IS NOT NULL AND archived = FALSE AND completed = FALSE;
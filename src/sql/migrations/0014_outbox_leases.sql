@@ -0,0 +1,11 @@
+-- migrate: no-transaction
+-- The outbox worker claims rows in a short transaction of its own: it sets
+-- status 'sending' and pushes next_attempt_at out by OUTBOX_LEASE, which is
+-- then the lease's expiry. A row whose worker died mid-send is claimed
+-- again once that passes, so the due-rows index covers both statuses.
+
+DROP INDEX CONCURRENTLY IF EXISTS outbox_due_idx;
+CREATE INDEX CONCURRENTLY outbox_due_idx
+    ON outbox (next_attempt_at, id) WHERE status IN ('pending', 'sending');
+
+DROP INDEX CONCURRENTLY IF EXISTS outbox_pending_idx;
@@ -0,0 +1,5 @@
+-- Addresses a message still has to reach. NULL means every active
+-- subscriber, as before; when the SMTP connection drops partway through a
+-- send, the worker stores the addresses it did not reach here and retries
+-- only those.
+ALTER TABLE outbox ADD COLUMN IF NOT EXISTS recipients TEXT[];
@@ -0,0 +1,68 @@
+-- Spread the stats counters (0012) and the data_versions counters (0011)
+-- over 16 slot rows each. With one row per counter, every transaction that
+-- wrote a task waited on the same two row locks until the previous one
+-- committed. Each backend now writes the slot its pid picks, so concurrent
+-- writers from different connections mostly update different rows, and one
+-- transaction always stays on one slot. Readers add the slots up.
+--
+-- A version read as a sum still moves only when a change commits: slots
+-- only ever grow, and a later snapshot sees every commit an earlier one saw.
+ALTER TABLE stats_counters ADD COLUMN IF NOT EXISTS slot SMALLINT NOT NULL DEFAULT 0;
+ALTER TABLE stats_counters DROP CONSTRAINT IF EXISTS stats_counters_pkey;
+ALTER TABLE stats_counters ADD PRIMARY KEY (name, slot);
+
+INSERT INTO stats_counters (name, slot)
+SELECT c.name, s.slot
+FROM (SELECT DISTINCT name FROM stats_counters) c, generate_series(1, 15) AS s(slot)
+ON CONFLICT (name, slot) DO NOTHING;
+
+ALTER TABLE data_versions ADD COLUMN IF NOT EXISTS slot SMALLINT NOT NULL DEFAULT 0;
+ALTER TABLE data_versions DROP CONSTRAINT IF EXISTS data_versions_pkey;
+ALTER TABLE data_versions ADD PRIMARY KEY (name, slot);
+
+INSERT INTO data_versions (name, slot)
+SELECT v.name, s.slot
+FROM (SELECT DISTINCT name FROM data_versions) v, generate_series(1, 15) AS s(slot)
+ON CONFLICT (name, slot) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION counter_slot()
+RETURNS SMALLINT AS $$
+    SELECT (pg_backend_pid() % 16)::SMALLINT;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION bump_data_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = TG_TABLE_NAME AND slot = counter_slot();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- As in 0012, but on this backend's slot; counters still in name order.
+-- Reconciliation corrects slot 0.
+CREATE OR REPLACE FUNCTION count_stats()
+RETURNS TRIGGER AS $$
+DECLARE
+    delta RECORD;
+    my_slot SMALLINT := counter_slot();
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        UPDATE stats_counters SET value = 0, updated_at = NOW()
+        WHERE starts_with(name, TG_TABLE_NAME || '_') AND value <> 0;
+        RETURN NULL;
+    END IF;
+    FOR delta IN EXECUTE format(
+        'SELECT name, SUM(n) AS n FROM (%s) rows GROUP BY name HAVING SUM(n) <> 0 ORDER BY name',
+        CASE TG_OP
+            WHEN 'INSERT' THEN format('SELECT %I(r) AS name, 1 AS n FROM new_rows r', TG_ARGV[0])
+            WHEN 'DELETE' THEN format('SELECT %I(r) AS name, -1 AS n FROM old_rows r', TG_ARGV[0])
+            ELSE format('SELECT %1$I(r) AS name, 1 AS n FROM new_rows r'
+                        ' UNION ALL SELECT %1$I(r), -1 FROM old_rows r', TG_ARGV[0])
+        END)
+    LOOP
+        UPDATE stats_counters SET value = value + delta.n, updated_at = NOW()
+        WHERE name = delta.name AND slot = my_slot;
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
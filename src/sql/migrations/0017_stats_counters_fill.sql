@@ -0,0 +1,22 @@
+-- Initial counts for the stats counters (0012), as their own step so no
+-- table lock is held while tasks is counted: this reads tasks under a
+-- plain snapshot, and reads and writes go on meanwhile.
+--
+-- The same correction `flask stats-reconcile` makes: the triggers have
+-- counted every write committed since 0012, so one snapshot's recount
+-- minus its counters is exactly what they missed, and it is added to
+-- slot 0 as an increment. Writes committed meanwhile keep their own.
+-- On a database whose counters are already right, this changes nothing.
+UPDATE stats_counters c SET value = c.value + d.drift, updated_at = NOW()
+FROM (
+    WITH actual AS (
+        SELECT task_stat(t) AS name, COUNT(*) AS value FROM tasks t GROUP BY 1
+        UNION ALL
+        SELECT subscriber_stat(s), COUNT(*) FROM subscribers s GROUP BY 1
+    ), counted AS (
+        SELECT name, SUM(value) AS value FROM stats_counters GROUP BY name
+    )
+    SELECT k.name, COALESCE(a.value, 0) - k.value AS drift
+    FROM counted k LEFT JOIN actual a ON a.name = k.name
+) d
+WHERE c.name = d.name AND c.slot = 0 AND d.drift <> 0;
@@ -0,0 +1,191 @@
+import os
+import time
+import threading
+import click
+import psycopg2
+from flask import current_app, g
+from flask.cli import with_appcontext
+from werkzeug.local import LocalProxy
+from src.db import get_db, get_read_db
+from src.metrics import register_collector, serve_metrics
+
+RECONCILE_INTERVAL = float(os.getenv("STATS_RECONCILE_INTERVAL", 3600))
+OVERDUE_TTL = float(os.getenv("STATS_OVERDUE_TTL", 30))
+# pg_advisory_xact_lock key (next to the migrations' 727274001): one reconciliation at a time.
+RECONCILE_LOCK_KEY = 727274002
+
+# Counter in stats_counters -> key in the stats dict. Each counter is spread
+# over slot rows (0016) and read as their sum.
+FIELDS = {
+    "tasks_pending": "pending",
+    "tasks_completed": "completed",
+    "tasks_archived": "archived",
+    "subscribers_active": "active_subscribers",
+}
+
+STATS_SQL = """
+    SELECT name, SUM(value)::bigint AS value FROM stats_counters WHERE name = ANY(%s) GROUP BY name"""
+
+# Overdue reminders depend on the clock, so no trigger can keep them; they
+# are counted, by an index-only scan of tasks_pending_reminder_idx (0013).
+# Reminders stay overdue until their task is closed, so the scan grows with
+# them; the result is kept for OVERDUE_TTL seconds per process rather than
+# counted on every page view and page-cache lookup.
+OVERDUE_SQL = """
+    SELECT COUNT(*) AS value FROM tasks
+    WHERE reminder_at IS NOT NULL AND archived = FALSE AND completed = FALSE
+      AND reminder_at <= NOW()"""
+
+# One statement, so the recount and the counters come from the same snapshot:
+# the difference is drift, never a write that is merely in flight.
+DRIFT_SQL = """
+    WITH actual AS (
+        SELECT task_stat(t) AS name, COUNT(*) AS value FROM tasks t GROUP BY 1
+        UNION ALL
+        SELECT subscriber_stat(s), COUNT(*) FROM subscribers s GROUP BY 1
+    ), counted AS (
+        SELECT name, SUM(value)::bigint AS value FROM stats_counters GROUP BY name
+    )
+    SELECT c.name, c.value, COALESCE(a.value, 0) - c.value AS drift
+    FROM counted c LEFT JOIN actual a ON a.name = c.name
+    ORDER BY c.name"""
+
+
+_overdue = (0, 0.0)  # (count, monotonic expiry)
+
+
+def _overdue_reminders(cur):
+    global _overdue
+    count, expires = _overdue
+    if expires <= time.monotonic():
+        cur.execute(OVERDUE_SQL)
+        count = cur.fetchone().value
+        _overdue = (count, time.monotonic() + OVERDUE_TTL)
+    return count
+
+
+def read_stats(cur):
+    cur.execute(STATS_SQL, (list(FIELDS),))
+    counts = {FIELDS.get(row.name, row.name): row.value for row in cur.fetchall()}
+    stats = {key: counts.get(key, 0) for key in FIELDS.values()}
+    stats["overdue_reminders"] = _overdue_reminders(cur)
+    return stats
+
+
+def get_stats():
+    """Pending, completed and archived tasks, overdue reminders, active subscribers.
+
+    Read once per request, from the read connection, and kept on ``g``: the
+    page cache's key and the nav in ``base.html`` use the same numbers. The
+    overdue count may be up to ``OVERDUE_TTL`` seconds old.
+    """
+    if "stats" not in g:
+        db = get_read_db()
+        with db.cursor() as cur:
+            g.stats = read_stats(cur)
+        db.rollback()
+    return g.stats
+
+
+def _nav_stats():
+    # The nav is decoration: a page renders without its counts rather than fail.
+    if "nav_stats" not in g:
+        try:
+            g.nav_stats = get_stats()
+        except psycopg2.OperationalError:
+            g.nav_stats = None
+        except psycopg2.Error:
+            get_read_db().rollback()
+            g.nav_stats = None
+    return g.nav_stats
+
+
+def init_stats(app):
+    # Lazy: only pages that show the counts query them.
+    nav_stats = LocalProxy(_nav_stats)
+    app.context_processor(lambda: {"nav_stats": nav_stats})
+
+
+# --- reconciliation -----------------------------------------------------------
+
+_corrections = {}  # counter -> rows corrected, in this process
+_corrections_lock = threading.Lock()
+
+
+def reconcile(conn):
+    """Correct counters that drifted from the tables; returns ``[(name, drift, value)]``.
+
+    The drift is measured in one snapshot and applied to slot 0 as
+    ``value + drift``, so writes committed meanwhile keep their own
+    increments, and in name order, the order the triggers lock counters in.
+    Returns None if another reconciliation holds the lock.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_xact_lock(%s) AS locked", (RECONCILE_LOCK_KEY,))
+            if not cur.fetchone().locked:
+                conn.rollback()
+                return None
+            cur.execute(DRIFT_SQL)
+            corrections = []
+            for row in cur.fetchall():
+                if row.drift:
+                    cur.execute(
+                        "UPDATE stats_counters SET value = value + %s, updated_at = NOW()"
+                        " WHERE name = %s AND slot = 0",
+                        (row.drift, row.name),
+                    )
+                    corrections.append((row.name, row.drift, row.value + row.drift))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    with _corrections_lock:
+        for name, drift, _ in corrections:
+            _corrections[name] = _corrections.get(name, 0) + abs(drift)
+    return corrections
+
+
+def _stats_metrics():
+    with _corrections_lock:
+        corrections = dict(_corrections)
+    return [
+        ("taskflow_stats_drift_corrected_total", "counter", "Rows of drift stats-reconcile corrected, by counter.",
+         [({"counter": name}, value) for name, value in sorted(corrections.items())]),
+    ]
+
+
+register_collector(_stats_metrics)
+
+
+@click.command("stats-reconcile")
+@click.option("--interval", default=RECONCILE_INTERVAL, show_default=True,
+              help="Seconds between runs (0: run once and exit).")
+@click.option("--metrics-port", default=0, help="Serve Prometheus /metrics on this port (0 to disable).")
+@with_appcontext
+def stats_reconcile_command(interval, metrics_port):
+    """Recount the stats counters and correct any drift."""
+    app = current_app._get_current_object()
+    if metrics_port:
+        serve_metrics(app, metrics_port)
+    while True:
+        started = time.perf_counter()
+        try:
+            # A context per run, so a connection lost in one is not reused in the next.
+            with app.app_context():
+                corrections = reconcile(get_db())
+        except psycopg2.OperationalError as e:
+            if not interval:
+                raise
+            print(f"[stats] Warning: database unavailable, retrying: {e}")
+        else:
+            elapsed = (time.perf_counter() - started) * 1000
+            if corrections is None:
+                print("[stats] Another reconciliation is running; skipped")
+            elif not corrections:
+                print(f"[stats] Counters match ({elapsed:.0f} ms)")
+            for name, drift, value in corrections or ():
+                print(f"[stats] Corrected {name} by {drift:+d} to {value} ({elapsed:.0f} ms)")
+        if not interval:
+            return
+        time.sleep(interval)
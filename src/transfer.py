@@ -0,0 +1,273 @@
+import io
+import os
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+import click
+import psycopg2
+from flask.cli import with_appcontext
+from src.db import get_db
+
+EXPORT_CHUNK = int(os.getenv("EXPORT_CHUNK", 2000))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 10000))
+MAX_REPORTED_ERRORS = 100
+
+FORMATS = ("csv", "ndjson")
+MIMETYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+EXPORT_COLUMNS = (
+    "id", "title", "body", "completed", "archived", "reminder_at",
+    "reminder_note", "ai_recommendation", "created_at", "updated_at",
+)
+# Ids are not imported: rows get fresh ids in the target database.
+IMPORT_COLUMNS = EXPORT_COLUMNS[1:]
+
+STAGING_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS tasks_import (
+        title TEXT, body TEXT, completed BOOLEAN, archived BOOLEAN,
+        reminder_at TIMESTAMPTZ, reminder_note TEXT, ai_recommendation TEXT,
+        created_at TIMESTAMPTZ, updated_at TIMESTAMPTZ
+    ) ON COMMIT DROP"""
+
+COPY_SQL = f"COPY tasks_import ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+
+MOVE_SQL = """
+    INSERT INTO tasks (title, body, completed, archived, reminder_at, reminder_note,
+                       ai_recommendation, created_at, updated_at)
+    SELECT title, body, COALESCE(completed, FALSE), COALESCE(archived, FALSE),
+           reminder_at, reminder_note, ai_recommendation,
+           COALESCE(created_at, NOW()), COALESCE(updated_at, created_at, NOW())
+    FROM tasks_import;
+    TRUNCATE tasks_import"""
+
+
+def format_for(filename, default="csv"):
+    ext = os.path.splitext(filename or "")[1].lstrip(".").lower()
+    if ext in ("jsonl", "json"):
+        return "ndjson"
+    return ext if ext in FORMATS else default
+
+
+# --- export -----------------------------------------------------------------
+
+def export_tasks(db, fmt="csv"):
+    """Yield the tasks table as CSV or NDJSON text, ``EXPORT_CHUNK`` rows at a time.
+
+    Rows come from a server-side cursor, so memory use does not depend on
+    the table size. For NDJSON, Postgres renders each row with ``row_to_json``.
+    """
+    columns = ", ".join(EXPORT_COLUMNS)
+    cur = db.cursor(name="tasks_export", cursor_factory=psycopg2.extensions.cursor)
+    cur.itersize = EXPORT_CHUNK
+    try:
+        if fmt == "ndjson":
+            cur.execute(f"SELECT row_to_json(t)::text FROM (SELECT {columns} FROM tasks ORDER BY id) t")
+            while True:
+                rows = cur.fetchmany(EXPORT_CHUNK)
+                if not rows:
+                    break
+                yield "".join(row[0] + "\n" for row in rows)
+        else:
+            # Cast in SQL: Postgres formats the values, Python only quotes them.
+            cur.execute(f"SELECT {', '.join(c + '::text' for c in EXPORT_COLUMNS)} FROM tasks ORDER BY id")
+            buf = io.StringIO()
+            writer = csv.writer(buf, lineterminator="\n")
+            writer.writerow(EXPORT_COLUMNS)
+            while True:
+                rows = cur.fetchmany(EXPORT_CHUNK)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+            if buf.tell():
+                yield buf.getvalue()
+    finally:
+        cur.close()
+        db.rollback()
+
+
+# --- import -----------------------------------------------------------------
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    rejected: int = 0
+    errors: list = field(default_factory=list)  # [(line, message)], first MAX_REPORTED_ERRORS
+    seconds: float = 0.0
+
+    def reject(self, line, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+_TRUE = {"true", "t", "1", "yes", "y"}
+_FALSE = {"false", "f", "0", "no", "n", ""}
+
+
+def _bool(value, name):
+    if value is None or isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"{name}: expected a boolean, got {value!r}")
+
+
+def _text(value, name, max_length=None):
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"{name}: expected a string")
+    value = value.strip()
+    if "\x00" in value:
+        raise ValueError(f"{name}: contains a NUL character")
+    if max_length and len(value) > max_length:
+        raise ValueError(f"{name}: longer than {max_length} characters")
+    return value or None
+
+
+def _timestamp(value, name):
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"{name}: expected an ISO 8601 timestamp")
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name}: invalid timestamp {value!r}") from None
+    # Python also reads forms Postgres doesn't (week dates, "20240105");
+    # the buffer gets the one spelling both agree on.
+    return parsed.isoformat()
+
+
+def _validate(record):
+    """Turn one input record into a staging row, or raise ValueError."""
+    title = _text(record.get("title"), "title", max_length=255)
+    if not title:
+        raise ValueError("title: required")
+    return (
+        title,
+        _text(record.get("body"), "body"),
+        _bool(record.get("completed"), "completed"),
+        _bool(record.get("archived"), "archived"),
+        _timestamp(record.get("reminder_at"), "reminder_at"),
+        _text(record.get("reminder_note"), "reminder_note"),
+        _text(record.get("ai_recommendation"), "ai_recommendation"),
+        _timestamp(record.get("created_at"), "created_at"),
+        _timestamp(record.get("updated_at"), "updated_at"),
+    )
+
+
+def _records(stream, fmt):
+    """Yield ``(line, record_or_error)`` from a text stream."""
+    if fmt == "ndjson":
+        for line, raw in enumerate(stream, start=1):
+            if not raw.strip():
+                continue
+            try:
+                record = json.loads(raw)
+            except json.JSONDecodeError as e:
+                yield line, ValueError(f"invalid JSON: {e.msg}")
+                continue
+            if not isinstance(record, dict):
+                yield line, ValueError("expected a JSON object")
+                continue
+            yield line, record
+    else:
+        reader = csv.DictReader(stream)
+        if not reader.fieldnames or "title" not in reader.fieldnames:
+            raise ValueError("CSV header must include a 'title' column")
+        for record in reader:
+            yield reader.line_num, record
+
+
+def import_tasks(db, stream, fmt="csv", batch_size=IMPORT_BATCH_SIZE):
+    """Load tasks from a CSV/NDJSON text stream with ``COPY ... FROM STDIN``.
+
+    Valid rows are copied into a temporary staging table ``batch_size`` at a
+    time and moved into ``tasks`` after each batch, so memory stays bounded.
+    Invalid rows are skipped and reported. Everything is committed as one
+    transaction at the end. No notifications are queued.
+    """
+    started = time.perf_counter()
+    report = ImportReport()
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    pending = 0
+
+    def flush(cur):
+        nonlocal pending
+        if not pending:
+            return
+        buf.seek(0)
+        cur.copy_expert(COPY_SQL, buf)
+        cur.execute(MOVE_SQL)
+        report.imported += pending
+        buf.seek(0)
+        buf.truncate()
+        pending = 0
+
+    try:
+        with db.cursor() as cur:
+            cur.execute(STAGING_SQL)
+            for line, record in _records(stream, fmt):
+                try:
+                    if isinstance(record, Exception):
+                        raise record
+                    row = _validate(record)
+                except ValueError as e:
+                    report.reject(line, str(e))
+                    continue
+                writer.writerow(row)
+                pending += 1
+                if pending >= batch_size:
+                    flush(cur)
+            flush(cur)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+# --- CLI ----------------------------------------------------------------------
+
+@click.command("export-tasks")
+@click.option("--format", "fmt", type=click.Choice(FORMATS), help="Defaults to the output file's extension, else csv.")
+@click.option("--output", "-o", type=click.File("w", encoding="utf-8"), default="-", help="Output file (default: stdout).")
+@with_appcontext
+def export_tasks_command(fmt, output):
+    """Stream all tasks to CSV or NDJSON."""
+    fmt = fmt or format_for(output.name)
+    for chunk in export_tasks(get_db(), fmt):
+        output.write(chunk)
+
+
+@click.command("import-tasks")
+@click.argument("source", type=click.File("r", encoding="utf-8-sig"))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), help="Defaults to the file's extension, else csv.")
+@click.option("--batch-size", default=IMPORT_BATCH_SIZE, show_default=True, help="Rows per COPY batch.")
+@with_appcontext
+def import_tasks_command(source, fmt, batch_size):
+    """Import tasks from a CSV or NDJSON file (use - for stdin)."""
+    fmt = fmt or format_for(source.name)
+    try:
+        report = import_tasks(get_db(), source, fmt, batch_size)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    except psycopg2.DataError as e:
+        raise click.ClickException(f"import failed: {e.diag.message_primary or e}")
+    for line, message in report.errors:
+        click.echo(f"line {line}: {message}", err=True)
+    if report.rejected > len(report.errors):
+        click.echo(f"... and {report.rejected - len(report.errors)} more", err=True)
+    click.echo(f"[import] {report.imported} imported, {report.rejected} rejected in {report.seconds:.2f}s")